@@ -0,0 +1,187 @@
+import argparse
+import hashlib
+import json
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from cache import DEFAULT_ARTIFACT_CACHE_MB
+from dashboard import (
+    OUTPUT_PROFILES, OUTPUT_FORMATS,
+    load_config, open_match, input_files, artifact_data_key, artifact_cache, compute_match_metrics, generate_dashboard,
+    output_settings, output_path_for
+)
+from scraper import match_id_from_url
+from store import load_match_meta
+
+# Matches a worker process renders before it is replaced, so matplotlib and pandas
+# caches cannot grow without bound over a season.
+MAX_TASKS_PER_CHILD = 20
+
+def load_manifest(path, data_dir):
+    """Reads a batch manifest and returns ``(teams, jobs)``.
+
+    The manifest is either a list of matches or an object with ``matches``, an optional
+    ``teams`` table (``{"<team_id>": {"name": ..., "color": ...}}``) and an optional
+    ``xt_grid`` path. A match is a WhoScored URL or id (read from ``<data_dir>/<match_id>``,
+    as ``scraper.py`` writes it) or an object with ``match_id`` and/or ``match_dir`` and
+    optional ``output`` and ``xt_grid``.
+    """
+    with open(path, "r") as f:
+        manifest = json.load(f)
+    if isinstance(manifest, list):
+        manifest = {'matches': manifest}
+
+    jobs = []
+    for entry in manifest['matches']:
+        if not isinstance(entry, dict):
+            entry = {'match_id': match_id_from_url(entry)}
+        match_dir = entry.get('match_dir') or os.path.join(data_dir, str(entry['match_id']))
+        jobs.append({
+            'label': str(entry.get('match_id') or os.path.basename(os.path.normpath(match_dir))),
+            'match_dir': match_dir,
+            'output': entry.get('output'),
+            'xt_grid': entry.get('xt_grid') or manifest.get('xt_grid'),
+        })
+    return manifest.get('teams', {}), jobs
+
+def match_config(config, teams, matchdict):
+    """``config`` with ``TEAM_COLORS`` filled in for this match's teams from the ``teams``
+    table, then the match metadata, then the configured HOME/AWAY defaults."""
+    colors = dict(config["TEAM_COLORS"])
+    for side in ('home', 'away'):
+        team = teams.get(str(matchdict[side]['teamId']), {})
+        prefix = side.upper()
+        colors[f'{prefix}_NAME'] = team.get('name') or matchdict[side].get('name') or colors[f'{prefix}_NAME']
+        colors[f'{prefix}_COLOR'] = team.get('color') or colors[f'{prefix}_COLOR']
+    return {**config, 'TEAM_COLORS': colors}
+
+def input_hash(paths, config, settings):
+    """SHA-256 over the input files' bytes, the match config and the output settings."""
+    digest = hashlib.sha256()
+    for path in paths:
+        digest.update(os.path.basename(path).encode())
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+    digest.update(json.dumps([config, settings], sort_keys=True).encode())
+    return digest.hexdigest()
+
+class Checkpoint:
+    """Append-only JSON-lines log of rendered matches and the input hash they were
+    rendered from. Each record is flushed and fsynced as soon as its match finishes,
+    so a crashed run loses at most the matches still in flight; a torn last line is
+    cut off on load."""
+
+    def __init__(self, path):
+        self.path = path
+        self.keys = {}
+        if not os.path.exists(path):
+            return
+        with open(path, "rb+") as f:
+            data = f.read()
+            complete = data.rfind(b"\n") + 1
+            f.truncate(complete)
+        for line in data[:complete].splitlines():
+            record = json.loads(line)
+            self.keys[record['match_dir']] = record['key']
+
+    def get(self, match_dir):
+        return self.keys.get(os.path.normpath(match_dir))
+
+    def record(self, match_dir, key, output):
+        match_dir = os.path.normpath(match_dir)
+        self.keys[match_dir] = key
+        with open(self.path, "a") as f:
+            f.write(json.dumps({'match_dir': match_dir, 'key': key, 'output': output, 'finished_at': time.time()}) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+
+def render_match(job, config, teams, profile='print', fmt=None, output_dir=None, previous_key=None, cache=None):
+    """Loads, analyses and renders one manifest match. Returns ``(status, key, output)``;
+    the status is ``'unchanged'`` without loading events when the input hash equals
+    ``previous_key`` and the output still exists. ``cache`` is an ``ArtifactCache`` for
+    the metric results."""
+    settings = output_settings(profile, fmt)
+    config = match_config(config, teams, load_match_meta(job['match_dir']))
+    filename = config["MATCH_SETTINGS"]["OUTPUT_FILE_DASHBOARD"]
+    output = job['output'] or output_path_for(
+        os.path.join(output_dir, f"{job['label']}_{filename}") if output_dir else os.path.join(job['match_dir'], filename), settings
+    )
+    key = input_hash(input_files(job['match_dir'], job['xt_grid']), config, settings)
+    if key == previous_key and os.path.exists(output):
+        return 'unchanged', key, output
+
+    ctx = open_match(job['match_dir'], job['xt_grid'])
+    data_key = artifact_data_key(job['match_dir'], job['xt_grid']) if cache is not None else None
+    generate_dashboard(compute_match_metrics(ctx, config, cache, data_key), config, output, profile, fmt)
+    return 'rendered', key, output
+
+def run_batch(jobs, config, teams, checkpoint, workers=4, profile='print', fmt=None, output_dir=None, force=False,
+              max_tasks_per_child=MAX_TASKS_PER_CHILD, cache=None):
+    """Renders every job in a process pool and records finished matches in ``checkpoint``.
+    Workers share the on-disk ``cache`` (an ``ArtifactCache``) if given.
+
+    Returns ``{label: status}`` and the elapsed wall time. Failed matches are reported
+    and left out of the checkpoint, so the next run retries them.
+    """
+    if output_dir:
+        os.makedirs(output_dir, exist_ok=True)
+    start = time.perf_counter()
+    results = {}
+    with ProcessPoolExecutor(max_workers=workers, max_tasks_per_child=max_tasks_per_child) as pool:
+        futures = {
+            pool.submit(render_match, job, config, teams, profile, fmt, output_dir, None if force else checkpoint.get(job['match_dir']), cache): job
+            for job in jobs
+        }
+        for future in as_completed(futures):
+            job = futures[future]
+            try:
+                status, key, output = future.result()
+            except Exception as e:
+                results[job['label']] = f"error: {e}"
+                print(f"ERROR: match {job['label']} failed: {e}")
+                continue
+            if status == 'rendered':
+                checkpoint.record(job['match_dir'], key, output)
+            results[job['label']] = status
+            print(f"Match {job['label']}: {status}")
+    return results, time.perf_counter() - start
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Render tactical dashboards for every match in a manifest.")
+    parser.add_argument("manifest", help="JSON manifest of matches (see load_manifest)")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--workers", type=int, default=os.cpu_count())
+    parser.add_argument("--profile", choices=list(OUTPUT_PROFILES), default="print")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="override the profile's image format")
+    parser.add_argument("--output-dir", help="write <match>_<OUTPUT_FILE_DASHBOARD> here instead of into each match directory")
+    parser.add_argument("--checkpoint", help="checkpoint file (default: <manifest>.checkpoint.jsonl)")
+    parser.add_argument("--force", action="store_true", help="render every match even if its inputs are unchanged")
+    parser.add_argument("--max-tasks-per-child", type=int, default=MAX_TASKS_PER_CHILD)
+    parser.add_argument("--cache-dir", help="metric artifact cache directory (default: <DATA_DIR>/cache/artifacts)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_ARTIFACT_CACHE_MB, help="artifact cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every metric and store nothing")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+        teams, jobs = load_manifest(args.manifest, config["MATCH_SETTINGS"]["DATA_DIR"])
+    except (OSError, KeyError, ValueError) as e:
+        print(f"FATAL ERROR: Could not read the config or manifest. Error: {e}")
+        return 1
+
+    checkpoint = Checkpoint(args.checkpoint or os.path.splitext(args.manifest)[0] + ".checkpoint.jsonl")
+    results, elapsed = run_batch(jobs, config, teams, checkpoint, args.workers, args.profile, args.format,
+                                 args.output_dir, args.force, args.max_tasks_per_child,
+                                 None if args.no_cache else artifact_cache(config, args.cache_dir, args.cache_size))
+    rendered = sum(status == 'rendered' for status in results.values())
+    unchanged = sum(status == 'unchanged' for status in results.values())
+    failed = len(results) - rendered - unchanged
+    print(f"Rendered {rendered}, unchanged {unchanged}, failed {failed} of {len(results)} matches in {elapsed:.1f}s "
+          f"({rendered / elapsed * 60:.1f} matches/min)")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,1030 @@
+import contextlib
+import inspect
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import numpy as np
+import pandas as pd
+from scipy.ndimage import gaussian_filter1d
+
+from metrics import calculate_xt, compute_xt_momentum, calculate_match_stats_by_match, fit_xt_grid
+from store import (
+    build_qualifier_index, normalize_events, compact_events, write_events, write_match_meta, load_match_meta, read_season_events,
+    read_season_rosters, load_xt_grid, write_xt_grid
+)
+from synthetic import (
+    EVENTS_PER_MATCH, PLAYERS_PER_TEAM, QUALIFIER_RATES,
+    season_fixtures, synthetic_events, synthetic_matchdict, synthetic_match_page, write_synthetic_match, write_synthetic_season
+)
+from zones import N_ZONES, spatial_index, zone_counts
+
+# Relative slowdown of a suite case's median over the baseline that counts as a regression.
+SUITE_THRESHOLD = 0.25
+
+def _legacy_xt(df_events, xT_grid):
+    df = df_events.copy()
+    df['x'] *= 1.2; df['y'] *= 0.8; df['end_x'] *= 1.2; df['end_y'] *= 0.8
+    df_xT = df[(df['type_display_name'].isin(['Pass', 'Carry'])) & (df['outcome_type_display_name'] == 'Successful')].copy()
+    n_rows, n_cols = xT_grid.shape
+    def get_bin(val, max_val, n_bins):
+        val = max(0, min(val, max_val)); return min(int(val / max_val * n_bins), n_bins - 1)
+    df_xT['xT'] = df_xT.apply(lambda row: xT_grid[get_bin(row['end_y'], 80, n_rows), get_bin(row['end_x'], 120, n_cols)] - xT_grid[get_bin(row['y'], 80, n_rows), get_bin(row['x'], 120, n_cols)], axis=1)
+    return df_xT
+
+def _legacy_momentum(df_xT, home_team_id, away_team_id, window_size=4, decay_rate=0.25):
+    max_xT_per_minute = df_xT[df_xT['team_id'].isin([home_team_id, away_team_id])].groupby(['team_id', 'minute'])['xT_clipped'].max().reset_index()
+    minutes = sorted(max_xT_per_minute['minute'].unique())
+    weighted_xT_sum = {team: [] for team in (home_team_id, away_team_id)}; momentum = []
+    for current_minute in minutes:
+        for team in (home_team_id, away_team_id):
+            recent_xT = max_xT_per_minute[(max_xT_per_minute['team_id'] == team) & (max_xT_per_minute['minute'] <= current_minute) & (max_xT_per_minute['minute'] > current_minute - window_size)]
+            weights = np.exp(-decay_rate * (current_minute - recent_xT['minute'].values))
+            weighted_xT_sum[team].append(np.sum(weights * recent_xT['xT_clipped'].values))
+        momentum.append(weighted_xT_sum[home_team_id][-1] - weighted_xT_sum[away_team_id][-1])
+    return gaussian_filter1d(momentum, sigma=1.0)
+
+def _legacy_momentum_batch(df_xT, team_ids):
+    return [_legacy_momentum(df_xT[df_xT['match_id'] == match_id], *teams) for match_id, teams in team_ids.items()]
+
+def _legacy_match_stats(df, hteam_id, ateam_id):
+    stats = {}
+    
+    home_passes = df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Pass')]
+    away_passes = df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Pass')] 
+    total_passes = len(home_passes) + len(away_passes)
+    stats['Possession'] = {'home': round((len(home_passes) / total_passes) * 100, 2) if total_passes else 0,
+                           'away': round((len(away_passes) / total_passes) * 100, 2) if total_passes else 0}
+    
+    home_touches = df[(df['team_id'] == hteam_id) & (df['is_touch'] == True) & (df['x'] >= 70)]
+    away_touches = df[(df['team_id'] == ateam_id) & (df['is_touch'] == True) & (df['x'] >= 70)] 
+    total_touches = len(home_touches) + len(away_touches)
+    stats['Field Tilt'] = {'home': round((len(home_touches) / total_touches) * 100, 2) if total_touches else 0,
+                           'away': round((len(away_touches) / total_touches) * 100, 2) if total_touches else 0}
+    
+    home_def_actions = df[(df['team_id'] == hteam_id) & (df['type_display_name'].isin(['Interception', 'Tackle', 'Foul', 'Challenge'])) & (df['x'] > 35)]
+    away_def_actions = df[(df['team_id'] == ateam_id) & (df['type_display_name'].isin(['Interception', 'Tackle', 'Foul', 'Challenge'])) & (df['x'] > 35)]
+    home_passes_ppda = df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Pass') & (df['outcome_type_display_name'] == 'Successful') & (df['x'] < 70)]
+    away_passes_ppda = df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Pass') & (df['outcome_type_display_name'] == 'Successful') & (df['x'] < 70)]
+    
+    stats['PPDA'] = {'home': round(len(away_passes_ppda) / len(home_def_actions), 2) if len(home_def_actions) > 0 else 0,
+                     'away': round(len(home_passes_ppda) / len(away_def_actions), 2) if len(away_def_actions) > 0 else 0}
+
+    stats['Tackles (Wins)'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Tackle') & (df['outcome_type_display_name'] == 'Successful')]),
+                               'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Tackle') & (df['outcome_type_display_name'] == 'Successful')])}
+    stats['Interceptions'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Interception')]),
+                              'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Interception')])}
+    stats['Clearance'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Clearance')]),
+                          'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Clearance')])}
+    stats['Aerials (Wins)'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Aerial') & (df['outcome_type_display_name'] == 'Successful')]),
+                               'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Aerial') & (df['outcome_type_display_name'] == 'Successful')])}
+    return stats
+
+def _legacy_match_stats_batch(df, team_ids):
+    return {match_id: _legacy_match_stats(df[df['match_id'] == match_id], *teams) for match_id, teams in team_ids.items()}
+
+def _time(func, *args, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+def bench_xt(xT_grid, sizes=(EVENTS_PER_MATCH, 10_000, 100_000, 1_000_000), legacy_limit=100_000):
+    print(f"{'events':>10} {'legacy (s)':>12} {'vectorized (s)':>15} {'speedup':>9}")
+    for n_events in sizes:
+        df_events = synthetic_events(n_events)
+        vectorized = _time(calculate_xt, df_events, xT_grid)
+        if n_events <= legacy_limit:
+            legacy = _time(_legacy_xt, df_events, xT_grid, repeat=1)
+            assert np.allclose(_legacy_xt(df_events, xT_grid)['xT'].values, calculate_xt(df_events, xT_grid)['xT'].values)
+            print(f"{n_events:>10} {legacy:>12.4f} {vectorized:>15.4f} {legacy / vectorized:>8.1f}x")
+        else:
+            print(f"{n_events:>10} {'-':>12} {vectorized:>15.4f} {'-':>9}")
+
+def bench_momentum(xT_grid, match_counts=(1, 10, 100, 380), legacy_limit=100):
+    print(f"{'matches':>10} {'legacy (s)':>12} {'batched (s)':>12} {'speedup':>9}")
+    for n_matches in match_counts:
+        df_xT = calculate_xt(synthetic_events(n_matches * EVENTS_PER_MATCH), xT_grid)
+        team_ids = {match_id: (13, 23) for match_id in range(n_matches)}
+        batched = _time(compute_xt_momentum, df_xT, team_ids)
+        if n_matches <= legacy_limit:
+            legacy = _time(_legacy_momentum_batch, df_xT, team_ids, repeat=1)
+            expected = np.concatenate(_legacy_momentum_batch(df_xT, team_ids))
+            assert np.allclose(expected, compute_xt_momentum(df_xT, team_ids)['momentum_smoothed'].values)
+            print(f"{n_matches:>10} {legacy:>12.4f} {batched:>12.4f} {legacy / batched:>8.1f}x")
+        else:
+            print(f"{n_matches:>10} {'-':>12} {batched:>12.4f} {'-':>9}")
+
+def bench_match_stats(match_counts=(1, 10, 100, 380), legacy_limit=100):
+    print(f"{'matches':>10} {'legacy (s)':>12} {'cube (s)':>12} {'speedup':>9}")
+    for n_matches in match_counts:
+        df_events = synthetic_events(n_matches * EVENTS_PER_MATCH)
+        team_ids = {match_id: (13, 23) for match_id in range(n_matches)}
+        cube = _time(calculate_match_stats_by_match, df_events, team_ids)
+        if n_matches <= legacy_limit:
+            legacy = _time(_legacy_match_stats_batch, df_events, team_ids, repeat=1)
+            assert _legacy_match_stats_batch(df_events, team_ids) == calculate_match_stats_by_match(df_events, team_ids)
+            print(f"{n_matches:>10} {legacy:>12.4f} {cube:>12.4f} {legacy / cube:>8.1f}x")
+        else:
+            print(f"{n_matches:>10} {'-':>12} {cube:>12.4f} {'-':>9}")
+
+def bench_startup(xT_grid, repeat=3):
+    """Wall time of a cold ``python dashboard.py`` process in stats-only and full render mode."""
+    with tempfile.TemporaryDirectory() as match_dir:
+        write_synthetic_match(match_dir, xT_grid)
+        modes = {
+            'import only': [sys.executable, '-c', 'import dashboard'],
+            'stats-only': [sys.executable, 'dashboard.py', '--match-dir', match_dir, '--stats-only', '--output', os.path.join(match_dir, 'stats.json')],
+            'render': [sys.executable, 'dashboard.py', '--match-dir', match_dir, '--output', os.path.join(match_dir, 'dashboard.png')],
+        }
+        print(f"{'mode':>12} {'wall (s)':>10}")
+        for mode, command in modes.items():
+            best = _time(lambda: subprocess.run(command, check=True, capture_output=True, env={**os.environ, 'MPLBACKEND': 'Agg'}),
+                         repeat=1 if mode == 'render' else repeat)
+            print(f"{mode:>12} {best:>10.3f}")
+
+_LOAD_SCRIPT = """
+import glob, resource, sys, time
+import pandas as pd
+from store import read_season_events
+mode, root = sys.argv[1], sys.argv[2]
+start = time.perf_counter()
+if mode == 'csv':
+    df = pd.concat([pd.read_csv(p) for p in sorted(glob.glob(root + '/*/df_events.csv'))], ignore_index=True)
+else:
+    columns = ['team_id', 'type_display_name', 'outcome_type_display_name', 'x', 'y'] if mode == 'feather-projected' else None
+    df = read_season_events(sorted(glob.glob(root + '/*/df_events.feather')), columns)
+elapsed = time.perf_counter() - start
+print(elapsed, df.memory_usage(deep=True).sum() / 1e6, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024)
+"""
+
+def bench_event_store(n_matches=380):
+    """Loads a season of events from per-match CSVs and from the columnar store."""
+    with tempfile.TemporaryDirectory() as root:
+        for match_id in range(n_matches):
+            match_dir = os.path.join(root, str(match_id))
+            os.makedirs(match_dir)
+            df_events = synthetic_events(EVENTS_PER_MATCH, seed=match_id).drop(columns=['match_id'])
+            df_events['type'] = "{'value': 1, 'displayName': '" + df_events['type_display_name'] + "'}"
+            df_events['outcome_type'] = "{'value': 1, 'displayName': '" + df_events['outcome_type_display_name'] + "'}"
+            df_events['qualifiers'] = "[{'type': {'value': 212, 'displayName': 'Length'}, 'value': '12.4'}]"
+            df_events.to_csv(os.path.join(match_dir, "df_events.csv"), index=False)
+            write_events(normalize_events(df_events, match_id), os.path.join(match_dir, "df_events.feather"))
+
+        print(f"{n_matches} matches")
+        print(f"{'source':>18} {'load (s)':>10} {'frame (MB)':>11} {'max RSS (MB)':>13}")
+        for mode in ('csv', 'feather', 'feather-projected'):
+            result = subprocess.run([sys.executable, '-c', _LOAD_SCRIPT, mode, root], check=True, capture_output=True, text=True)
+            elapsed, frame_mb, rss_mb = map(float, result.stdout.split())
+            print(f"{mode:>18} {elapsed:>10.3f} {frame_mb:>11.1f} {rss_mb:>13.1f}")
+
+def bench_qualifier_filter(n_matches=38):
+    """Set-piece filtering by regex over stringified qualifiers vs. the decoded flag columns."""
+    df_events = synthetic_events(n_matches * EVENTS_PER_MATCH)
+    qualifier_names = np.random.default_rng(0).choice(['Longball', 'CornerTaken', 'FreekickTaken', 'Cross', 'HeadPass'], len(df_events))
+    df_events['qualifiers'] = [f"[{{'type': {{'value': 1, 'displayName': '{name}'}}}}, {{'type': {{'value': 212, 'displayName': 'Length'}}, 'value': '12.4'}}]" for name in qualifier_names]
+    regex = _time(lambda: df_events['qualifiers'].astype(str).str.contains('CornerTaken|Freekick', na=False))
+    scraped = df_events.assign(qualifiers=[[{'type': {'value': 1, 'displayName': name}}, {'type': {'value': 212, 'displayName': 'Length'}, 'value': '12.4'}] for name in qualifier_names])
+    decode = _time(lambda: normalize_events(scraped, qualifier_index=build_qualifier_index(scraped)), repeat=1)
+    df_norm = normalize_events(df_events)
+    flags = _time(lambda: df_norm['is_corner'] | df_norm['is_freekick'])
+    print(f"{len(df_events)} events: regex per render {regex:.4f} s, flag mask per render {flags:.6f} s, one-off decode at ingest {decode:.3f} s")
+
+def bench_heatmap(sizes=(100, 10_000, 1_000_000), legacy_limit=10_000):
+    """Defensive-block heatmap: seaborn KDE with 5000 contour levels vs. the binned Gaussian image."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from matplotlib.colors import LinearSegmentedColormap
+    from mplsoccer import Pitch
+    from viz import pitch_heatmap, BG_COLOR, HOME_COLOR
+
+    cmap = LinearSegmentedColormap.from_list("Team colors", [BG_COLOR, HOME_COLOR], N=500)
+
+    def render(x, y, legacy):
+        fig, ax = plt.subplots(figsize=(8, 6))
+        pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_zorder=2)
+        pitch.draw(ax=ax)
+        if legacy:
+            pitch.kdeplot(x, y, ax=ax, fill=True, levels=5000, thresh=0.02, cut=4, cmap=cmap)
+        else:
+            pitch_heatmap(ax, x, y, cmap, thresh=0.02)
+        fig.canvas.draw()
+        plt.close(fig)
+
+    print(f"{'points':>10} {'kdeplot (s)':>12} {'binned (s)':>11} {'speedup':>9}")
+    rng = np.random.default_rng(0)
+    for n_points in sizes:
+        x, y = rng.uniform(0, 120, n_points), rng.uniform(0, 80, n_points)
+        binned = _time(render, x, y, False)
+        if n_points <= legacy_limit:
+            legacy = _time(render, x, y, True, repeat=1)
+            print(f"{n_points:>10} {legacy:>12.3f} {binned:>11.3f} {legacy / binned:>8.1f}x")
+        else:
+            print(f"{n_points:>10} {'-':>12} {binned:>11.3f} {'-':>9}")
+
+def bench_scraper(n_matches=40, worker_counts=(1, 4, 8)):
+    """Extraction cost per page and offline batch throughput for the local-file and HTTP backends."""
+    import functools
+    import http.server
+    import threading
+    from bs4 import BeautifulSoup
+    from scraper import HTTPBackend, LocalHTMLBackend, extract_match_centre_data, scrape_batch
+
+    with tempfile.TemporaryDirectory() as root:
+        html_dir = os.path.join(root, "html")
+        os.makedirs(html_dir)
+        for match_id in range(1, n_matches + 1):
+            with open(os.path.join(html_dir, f"{match_id}.html"), "w") as f:
+                f.write(synthetic_match_page(synthetic_matchdict(match_id), match_id))
+        with open(os.path.join(html_dir, "1.html")) as f:
+            page = f.read()
+
+        def soup_extract(html):
+            element = BeautifulSoup(html, 'html.parser').select_one('script:-soup-contains("matchCentreData")')
+            return json.loads(element.text.split("matchCentreData: ")[1].split(',\n')[0])
+
+        assert soup_extract(page) == extract_match_centre_data(page)
+        print(f"page {len(page) / 1e6:.1f} MB: BeautifulSoup {_time(soup_extract, page):.4f} s, marker + raw_decode {_time(extract_match_centre_data, page):.4f} s")
+
+        web_dir = os.path.join(root, "web")
+        for match_id in range(1, n_matches + 1):
+            os.makedirs(os.path.join(web_dir, "matches", str(match_id), "live"))
+            os.symlink(os.path.join(html_dir, f"{match_id}.html"), os.path.join(web_dir, "matches", str(match_id), "live", "index.html"))
+
+        class QuietHandler(http.server.SimpleHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+        server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(QuietHandler, directory=web_dir))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        backends = {
+            'local': (LocalHTMLBackend(html_dir), list(range(1, n_matches + 1))),
+            'http': (HTTPBackend(), [f"http://127.0.0.1:{server.server_port}/matches/{i}/live/" for i in range(1, n_matches + 1)]),
+        }
+        print(f"{'backend':>8} {'workers':>8} {'matches/min':>12}")
+        try:
+            for name, (backend, urls) in backends.items():
+                for workers in worker_counts:
+                    results, elapsed = scrape_batch(urls, backend, os.path.join(root, f"out-{name}-{workers}"), workers)
+                    assert all(status == 'saved' for status in results.values())
+                    print(f"{name:>8} {workers:>8} {len(urls) / elapsed * 60:>12.0f}")
+        finally:
+            server.shutdown()
+
+def bench_page_cache(n_matches=40, workers=4):
+    """Backfill through the local HTML backend: cold, fully cached, forced refetch and cache-only rebuild."""
+    from cache import PageCache
+    from scraper import LocalHTMLBackend, rebuild_from_cache, scrape_batch
+
+    with tempfile.TemporaryDirectory() as root:
+        html_dir = os.path.join(root, "html")
+        os.makedirs(html_dir)
+        for match_id in range(1, n_matches + 1):
+            matchdict = synthetic_matchdict(match_id)
+            matchdict['ftScore'] = "1 : 0"
+            with open(os.path.join(html_dir, f"{match_id}.html"), "w") as f:
+                f.write(synthetic_match_page(matchdict, match_id))
+        cache = PageCache(os.path.join(root, "cache"))
+        output_dir = os.path.join(root, "data")
+        urls = list(range(1, n_matches + 1))
+
+        runs = {
+            'cold': lambda: scrape_batch(urls, LocalHTMLBackend(html_dir), output_dir, workers, cache),
+            'cached': lambda: scrape_batch(urls, LocalHTMLBackend(html_dir), output_dir, workers, cache),
+            'force': lambda: scrape_batch(urls, LocalHTMLBackend(html_dir), output_dir, workers, cache, force=True),
+            'rebuild': lambda: rebuild_from_cache(cache, output_dir, workers=workers),
+        }
+        summary = {}
+        for name, run in runs.items():
+            results, elapsed = run()
+            summary[name] = (elapsed, sorted(set(results.values())))
+        page_bytes = sum(os.path.getsize(os.path.join(html_dir, name)) for name in os.listdir(html_dir))
+        cache_bytes = sum(os.path.getsize(os.path.join(d, name)) for d, _, names in os.walk(cache.cache_dir) for name in names)
+        print(f"{n_matches} matches, pages {page_bytes / 1e6:.1f} MB, cache {cache_bytes / 1e6:.1f} MB")
+        for name, (elapsed, statuses) in summary.items():
+            print(f"{name:>8} {elapsed:>8.2f} s  {n_matches / elapsed * 60:>8.0f} matches/min  {statuses}")
+
+def bench_match_meta(n_matches=380):
+    """Roster loading from the pretty-printed ``matchdict.json`` vs. the typed metadata tables."""
+    with tempfile.TemporaryDirectory() as root:
+        legacy_dirs, match_dirs = [], []
+        for match_id in range(n_matches):
+            matchdict = synthetic_matchdict(match_id)
+            legacy_dir, match_dir = os.path.join(root, "legacy", str(match_id)), os.path.join(root, "meta", str(match_id))
+            os.makedirs(legacy_dir)
+            os.makedirs(match_dir)
+            with open(os.path.join(legacy_dir, "matchdict.json"), "w") as f:
+                json.dump(matchdict, f, indent=4)
+            write_match_meta(matchdict, match_dir, match_id)
+            legacy_dirs.append(legacy_dir)
+            match_dirs.append(match_dir)
+
+        legacy_bytes = sum(os.path.getsize(os.path.join(d, "matchdict.json")) for d in legacy_dirs)
+        meta_bytes = sum(os.path.getsize(os.path.join(d, name)) for d in match_dirs for name in os.listdir(d))
+        legacy_one = _time(load_match_meta, legacy_dirs[0])
+        meta_one = _time(load_match_meta, match_dirs[0])
+        legacy_season = _time(lambda: [load_match_meta(d) for d in legacy_dirs], repeat=1)
+        meta_season = _time(read_season_rosters, match_dirs, repeat=1)
+        print(f"{n_matches} matches: matchdict.json {legacy_bytes / n_matches / 1e3:.0f} KB/match, metadata tables {meta_bytes / n_matches / 1e3:.1f} KB/match")
+        print(f"{'':>8} {'matchdict.json (s)':>19} {'tables (s)':>11}")
+        print(f"{'match':>8} {legacy_one:>19.4f} {meta_one:>11.4f}")
+        print(f"{'season':>8} {legacy_season:>19.3f} {meta_season:>11.3f}")
+
+@contextlib.contextmanager
+def count_frame_ops(n_rows):
+    """Counts, from project code only, boolean row selections and groupbys over any
+    ``n_rows``-long frame (full-frame scans) and DataFrame copies, split into full-frame
+    and subset copies."""
+    counts = {'scans': 0, 'full_copies': 0, 'subset_copies': 0}
+    getitem, copy, groupby = pd.DataFrame.__getitem__, pd.DataFrame.copy, pd.DataFrame.groupby
+    project_dir = os.path.dirname(os.path.abspath(__file__))
+
+    def from_project():
+        return sys._getframe(2).f_code.co_filename.startswith(project_dir)
+
+    def counted_getitem(self, key):
+        if len(self) == n_rows and isinstance(key, (pd.Series, np.ndarray)) and key.dtype == bool and from_project():
+            counts['scans'] += 1
+        return getitem(self, key)
+
+    def counted_copy(self, *args, **kwargs):
+        if from_project():
+            counts['full_copies' if len(self) == n_rows else 'subset_copies'] += 1
+        return copy(self, *args, **kwargs)
+
+    def counted_groupby(self, *args, **kwargs):
+        if len(self) == n_rows and from_project():
+            counts['scans'] += 1
+        return groupby(self, *args, **kwargs)
+
+    pd.DataFrame.__getitem__, pd.DataFrame.copy, pd.DataFrame.groupby = counted_getitem, counted_copy, counted_groupby
+    try:
+        yield counts
+    finally:
+        pd.DataFrame.__getitem__, pd.DataFrame.copy, pd.DataFrame.groupby = getitem, copy, groupby
+
+def bench_match_context(xT_grid, render=True):
+    """Full-frame scans and copies of one dashboard build (metrics, and panels with ``render``)."""
+    from dashboard import build_dashboard, load_config, load_match
+
+    config = load_config("config.json")
+    with tempfile.TemporaryDirectory() as root:
+        write_synthetic_match(root, xT_grid)
+        write_events(normalize_events(pd.read_csv(os.path.join(root, "df_events.csv"))), os.path.join(root, "df_events.feather"))
+        n_rows = len(load_match(root)[0])
+        for stats_only in (True, False) if render else (True,):
+            start = time.perf_counter()
+            with count_frame_ops(n_rows) as counts:
+                build_dashboard(root, config, os.path.join(root, "dashboard.png"), stats_only=stats_only)
+            elapsed = time.perf_counter() - start
+            print(f"{'metrics' if stats_only else 'dashboard':>10}: {counts['scans']} full-frame scans, "
+                  f"{counts['full_copies']} full-frame copies, {counts['subset_copies']} subset copies, {elapsed:.2f} s")
+
+def bench_panel_artists(n_players=22, n_pairs=120):
+    """Passing-network lines and player markers: per-row pitch.lines/pitch.scatter vs. batched artists."""
+    import matplotlib
+    matplotlib.use('Agg')
+    import matplotlib.pyplot as plt
+    from mplsoccer import Pitch
+    from viz import network_lines, player_markers, BG_COLOR, HOME_COLOR, LINE_COLOR
+
+    rng = np.random.default_rng(0)
+    players = pd.DataFrame({'x_avg': rng.uniform(10, 110, n_players), 'y_avg': rng.uniform(5, 75, n_players),
+                            'action_count': rng.integers(1, 40, n_players), 'is_starter': np.arange(n_players) < 11})
+    pairs = rng.choice(n_players, (n_pairs, 2))
+    combinations = pd.DataFrame({'x_avg': players['x_avg'].values[pairs[:, 0]], 'y_avg': players['y_avg'].values[pairs[:, 0]],
+                                 'x_avg_end': players['x_avg'].values[pairs[:, 1]], 'y_avg_end': players['y_avg'].values[pairs[:, 1]],
+                                 'pass_count': rng.integers(1, 30, n_pairs)})
+    marker_sizes = players['action_count'] / players['action_count'].max() * 2500 + 50
+
+    def render(batched):
+        fig, axs = plt.subplots(1, 2, figsize=(16, 6))
+        pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_color=LINE_COLOR)
+        for ax in axs:
+            pitch.draw(ax=ax)
+        baseline = sum(len(ax.get_children()) for ax in axs)
+        if batched:
+            network_lines(pitch, axs[0], combinations, HOME_COLOR)
+            player_markers(pitch, axs[0], players['x_avg'], players['y_avg'], players['is_starter'],
+                           s=1000, color=LINE_COLOR, edgecolors=HOME_COLOR, linewidth=2.5, zorder=3)
+            player_markers(pitch, axs[1], players['x_avg'], players['y_avg'], players['is_starter'],
+                           s=marker_sizes, color=BG_COLOR, edgecolor=LINE_COLOR, linewidth=1.5, zorder=3)
+        else:
+            max_passes = combinations['pass_count'].max()
+            for _, row in combinations.iterrows():
+                pitch.lines(row['x_avg'], row['y_avg'], row['x_avg_end'], row['y_avg_end'], lw=row['pass_count'] / max_passes * 10,
+                            color=HOME_COLOR, alpha=0.3 + row['pass_count'] / max_passes * 0.6, ax=axs[0], zorder=1)
+            for (_, row), size in zip(players.iterrows(), marker_sizes):
+                marker = 'o' if row['is_starter'] else 's'
+                pitch.scatter(row['x_avg'], row['y_avg'], s=1000, marker=marker, color=LINE_COLOR, edgecolors=HOME_COLOR, linewidth=2.5, ax=axs[0], zorder=3)
+                pitch.scatter(row['x_avg'], row['y_avg'], s=size, marker=marker, color=BG_COLOR, edgecolor=LINE_COLOR, linewidth=1.5, ax=axs[1], zorder=3)
+        artists = sum(len(ax.get_children()) for ax in axs) - baseline
+        start = time.perf_counter()
+        fig.savefig(io.BytesIO(), format='png', dpi=300)
+        elapsed = time.perf_counter() - start
+        plt.close(fig)
+        return artists, elapsed
+
+    print(f"{n_pairs} pass pairs, {n_players} players x 2 panels")
+    print(f"{'':>9} {'artists':>8} {'savefig (s)':>12}")
+    for name, batched in (('per-row', False), ('batched', True)):
+        artists, elapsed = min((render(batched) for _ in range(3)), key=lambda result: result[1])
+        print(f"{name:>9} {artists:>8} {elapsed:>12.3f}")
+
+_RENDER_SCRIPT = """
+import json, os, resource, sys, time
+from dashboard import build_dashboard, load_config
+match_dir, output, profile, fmt, tiles = sys.argv[1:6]
+workers = int(sys.argv[6]) if len(sys.argv) > 6 else 1
+start = time.perf_counter()
+build_dashboard(match_dir, load_config("config.json"), output, profile=profile, fmt=fmt or None, tiles_dir=tiles or None, workers=workers)
+print(time.perf_counter() - start, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, file=sys.stderr)
+"""
+
+def bench_output_profiles(xT_grid, runs=(('print', ''), ('preview', ''), ('preview', 'jpg'), ('web', ''), ('web', 'jpg'), ('vector', ''), ('vector', 'pdf'))):
+    """Wall time, peak RSS and file size of one dashboard render per output profile, each in a fresh process."""
+    with tempfile.TemporaryDirectory() as root:
+        write_synthetic_match(root, xT_grid)
+        write_events(normalize_events(pd.read_csv(os.path.join(root, "df_events.csv"))), os.path.join(root, "df_events.feather"))
+        print(f"{'profile':>16} {'time (s)':>9} {'max RSS (MB)':>13} {'size (KB)':>10}")
+        for profile, fmt in runs + (('preview', 'tiles'),):
+            tiles = os.path.join(root, "tiles") if fmt == 'tiles' else ''
+            output = os.path.join(root, f"dashboard_{profile}_{fmt}")
+            result = subprocess.run([sys.executable, '-c', _RENDER_SCRIPT, root, output, profile, '' if tiles else fmt, tiles],
+                                    check=True, capture_output=True, text=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+            elapsed, rss_mb = map(float, result.stderr.split()[-2:])
+            size = os.path.getsize(output) + (sum(os.path.getsize(os.path.join(tiles, name)) for name in os.listdir(tiles)) if tiles else 0)
+            print(f"{profile + ('+' + fmt if fmt else ''):>16} {elapsed:>9.2f} {rss_mb:>13.0f} {size / 1e3:>10.0f}")
+
+def _synthetic_match_metrics(root, xT_grid, config):
+    from dashboard import MatchContext, compute_match_metrics, load_match
+    write_synthetic_match(root, xT_grid)
+    write_events(normalize_events(pd.read_csv(os.path.join(root, "df_events.csv"))), os.path.join(root, "df_events.feather"))
+    return compute_match_metrics(MatchContext(*load_match(root)), config)
+
+def bench_parallel_render(xT_grid, profile='preview', worker_counts=(1, 2, 4)):
+    """Draw+render time of each panel alone, then serial vs composited dashboard wall time.
+
+    With enough cores the composited render approaches the slowest panel plus the layout
+    handshake and compositing; on fewer cores than workers it is slower than serial.
+    """
+    from dashboard import PANEL_LAYOUT, load_config, new_dashboard_figure, draw_panels, output_settings, render_rgba
+
+    config = load_config("config.json")
+    dpi = output_settings(profile)['dpi']
+    with tempfile.TemporaryDirectory() as root:
+        match_metrics = _synthetic_match_metrics(root, xT_grid, config)
+        render_rgba(new_dashboard_figure(config)[0], dpi)  # font and glyph caches
+        panel_times = {}
+        for name in PANEL_LAYOUT:
+            start = time.perf_counter()
+            fig, panels = new_dashboard_figure(config)
+            draw_panels(panels, match_metrics, config, [name])
+            for other, ax in panels.items():
+                ax.set_visible(other == name)
+            render_rgba(fig, dpi)
+            panel_times[name] = time.perf_counter() - start
+        slowest = max(panel_times, key=panel_times.get)
+        print(f"{len(PANEL_LAYOUT)} panels: {sum(panel_times.values()):.2f} s total, slowest {slowest} {panel_times[slowest]:.2f} s ({os.cpu_count()} CPUs)")
+
+        for workers in worker_counts:
+            output = os.path.join(root, f"dashboard_{workers}.png")
+            result = subprocess.run([sys.executable, '-c', _RENDER_SCRIPT, root, output, profile, '', '', str(workers)],
+                                    check=True, capture_output=True, text=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+            elapsed, rss_mb = map(float, result.stderr.split()[-2:])
+            print(f"{'serial' if workers == 1 else f'{workers} workers':>10}: {elapsed:.2f} s, {rss_mb:.0f} MB max RSS in the main process")
+
+def bench_season_batch(xT_grid, n_matches=12, worker_counts=(1, 4, os.cpu_count()), profile='preview'):
+    """Matches per minute of ``batch.py`` over synthetic matches for several pool sizes,
+    then the same manifest again with every match unchanged."""
+    with tempfile.TemporaryDirectory() as root:
+        data_dir = os.path.join(root, "data")
+        match_ids = write_synthetic_season(data_dir, xT_grid, n_matches)
+        with open("config.json", "r") as f:
+            config = json.load(f)
+        config["MATCH_SETTINGS"]["DATA_DIR"] = data_dir
+        config_path, manifest = os.path.join(root, "config.json"), os.path.join(root, "season.json")
+        with open(config_path, "w") as f:
+            json.dump(config, f)
+        with open(manifest, "w") as f:
+            json.dump({'teams': {'13': {'name': 'Home FC', 'color': '#43A1D5'}, '23': {'name': 'Away FC', 'color': '#FF4C4C'}},
+                       'matches': match_ids}, f)
+
+        def run(workers, *flags):
+            start = time.perf_counter()
+            subprocess.run([sys.executable, 'batch.py', manifest, '--config', config_path, '--profile', profile,
+                            '--output-dir', os.path.join(root, "out"), '--workers', str(workers), '--no-cache', *flags],
+                           check=True, capture_output=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+            return time.perf_counter() - start
+
+        print(f"{n_matches} matches, {profile} profile, {os.cpu_count()} CPUs")
+        for workers in dict.fromkeys(worker_counts):
+            elapsed = run(workers, '--force')
+            print(f"{workers:>3} workers: {elapsed:6.1f} s, {n_matches / elapsed * 60:6.1f} matches/min")
+        print(f"  unchanged: {run(max(worker_counts)):6.1f} s")
+
+def _legacy_draw_pitch(ax, **style):
+    from mplsoccer import Pitch
+    pitch = Pitch(pitch_type='statsbomb', **style)
+    pitch.draw(ax=ax)
+    return pitch
+
+def bench_pitch_templates(xT_grid, profiles=('preview', 'print'), repeat=5):
+    """Draw and render time of every pitch panel on its own axes, building a fresh mplsoccer
+    pitch per panel (legacy) vs drawing it from the per-style template cache."""
+    import viz
+    from matplotlib.figure import Figure
+    from dashboard import PANEL_LAYOUT, load_config, draw_panels, output_settings, render_rgba
+
+    config = load_config("config.json")
+    names = [name for name in PANEL_LAYOUT if name not in ('match_stats', 'xt_momentum')]
+
+    def panel_times(match_metrics, name, dpi):
+        draws, renders = [], []
+        for _ in range(repeat):
+            fig = Figure(figsize=(8, 5))
+            start = time.perf_counter()
+            draw_panels({name: fig.add_subplot()}, match_metrics, config, [name])
+            drawn = time.perf_counter()
+            render_rgba(fig, dpi)
+            draws.append(drawn - start)
+            renders.append(time.perf_counter() - drawn)
+        return min(draws), min(renders)
+
+    with tempfile.TemporaryDirectory() as root:
+        match_metrics = _synthetic_match_metrics(root, xT_grid, config)
+        for profile in profiles:
+            dpi = output_settings(profile)['dpi']
+            totals = {}
+            for label, draw_pitch in (('legacy', _legacy_draw_pitch), ('template', viz.draw_pitch)):
+                original, viz.draw_pitch = viz.draw_pitch, draw_pitch
+                try:
+                    panel_times(match_metrics, names[0], dpi)  # font caches and the first template build
+                    totals[label] = np.sum([panel_times(match_metrics, name, dpi) for name in names], axis=0)
+                finally:
+                    viz.draw_pitch = original
+            print(f"{profile:>8} ({dpi} dpi), {len(names)} pitch panels: "
+                  + ", ".join(f"{label} draw {draw * 1e3:.0f} ms + render {render * 1e3:.0f} ms" for label, (draw, render) in totals.items()))
+
+def bench_tracing(xT_grid, repeat=5, calls=1_000_000):
+    """Cost of the profiling spans: a disabled span and traced call in isolation, and
+    compute_match_metrics plus a preview render with tracing off vs on."""
+    import profiling
+    from dashboard import MatchContext, compute_match_metrics, load_config, load_match, generate_dashboard
+
+    def noop():
+        pass
+    traced_noop = profiling.traced()(noop)
+    start = time.perf_counter()
+    for _ in range(calls):
+        with profiling.span('noop'):
+            pass
+    span_ns = (time.perf_counter() - start) / calls * 1e9
+    plain_ns = _time(lambda: [noop() for _ in range(calls)], repeat=1) / calls * 1e9
+    traced_ns = _time(lambda: [traced_noop() for _ in range(calls)], repeat=1) / calls * 1e9
+    print(f"disabled: span {span_ns:.0f} ns, traced call {traced_ns - plain_ns:.0f} ns over a plain call")
+
+    config = load_config("config.json")
+    with tempfile.TemporaryDirectory() as root:
+        write_synthetic_match(root, xT_grid)
+        inputs = load_match(root)
+        output = os.path.join(root, "dashboard.png")
+
+        def pipeline():
+            with contextlib.redirect_stdout(io.StringIO()):
+                generate_dashboard(compute_match_metrics(MatchContext(*inputs), config), config, output, 'preview')
+
+        for _ in range(2):  # font caches and pitch templates
+            pipeline()
+        off = _time(pipeline, repeat=repeat)
+        tracer = profiling.start()
+        try:
+            on = _time(pipeline, repeat=repeat)
+        finally:
+            profiling.stop()
+    spans = len(tracer.records) // repeat
+    print(f"metrics + preview render: off {off * 1e3:.0f} ms, on {on * 1e3:.0f} ms ({spans} spans per run, "
+          f"{(on - off) / off:+.1%}); disabled spans cost ~{spans * span_ns / 1e6:.3f} ms per run")
+
+def bench_artifact_cache(xT_grid, n_events=(EVENTS_PER_MATCH, 20_000)):
+    """compute_match_metrics without a cache, on a cold artifact cache and on a warm one
+    after a style-only config change, plus a stats-only dashboard run on a warm cache."""
+    from cache import ArtifactCache
+    from dashboard import artifact_data_key, build_dashboard, compute_match_metrics, load_config, open_match
+
+    config = load_config("config.json")
+    restyled = {**config, 'TEAM_COLORS': {**config['TEAM_COLORS'], 'HOME_COLOR': '#000000'}}
+    for n in n_events:
+        with tempfile.TemporaryDirectory() as root:
+            match_dir = os.path.join(root, "match")
+            write_synthetic_match(match_dir, xT_grid, n_events=n)
+            cache = ArtifactCache(os.path.join(root, "cache"))
+
+            def compute(cache, config):
+                return compute_match_metrics(open_match(match_dir), config, cache,
+                                             artifact_data_key(match_dir) if cache is not None else None)
+
+            uncached = _time(compute, None, config)
+            start = time.perf_counter()
+            compute(cache, config)
+            cold = time.perf_counter() - start
+            warm = _time(compute, cache, restyled)
+            with contextlib.redirect_stdout(io.StringIO()):
+                stats_only = _time(lambda: build_dashboard(match_dir, restyled, stats_only=True, cache=cache))
+            print(f"{n:>7,} events: no cache {uncached * 1e3:.0f} ms, cold {cold * 1e3:.0f} ms, warm (restyled) {warm * 1e3:.1f} ms "
+                  f"({uncached / warm:.0f}x), stats-only warm {stats_only * 1e3:.1f} ms; {cache.format_stats()}")
+
+def bench_live_replay(xT_grid, render_updates=60, final_batch=200):
+    """Replays a synthetic match event by event through live.py: per-update latency of the
+    incremental metrics vs recomputing compute_match_metrics over the events so far, and of
+    re-rendering only the changed panels (preview) vs a full render. Checks that the
+    final metrics and image match a full recompute and render."""
+    import matplotlib.image
+    from dashboard import MatchContext, compute_match_metrics, generate_dashboard, load_config, load_match, output_settings
+    from live import LiveDashboard, ReplaySource, latency_summary, run_live
+
+    config = load_config("config.json")
+    with tempfile.TemporaryDirectory() as root:
+        write_synthetic_match(root, xT_grid)
+        df_events, matchdict, _ = load_match(root)
+        live, updates = run_live(ReplaySource(root), xT_grid, config, interval=0)
+        final = compute_match_metrics(MatchContext(df_events, matchdict, xT_grid), config)
+        for name, value in final.items():
+            if isinstance(value, pd.DataFrame):
+                pd.testing.assert_frame_equal(live.metrics[name], value, check_dtype=False, check_categorical=False, check_index_type=False)
+            elif isinstance(value, dict):
+                assert all(live.metrics[name][key] == value[key] or pd.isna(value[key]) for key in value), name
+            else:
+                assert live.metrics[name] == value, name
+        summary = latency_summary(updates)
+        recompute = [_time(lambda n=n: compute_match_metrics(MatchContext(df_events.iloc[:n], matchdict, xT_grid), config), repeat=1) * 1000
+                     for n in (len(df_events) // 4, len(df_events) // 2, len(df_events))]
+        print(f"{live.n_events} events, one per update: incremental p50 {summary['update_ms']['p50']:.1f} ms, "
+              f"p95 {summary['update_ms']['p95']:.1f} ms, max {summary['update_ms']['max']:.0f} ms; "
+              f"full recompute at 25/50/100% {' / '.join(f'{ms:.0f}' for ms in recompute)} ms")
+
+        output = os.path.join(root, "live.png")
+        with contextlib.redirect_stdout(io.StringIO()):
+            full = _time(lambda: generate_dashboard(final, config, output, 'preview'), repeat=2) * 1000
+        _, updates = run_live(ReplaySource(root), xT_grid, config, LiveDashboard(config, output, output_settings('preview')),
+                              interval=0, max_updates=render_updates + 1)
+        summary = latency_summary(updates[1:])
+        print(f"preview render over {render_updates} updates: p50 {summary['render_ms']['p50']:.0f} ms, "
+              f"p95 {summary['render_ms']['p95']:.0f} ms, {summary['panels_per_render']:.1f} of 12 panels redrawn; "
+              f"full render {full:.0f} ms")
+
+        # Replayed to the end in larger batches, the kept image must match a fresh render.
+        replayed, rendered = os.path.join(root, "replayed.png"), os.path.join(root, "full.png")
+        with contextlib.redirect_stdout(io.StringIO()):
+            generate_dashboard(final, config, rendered, 'preview')
+        run_live(ReplaySource(root, batch_size=final_batch), xT_grid, config, LiveDashboard(config, replayed, output_settings('preview')), interval=0)
+        differing = int((matplotlib.image.imread(replayed) != matplotlib.image.imread(rendered)).any(axis=-1).sum())
+        assert differing == 0, f"final live image differs from a full render in {differing} pixels"
+
+def bench_xt_model(match_counts=(38, 380), shapes=((12, 16), (80, 120)), repeat=3):
+    """Training the xT grid by value iteration on synthetic seasons, and loading the
+    80 x 120 grid as a memory-mapped .npy vs parsing the CSV export."""
+    for n_matches in match_counts:
+        df_events = synthetic_events(n_matches * EVENTS_PER_MATCH, fixtures=season_fixtures(n_matches))
+        for n_rows, n_cols in shapes:
+            trained = _time(fit_xt_grid, df_events, n_rows, n_cols, repeat=repeat)
+            grid, iterations = fit_xt_grid(df_events, n_rows, n_cols)
+            assert np.array_equal(grid, fit_xt_grid(df_events, n_rows, n_cols)[0])
+            print(f"{n_matches:>4} matches, {n_rows:>2}x{n_cols:<3} zones: trained in {trained * 1e3:.0f} ms "
+                  f"({iterations} iterations), max xT {grid.max():.3f}")
+
+    with tempfile.TemporaryDirectory() as root:
+        grid = fit_xt_grid(synthetic_events(38 * EVENTS_PER_MATCH, fixtures=season_fixtures(38)), 80, 120)[0]
+        npy, csv = os.path.join(root, "xT_grid.npy"), os.path.join(root, "xT_grid.csv")
+        write_xt_grid(grid, npy)
+        write_xt_grid(grid, csv)
+        assert np.allclose(load_xt_grid(npy), load_xt_grid(csv))
+        mapped = _time(load_xt_grid, npy, repeat=20)
+        parsed = _time(load_xt_grid, csv, repeat=20)
+        print(f"80x120 grid load: .npy mmap {mapped * 1e3:.2f} ms ({os.path.getsize(npy) / 1024:.0f} KB), "
+              f"CSV {parsed * 1e3:.1f} ms ({os.path.getsize(csv) / 1024:.0f} KB), {parsed / mapped:.0f}x")
+
+def bench_warehouse(n_matches=38, repeat=20):
+    """Ingesting a synthetic season into the SQLite warehouse, then a PPDA trend over a
+    team's last 10 matches, a league table and a player leaderboard from it, vs recomputing
+    the trend from the stored matches."""
+    from dashboard import compute_match_metrics, load_config, open_match
+    from warehouse import Warehouse
+
+    config = load_config("config.json")
+    with tempfile.TemporaryDirectory() as root:
+        match_ids = write_synthetic_season(root, np.zeros((12, 16)), n_matches)
+        warehouse = Warehouse(os.path.join(root, "warehouse.sqlite"))
+        start = time.perf_counter()
+        for match_id in match_ids:
+            warehouse.ingest(os.path.join(root, str(match_id)), config)
+        ingest = time.perf_counter() - start
+        team_id = season_fixtures(1)[0][0]
+        trend = warehouse.team_trend(team_id, 'ppda')
+
+        def recompute():
+            return [compute_match_metrics(open_match(os.path.join(root, str(m))), config)['stats']['PPDA']
+                    for m in trend['match_id']]
+        recomputed = _time(recompute, repeat=1)
+        queries = {
+            'trend': lambda: warehouse.team_trend(team_id, 'ppda'),
+            'league': lambda: warehouse.league_table(last=10),
+            'players': lambda: warehouse.player_leaders('xt_clipped'),
+        }
+        timings = ', '.join(f"{name} {_time(query, repeat=repeat) * 1e3:.2f} ms" for name, query in queries.items())
+        warehouse.close()
+        size = os.path.getsize(warehouse.path) / 1024
+    print(f"{n_matches} matches ingested in {ingest:.1f}s ({ingest / n_matches * 1e3:.0f} ms/match, {size:.0f} KB); "
+          f"queries: {timings}; PPDA trend over {len(trend)} matches recomputed from events {recomputed * 1e3:.0f} ms")
+
+def bench_render_service(n_matches=4, n_requests=40, concurrency=4):
+    """The render service under loadtest.py on synthetic matches (cold, warm, concurrent
+    and a coalesced burst), against running dashboard.py cold for one preview panel set."""
+    from dashboard import load_config
+    from loadtest import run_load, start_service
+
+    config = load_config("config.json")
+    with tempfile.TemporaryDirectory() as root:
+        match_ids = write_synthetic_season(root, np.zeros((12, 16)), n_matches)
+        config_path = os.path.join(root, "config.json")
+        with open(config_path, "w") as f:
+            json.dump({**config, 'MATCH_SETTINGS': {**config['MATCH_SETTINGS'], 'DATA_DIR': root}}, f)
+        cli = _time(lambda: subprocess.run([sys.executable, 'dashboard.py', '--config', config_path, '--match-dir', os.path.join(root, "1"),
+                                            '--profile', 'preview', '--no-cache', '--output', os.path.join(root, "cli.png")],
+                                           check=True, capture_output=True, env={**os.environ, 'MPLBACKEND': 'Agg'}), repeat=2)
+        process, base_url = start_service(config_path, root, os.cpu_count(), ['--no-cache'])
+        try:
+            results = run_load(base_url, [str(m) for m in match_ids], n_requests, concurrency)
+        finally:
+            process.terminate()
+            process.wait()
+    print(f"dashboard.py cold (preview, full): {cli * 1e3:.0f} ms")
+    for name, stats in results['phases'].items():
+        print(f"service {name:>10}: p50 {stats['p50']:>5.0f} ms, p99 {stats['p99']:>5.0f} ms, {stats['throughput_rps']:.1f} req/s, "
+              f"{stats['coalesced']} coalesced")
+
+def bench_compact_events(n_matches=380, csv_matches=38):
+    """Bytes per event of the events as read from the CSV export (first ``csv_matches``),
+    normalized, and compact, and a season of ``n_matches`` read back from the store in
+    full vs compact."""
+    footprint = {'csv': [0, 0], 'normalized': [0, 0], 'compact': [0, 0]}
+    with tempfile.TemporaryDirectory() as root:
+        paths = []
+        for match_id in range(n_matches):
+            df_events = synthetic_events(EVENTS_PER_MATCH, seed=match_id, qualifier_rates=QUALIFIER_RATES).drop(columns=['match_id'])
+            df_events['qualifiers'] = df_events['qualifiers'].map(json.dumps)
+            if match_id < csv_matches:
+                df_events = pd.read_csv(io.StringIO(df_events.to_csv(index=False)))
+                footprint['csv'][0] += df_events.memory_usage(deep=True).sum()
+                footprint['csv'][1] += len(df_events)
+            normalized = normalize_events(df_events, match_id=match_id)
+            for name, frame in (('normalized', normalized), ('compact', compact_events(normalized))):
+                footprint[name][0] += frame.memory_usage(deep=True).sum()
+                footprint[name][1] += len(frame)
+            paths.append(os.path.join(root, f"{match_id}.feather"))
+            write_events(normalized, paths[-1])
+
+        season_events = n_matches * EVENTS_PER_MATCH
+        for name, (nbytes, n_events) in footprint.items():
+            print(f"{name:>10}: {nbytes / n_events:6.1f} bytes/event, {nbytes / n_events * season_events / 2**20:6.1f} MB "
+                  f"for {n_matches} matches")
+        for compact in (False, True):
+            start = time.perf_counter()
+            season = read_season_events(paths, compact=compact)
+            elapsed = time.perf_counter() - start
+            print(f"read_season_events(compact={compact}): {elapsed:.2f}s, {len(season.columns)} columns, "
+                  f"{season.memory_usage(deep=True).sum() / 2**20:.1f} MB")
+            del season
+
+def bench_zone_index(n_matches=380, xt_shape=(12, 16), repeat=3):
+    """Builds the spatial index of a season, then counts events per team and 18-zone grid
+    cell with ``np.bincount`` on it vs a pandas groupby."""
+    season = synthetic_events(n_matches * EVENTS_PER_MATCH, fixtures=season_fixtures(n_matches))
+    built = _time(spatial_index, season, xt_shape, repeat=repeat)
+    index = spatial_index(season, xt_shape)
+    team_codes, teams = pd.factorize(season['team_id'])
+    zone = index['zone'].to_numpy()
+
+    def by_bincount():
+        cells = zone_counts(team_codes * (N_ZONES + 1) + zone, len(teams) * (N_ZONES + 1))
+        return cells.reshape(len(teams), N_ZONES + 1)[:, 1:]
+
+    def by_groupby():
+        return season.groupby([season['team_id'], index['zone']], observed=True).size().unstack(fill_value=0)
+
+    assert np.array_equal(by_bincount(), by_groupby().reindex(index=teams, columns=range(1, N_ZONES + 1), fill_value=0).to_numpy())
+    bincount, groupby = _time(by_bincount, repeat=repeat), _time(by_groupby, repeat=repeat)
+    print(f"{len(season):,} events: spatial index in {built * 1e3:.0f} ms; team x zone counts "
+          f"{bincount * 1e3:.1f} ms with bincount vs {groupby * 1e3:.1f} ms with groupby ({groupby / bincount:.0f}x)")
+
+def _warm_context(df_events, matchdict, xT_grid):
+    """A ``MatchContext`` with every shared frame and per-team view already built, so a
+    metric timed on it measures only its own work."""
+    from context import MatchContext
+    ctx = MatchContext(df_events, matchdict, xT_grid)
+    for name in ('events', 'passes', 'defensive_actions', 'roster', 'pass_locations', 'xt'):
+        getattr(ctx, name)
+    for team_id in ctx.team_ids:
+        for view in (ctx.team_events, ctx.team_passes, ctx.team_defensive_actions):
+            view(team_id)
+    return ctx
+
+def suite_cases(root, xT_grid, config, n_events=EVENTS_PER_MATCH, n_matches=10, n_players=PLAYERS_PER_TEAM,
+                qualifier_rates=QUALIFIER_RATES, profile='preview'):
+    """``{name: (setup, run, repeat)}`` for every metric function, every panel, the full
+    dashboard and a season batch on synthetic matches written under ``root``. ``run(*setup())``
+    is the timed part; ``repeat`` overrides the suite's repeat count when not None."""
+    import metrics
+    from matplotlib.figure import Figure
+    from context import MatchContext
+    from dashboard import (PANEL_LAYOUT, build_dashboard, compute_match_metrics, draw_panels, generate_dashboard,
+                           load_match, output_settings, render_rgba)
+
+    match_dir = os.path.join(root, "match")
+    write_synthetic_match(match_dir, xT_grid, n_events=n_events, n_players=n_players, qualifier_rates=qualifier_rates)
+    write_events(normalize_events(pd.read_csv(os.path.join(match_dir, "df_events.csv"))), os.path.join(match_dir, "df_events.feather"))
+    df_events, matchdict, _ = load_match(match_dir)
+    team_id = matchdict['home']['teamId']
+    match_metrics = compute_match_metrics(_warm_context(df_events, matchdict, xT_grid), config)
+    dpi = output_settings(profile)['dpi']
+
+    def context():
+        return (_warm_context(df_events, matchdict, xT_grid),)
+
+    def with_positions(positions):
+        def setup():
+            ctx = _warm_context(df_events, matchdict, xT_grid)
+            return ctx, positions(ctx, team_id)
+        return setup
+
+    def panel_axes():
+        fig = Figure(figsize=(8, 5))
+        return fig, fig.add_subplot()
+
+    def render_panel(name):
+        def run(fig, ax):
+            draw_panels({name: ax}, match_metrics, config, [name])
+            render_rgba(fig, dpi)
+        return run
+
+    fixtures = season_fixtures(n_matches)
+    season = synthetic_events(n_matches * n_events, fixtures=fixtures, events_per_match=n_events, n_players=n_players)
+    season_teams = dict(enumerate(fixtures))
+    season_xt = calculate_xt(season, xT_grid)
+    data_dir = os.path.join(root, "season")
+    batch_config, manifest = os.path.join(root, "config.json"), os.path.join(root, "season.json")
+    with open(batch_config, "w") as f:
+        json.dump({**config, 'MATCH_SETTINGS': {**config['MATCH_SETTINGS'], 'DATA_DIR': data_dir}}, f)
+    with open(manifest, "w") as f:
+        json.dump(write_synthetic_season(data_dir, xT_grid, n_matches, n_events=n_events, n_players=n_players,
+                                         qualifier_rates=qualifier_rates), f)
+
+    def run_batch():
+        subprocess.run([sys.executable, 'batch.py', manifest, '--config', batch_config, '--profile', profile, '--workers', '1',
+                        '--output-dir', os.path.join(root, "batch"), '--force', '--no-cache'],
+                       check=True, capture_output=True, env={**os.environ, 'MPLBACKEND': 'Agg'})
+
+    cases = {
+        'context.frames': (lambda: (), lambda: _warm_context(df_events, matchdict, xT_grid), None),
+        'metrics.get_pass_combinations': (context, lambda ctx: metrics.get_pass_combinations(ctx, team_id), None),
+        'metrics.get_enhanced_positions': (context, lambda ctx: metrics.get_enhanced_positions(ctx, team_id), None),
+        'metrics.get_enhanced_positions_all': (context, lambda ctx: metrics.get_enhanced_positions_all(ctx, team_id), None),
+        'metrics.calculate_team_metrics': (with_positions(metrics.get_enhanced_positions),
+                                           lambda ctx, avg_locs: metrics.calculate_team_metrics(ctx, avg_locs, team_id), None),
+        'metrics.calculate_team_metrics_all': (with_positions(metrics.get_enhanced_positions_all),
+                                               lambda ctx, avg_locs: metrics.calculate_team_metrics_all(ctx, avg_locs, team_id), None),
+        'metrics.calculate_player_defensive_positions': (context, lambda ctx: metrics.calculate_player_defensive_positions(ctx, team_id), None),
+        'metrics.calculate_match_stats': (context, metrics.calculate_match_stats, None),
+        'metrics.get_half_pass_map': (context, lambda ctx: metrics.get_half_pass_map(ctx, team_id), None),
+        'metrics.get_ball_recovery_turnover': (context, lambda ctx: metrics.get_ball_recovery_turnover(ctx, team_id), None),
+        'metrics.get_progressive_passes': (context, lambda ctx: metrics.get_progressive_passes(ctx, team_id), None),
+        'metrics.get_zone_entries': (context, lambda ctx: metrics.get_zone_entries(ctx, team_id), None),
+        'metrics.calculate_xt': (context, lambda ctx: metrics.calculate_xt(ctx.events, xT_grid), None),
+        'metrics.compute_xt_momentum': (context, lambda ctx: metrics.compute_xt_momentum(ctx.xt, ctx.team_ids), None),
+        'metrics.compute_match_metrics': (lambda: (MatchContext(df_events, matchdict, xT_grid),), lambda ctx: compute_match_metrics(ctx, config), None),
+        'season.calculate_xt': (lambda: (), lambda: metrics.calculate_xt(season, xT_grid), None),
+        'season.compute_xt_momentum': (lambda: (), lambda: metrics.compute_xt_momentum(season_xt, season_teams), None),
+        'season.calculate_match_stats_by_match': (lambda: (), lambda: metrics.calculate_match_stats_by_match(season, season_teams), None),
+        'season.fit_xt_grid': (lambda: (), lambda: metrics.fit_xt_grid(season), None),
+        'season.spatial_index': (lambda: (), lambda: spatial_index(season, xT_grid.shape), None),
+    }
+    for name in PANEL_LAYOUT:
+        cases[f'panel.{name}'] = (panel_axes, render_panel(name), None)
+    cases.update({
+        f'dashboard.render.{profile}': (lambda: (), lambda: generate_dashboard(match_metrics, config, os.path.join(root, "dashboard.png"), profile), None),
+        f'dashboard.build.{profile}': (lambda: (), lambda: build_dashboard(match_dir, config, os.path.join(root, "dashboard.png"), profile=profile), None),
+        'dashboard.render.print': (lambda: (), lambda: generate_dashboard(match_metrics, config, os.path.join(root, "dashboard.png"), 'print'), 1),
+        f'batch.{n_matches}_matches': (lambda: (), run_batch, 1),
+    })
+    return cases
+
+def run_suite(xT_grid, repeat=5, only=None, **options):
+    """Runs the suite cases whose name contains any of ``only`` and returns the results
+    document: environment metadata plus per-case run times (seconds), median and min."""
+    import platform
+    import matplotlib
+    from dashboard import load_config
+
+    config = load_config("config.json")
+    results = {}
+    with tempfile.TemporaryDirectory() as root, contextlib.redirect_stdout(io.StringIO()):
+        cases = suite_cases(root, xT_grid, config, **options)
+        for name, (setup, run, case_repeat) in cases.items():
+            if only and not any(pattern in name for pattern in only):
+                continue
+            if case_repeat is None:
+                run(*setup())  # warm-up: imports, font caches, pitch templates
+            times = []
+            for _ in range(case_repeat or repeat):
+                args = setup()
+                start = time.perf_counter()
+                run(*args)
+                times.append(time.perf_counter() - start)
+            results[name] = {'median': float(np.median(times)), 'min': min(times), 'runs': times}
+            print(f"{name:<48} {results[name]['median'] * 1e3:>10.1f} ms", file=sys.stderr)
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'), 'commit': commit, 'python': platform.python_version(),
+            'platform': platform.platform(), 'cpus': os.cpu_count(), 'numpy': np.__version__, 'pandas': pd.__version__,
+            'matplotlib': matplotlib.__version__, 'repeat': repeat, **options,
+        },
+        'results': results,
+    }
+
+def compare_results(current, baseline, threshold=SUITE_THRESHOLD):
+    """Prints each case's median against ``baseline`` and returns the names of cases more
+    than ``threshold`` slower."""
+    slower = []
+    print(f"{'case':<48} {'baseline (ms)':>14} {'current (ms)':>13} {'ratio':>7}")
+    for name, result in current['results'].items():
+        base = baseline['results'].get(name)
+        if base is None:
+            print(f"{name:<48} {'-':>14} {result['median'] * 1e3:>13.1f} {'new':>7}")
+            continue
+        ratio = result['median'] / base['median']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  SLOWER'
+            slower.append(name)
+        elif ratio < 1 / (1 + threshold):
+            flag = '  faster'
+        print(f"{name:<48} {base['median'] * 1e3:>14.1f} {result['median'] * 1e3:>13.1f} {ratio:>6.2f}x{flag}")
+    return slower
+
+def main(argv=None):
+    import argparse
+    benches = {name: func for name, func in globals().items() if name.startswith('bench_')}
+    parser = argparse.ArgumentParser(description="Offline benchmarks on synthetic WhoScored data.")
+    parser.add_argument("benches", nargs="*", metavar="bench",
+                        help="bench_* comparisons to run (default: all of them unless --suite is given)")
+    parser.add_argument("--suite", action="store_true", help="run the regression suite over every metric, panel, dashboard and batch")
+    parser.add_argument("--only", nargs="+", help="suite cases whose name contains any of these strings")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--events", type=int, default=EVENTS_PER_MATCH, help="events per synthetic match")
+    parser.add_argument("--matches", type=int, default=10, help="matches in the season and batch cases")
+    parser.add_argument("--players", type=int, default=PLAYERS_PER_TEAM, help="players per team")
+    parser.add_argument("--json", help="write the suite results to this file")
+    parser.add_argument("--baseline", help="suite results JSON to compare against; exits 1 on a regression")
+    parser.add_argument("--threshold", type=float, default=SUITE_THRESHOLD, help="relative slowdown flagged as a regression")
+    parser.add_argument("--xt-grid", default="./data/xT_grid.csv", help="xT grid, .npy or .csv")
+    args = parser.parse_args(argv)
+
+    unknown = [name for name in args.benches if name not in benches]
+    if unknown:
+        parser.error(f"unknown bench(es) {', '.join(unknown)}; choose from {', '.join(benches)}")
+
+    xT_grid = load_xt_grid(args.xt_grid)
+    if not args.suite:
+        for name in args.benches or benches:
+            print(f"== {name}")
+            if 'xT_grid' in inspect.signature(benches[name]).parameters:
+                benches[name](xT_grid)
+            else:
+                benches[name]()
+        return 0
+
+    results = run_suite(xT_grid, args.repeat, args.only, n_events=args.events, n_matches=args.matches, n_players=args.players)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            slower = compare_results(results, json.load(f), args.threshold)
+        if slower:
+            print(f"{len(slower)} case(s) more than {args.threshold:.0%} slower than {args.baseline}: {', '.join(slower)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
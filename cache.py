@@ -0,0 +1,183 @@
+import gzip
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import time
+
+FINISHED_STATES = ('FT', 'AET', 'PEN')
+DEFAULT_LIVE_TTL = 300
+DEFAULT_ARTIFACT_CACHE_MB = 512
+_MISSING = object()
+
+def content_hash(data: bytes) -> str:
+    return hashlib.sha256(data).hexdigest()
+
+def is_match_finished(matchdict) -> bool:
+    return bool(matchdict.get('ftScore')) or str(matchdict.get('elapsed', '')).strip().upper() in FINISHED_STATES
+
+def _write_atomic(path, data: bytes):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path))
+    with os.fdopen(fd, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+class PageCache:
+    """Content-addressed cache of raw match pages and their extracted ``matchCentreData``.
+
+    Payloads are gzip-compressed under ``objects/`` and named by the SHA-256 of their
+    uncompressed bytes; ``matches/<match_id>.json`` points at the latest page and data
+    objects for a match. Finished matches are never refetched; in-progress ones are
+    refetched once their entry is older than ``ttl`` seconds.
+    """
+
+    def __init__(self, cache_dir, ttl=DEFAULT_LIVE_TTL):
+        self.cache_dir = cache_dir
+        self.ttl = ttl
+
+    def _object_path(self, sha):
+        return os.path.join(self.cache_dir, "objects", sha[:2], f"{sha}.gz")
+
+    def _entry_path(self, match_id):
+        return os.path.join(self.cache_dir, "matches", f"{match_id}.json")
+
+    def put_object(self, data: bytes) -> str:
+        sha = content_hash(data)
+        path = self._object_path(sha)
+        if not os.path.exists(path):
+            _write_atomic(path, gzip.compress(data, compresslevel=6))
+        return sha
+
+    def get_object(self, sha) -> bytes:
+        with open(self._object_path(sha), "rb") as f:
+            return gzip.decompress(f.read())
+
+    def entry(self, match_id):
+        try:
+            with open(self._entry_path(match_id), "r") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+
+    def match_ids(self):
+        matches_dir = os.path.join(self.cache_dir, "matches")
+        if not os.path.isdir(matches_dir):
+            return []
+        return sorted(int(name[:-5]) for name in os.listdir(matches_dir) if name.endswith(".json"))
+
+    def is_fresh(self, match_id, now=None):
+        entry = self.entry(match_id)
+        if entry is None:
+            return False
+        return entry['finished'] or (now or time.time()) - entry['fetched_at'] < self.ttl
+
+    def put(self, match_id, matchdict, page=None):
+        """Stores a fetch and returns ``(entry, changed)``, where ``changed`` is False when
+        the match data is byte-identical to the previously cached version."""
+        previous = self.entry(match_id)
+        data_hash = self.put_object(json.dumps(matchdict, separators=(',', ':'), sort_keys=True).encode())
+        entry = {
+            'match_id': match_id,
+            'data_hash': data_hash,
+            'page_hash': self.put_object(page.encode()) if page is not None else None,
+            'fetched_at': time.time(),
+            'finished': is_match_finished(matchdict),
+        }
+        _write_atomic(self._entry_path(match_id), json.dumps(entry).encode())
+        return entry, previous is None or previous['data_hash'] != data_hash
+
+    def load_matchdict(self, match_id):
+        return json.loads(self.get_object(self.entry(match_id)['data_hash']))
+
+    def load_page(self, match_id):
+        page_hash = self.entry(match_id)['page_hash']
+        return self.get_object(page_hash).decode() if page_hash else None
+
+
+class ArtifactCache:
+    """Size-bounded on-disk cache of pickled analysis results.
+
+    Callers build the key from everything the result depends on (see ``key``); entries
+    are stored as ``<key[:2]>/<key>.pkl``. A hit refreshes the entry's mtime, and once
+    the cache grows past ``max_bytes`` the least recently used entries are deleted.
+    ``stats`` counts hits, misses, writes and evictions for this instance.
+    """
+
+    def __init__(self, cache_dir, max_bytes=DEFAULT_ARTIFACT_CACHE_MB * 2**20):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self.stats = {'hits': 0, 'misses': 0, 'writes': 0, 'evictions': 0}
+        self._size = None
+
+    @staticmethod
+    def key(*parts) -> str:
+        return content_hash(json.dumps(parts, sort_keys=True, default=str).encode())
+
+    def _path(self, key):
+        return os.path.join(self.cache_dir, key[:2], f"{key}.pkl")
+
+    def _entries(self):
+        if not os.path.isdir(self.cache_dir):
+            return []
+        entries = []
+        for entry in os.scandir(self.cache_dir):
+            if entry.is_dir():
+                for item in os.scandir(entry.path):
+                    if item.name.endswith(".pkl"):
+                        stat = item.stat()
+                        entries.append((stat.st_mtime, stat.st_size, item.path))
+        return entries
+
+    def size(self):
+        """Bytes on disk, scanned once and then tracked across writes and evictions."""
+        if self._size is None:
+            self._size = sum(size for _, size, _ in self._entries())
+        return self._size
+
+    def get(self, key, default=None):
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                value = pickle.load(f)
+            os.utime(path)
+        except (OSError, pickle.UnpicklingError, EOFError):
+            self.stats['misses'] += 1
+            return default
+        self.stats['hits'] += 1
+        return value
+
+    def put(self, key, value):
+        data = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        _write_atomic(self._path(key), data)
+        self.stats['writes'] += 1
+        self._size = self.size() + len(data)
+        if self._size > self.max_bytes:
+            self.evict()
+
+    def memoize(self, key, compute):
+        """The cached value for ``key``, or ``compute()`` stored under it."""
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def evict(self):
+        """Deletes least recently used entries until the cache is within ``max_bytes``."""
+        entries = sorted(self._entries())
+        self._size = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if self._size <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            self._size -= size
+            self.stats['evictions'] += 1
+
+    def format_stats(self):
+        return (f"{self.stats['hits']} hits, {self.stats['misses']} misses, {self.stats['writes']} writes, "
+                f"{self.stats['evictions']} evictions ({self.size() / 2**20:.1f} MB)")
@@ -0,0 +1,143 @@
+import multiprocessing
+import traceback
+import matplotlib
+import matplotlib.image
+from matplotlib.transforms import Bbox
+
+from dashboard import (
+    PANEL_LAYOUT, new_dashboard_figure, apply_dashboard_layout, draw_panels,
+    render_rgba, pixel_region, save_raster_tiles
+)
+
+# Extra pixels copied around each panel's tight bbox to keep antialiased edges.
+REGION_PAD = 2
+SUBPLOT_PARAMS = ('left', 'bottom', 'right', 'top', 'wspace', 'hspace')
+
+class PanelWorkerError(RuntimeError):
+    """A panel worker failed; the message holds its traceback."""
+
+def _recv(conn):
+    try:
+        message = conn.recv()
+    except EOFError:
+        raise PanelWorkerError("A panel worker exited without sending its result.") from None
+    if isinstance(message, PanelWorkerError):
+        raise message
+    return message
+
+def _send(conn, message):
+    try:
+        conn.send(message)
+    except (BrokenPipeError, ConnectionResetError):
+        raise PanelWorkerError("A panel worker exited before the layout was sent.") from None
+
+def _tightbboxes(fig, panels, names, dpi=None, **kwargs):
+    original_dpi = fig.dpi
+    if dpi is not None:
+        fig.dpi = dpi
+        fig.draw_without_rendering()
+    boxes = {name: panels[name].get_tightbbox(**kwargs) for name in names}
+    fig.dpi = original_dpi
+    return boxes
+
+def _panel_worker(conn, match_metrics, config, names, dpi):
+    """Draws ``names`` on a full-size dashboard figure and answers the compositor's three
+    requests: layout bboxes, bboxes at the final layout, and the rendered panel regions.
+    Any exception is sent back as a ``PanelWorkerError``."""
+    try:
+        fig, panels = new_dashboard_figure(config)
+        draw_panels(panels, match_metrics, config, names)
+        for name, ax in panels.items():
+            ax.set_visible(name in names)
+
+        conn.send(_tightbboxes(fig, panels, names, for_layout_only=True))
+        fig.subplots_adjust(**conn.recv())
+        conn.send(_tightbboxes(fig, panels, names, dpi=dpi))
+        bbox_inches, regions = conn.recv()
+        # Rendering the full canvas keeps every panel pixel-identical to the serial render;
+        # a sub-bbox render shifts the transform by a float offset and moves some
+        # antialiased pixels by one level.
+        image = render_rgba(fig, dpi, bbox_inches)
+        conn.send({name: image[top:bottom, left:right].copy() for name, (top, bottom, left, right) in regions.items()})
+    except Exception:
+        try:
+            conn.send(PanelWorkerError(f"Panel worker for {', '.join(names)} failed:\n{traceback.format_exc()}"))
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+    finally:
+        conn.close()
+
+def _stub_tightbboxes(panels, boxes):
+    for name, ax in panels.items():
+        ax.get_tightbbox = lambda *args, bbox=boxes[name], **kwargs: bbox
+
+def render_composited(match_metrics, config, output_path, settings, workers, tiles_dir=None):
+    """Renders the dashboard with its panels split over ``workers`` processes and
+    composites them into the same image the serial path produces.
+
+    The layout still comes from ``tight_layout`` and ``bbox_inches='tight'``: workers
+    report their panels' tight bboxes, the compositor runs both computations on an
+    empty figure whose axes return those bboxes, and workers then render at exactly
+    that layout. Each panel's region is copied onto a render of the background and title.
+    """
+    context = multiprocessing.get_context()
+    groups = [PANEL_LAYOUT[i::workers] for i in range(min(workers, len(PANEL_LAYOUT)))]
+    dpi = settings.get('dpi', matplotlib.rcParams['figure.dpi'])
+    connections, processes = [], []
+    for names in groups:
+        parent, child = context.Pipe()
+        process = context.Process(target=_panel_worker, args=(child, match_metrics, config, names, dpi), daemon=True)
+        process.start()
+        # Without the parent's copy of the child end, a dead worker shows up as EOFError.
+        child.close()
+        connections.append(parent)
+        processes.append(process)
+
+    try:
+        def gather():
+            return {name: value for conn in connections for name, value in _recv(conn).items()}
+
+        layout, panels = new_dashboard_figure(config)
+        _stub_tightbboxes(panels, gather())
+        apply_dashboard_layout(layout)
+        params = {name: getattr(layout.subplotpars, name) for name in SUBPLOT_PARAMS}
+        for conn in connections:
+            _send(conn, params)
+
+        pixel_boxes = gather()
+        _stub_tightbboxes(panels, pixel_boxes)
+        layout.dpi = dpi
+        bbox_inches = None
+        if settings.get('bbox_inches') == 'tight':
+            pad = settings.get('pad_inches', matplotlib.rcParams['savefig.pad_inches'])
+            bbox_inches = layout.get_tightbbox().padded(pad)
+        boxes = {name: Bbox(box.get_points() / dpi) for name, box in pixel_boxes.items()}
+        origin = (bbox_inches.x0, bbox_inches.y1) if bbox_inches is not None else (0, layout.get_figheight())
+
+        background, background_panels = new_dashboard_figure(config)
+        for ax in background_panels.values():
+            ax.remove()
+        image = render_rgba(background, dpi, bbox_inches).copy()
+        regions = {name: pixel_region(box, origin, dpi, image.shape, REGION_PAD) for name, box in boxes.items()}
+        for conn, names in zip(connections, groups):
+            _send(conn, (bbox_inches, {name: regions[name] for name in names}))
+        for name, crop in gather().items():
+            top, bottom, left, right = regions[name]
+            image[top:bottom, left:right] = crop
+    except BaseException:
+        # Forked workers hold their own copy of our pipe ends, so the ones still waiting
+        # for the layout would never see EOF.
+        for process in processes:
+            process.terminate()
+        raise
+    finally:
+        for conn in connections:
+            conn.close()
+        for process in processes:
+            process.join()
+
+    matplotlib.image.imsave(output_path, image, format=settings['format'], dpi=dpi, pil_kwargs=settings.get('pil_kwargs'))
+    if tiles_dir:
+        tile_boxes = {name: box.padded(0.1) for name, box in boxes.items()}
+        save_raster_tiles(image, tile_boxes, origin, dpi, tiles_dir, settings)
+    return image
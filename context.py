@@ -0,0 +1,128 @@
+from functools import cached_property
+
+import numpy as np
+import pandas as pd
+
+from metrics import calculate_xt
+from profiling import traced
+from zones import spatial_index
+
+DEFENSIVE_TYPES = ['Tackle', 'Interception', 'BallRecovery', 'BlockedPass', 'Challenge', 'Clearance', 'Foul', 'Aerial']
+
+class MatchContext:
+    """One match's events and rosters plus every derived frame the metrics and panels share.
+
+    Each frame is built on first use and memoized: the event table with its spatial index, the
+    successful-pass subset, the defensive-action subset, the roster table, per-player
+    pass locations, xT values and per-team views of each of them. Treat the frames as
+    read-only; copy before modifying.
+
+    ``df_events`` may also be a callable returning the events, which is then only called
+    when a frame first needs them.
+    """
+
+    def __init__(self, df_events, matchdict, xT_grid=None):
+        if callable(df_events):
+            self._load_events = df_events
+        else:
+            self.raw_events = df_events
+        self.matchdict = matchdict
+        self.xT_grid = xT_grid
+        self.home_team_id = matchdict['home']['teamId']
+        self.away_team_id = matchdict['away']['teamId']
+        self.team_ids = (self.home_team_id, self.away_team_id)
+        self.player_names = matchdict['playerIdNameDictionary']
+        self._team_views = {}
+
+    @cached_property
+    def raw_events(self):
+        return self._load_events()
+
+    @cached_property
+    @traced('context.events', cat='context')
+    def events(self):
+        """All events with ``prog_pass`` and the spatial index of ``zones.spatial_index``
+        added: statsbomb-scaled ``*_sb`` coordinates and the start and end zones."""
+        df = self.raw_events
+        index = spatial_index(df, None if self.xT_grid is None else self.xT_grid.shape)
+        index['prog_pass'] = np.where(
+            df['type_display_name'] == 'Pass',
+            np.sqrt((105 - df['x'])**2 + (34 - df['y'])**2) - np.sqrt((105 - df['end_x'])**2 + (34 - df['end_y'])**2),
+            0
+        )
+        # One concat instead of ``assign``, which inserts the ~20 columns one by one.
+        events = pd.concat([df, index], axis=1)
+        events.attrs['xt_shape'] = None if self.xT_grid is None else self.xT_grid.shape
+        return events
+
+    @cached_property
+    @traced('context.passes', cat='context')
+    def passes(self):
+        """Successful passes with statsbomb-scaled ``x``/``y``/``end_x``/``end_y``, pass angle and receiver."""
+        df = self.events
+        passes = df[(df['type_display_name'] == 'Pass') & (df['outcome_type_display_name'] == 'Successful')]
+        passes = passes.assign(x=passes['x_sb'], y=passes['y_sb'], end_x=passes['end_x_sb'], end_y=passes['end_y_sb'])
+        pass_angle = np.degrees(np.arctan2(passes['end_y'] - passes['y'], passes['end_x'] - passes['x']))
+        return passes.assign(
+            pass_angle=pass_angle,
+            pass_angle_abs=np.abs(pass_angle),
+            receiver=passes['player_id'].shift(-1).astype('Int64'),
+        )
+
+    @cached_property
+    @traced('context.defensive_actions', cat='context')
+    def defensive_actions(self):
+        return self.events[self.events['type_display_name'].isin(DEFENSIVE_TYPES)]
+
+    @cached_property
+    def xt(self):
+        return calculate_xt(self.events, self.xT_grid)
+
+    @cached_property
+    @traced('context.roster', cat='context')
+    def roster(self):
+        """Players of both teams indexed by ``(team_id, player_id)``. ``name`` prefers the
+        ``playerIdNameDictionary`` spelling, ``lineup_name`` is the lineup's own."""
+        rows = []
+        for side in ('home', 'away'):
+            team_id = self.matchdict[side]['teamId']
+            for player in self.matchdict[side]['players']:
+                rows.append({
+                    'team_id': team_id,
+                    'player_id': player['playerId'],
+                    'name': self.player_names.get(str(player['playerId']), player['name']),
+                    'lineup_name': player['name'],
+                    'shirtNo': player['shirtNo'],
+                    'position': player['position'],
+                    'isFirstEleven': player.get('isFirstEleven', False),
+                })
+        # object keeps shirt numbers as ints when some are missing
+        return pd.DataFrame(rows).astype({'shirtNo': object}).set_index(['team_id', 'player_id'])
+
+    @cached_property
+    @traced('context.pass_locations', cat='context')
+    def pass_locations(self):
+        """Median pass origin and pass count per player, joined with the roster."""
+        locations = self.passes.groupby(['team_id', 'player_id']).agg(
+            x_avg=('x', 'median'), y_avg=('y', 'median'), pass_count=('x', 'size')
+        )
+        return locations.join(self.roster.drop(columns='lineup_name'))
+
+    def _team_view(self, name, team_id):
+        if name not in self._team_views:
+            frame = getattr(self, name)
+            self._team_views[name] = (frame.iloc[:0], dict(tuple(frame.groupby('team_id', sort=False))))
+        empty, views = self._team_views[name]
+        return views.get(team_id, empty)
+
+    def team_events(self, team_id):
+        return self._team_view('events', team_id)
+
+    def team_passes(self, team_id):
+        return self._team_view('passes', team_id)
+
+    def team_defensive_actions(self, team_id):
+        return self._team_view('defensive_actions', team_id)
+
+    def team_roster(self, team_id):
+        return self.roster.xs(team_id, level='team_id')
@@ -1,12 +1,59 @@
-import numpy as np
+import argparse
+import os
+import sys
+import time
 import pandas as pd
 
-x_zones = 120
-y_zones = 80
-dummy_xT_grid = np.zeros((y_zones, x_zones))
+from metrics import fit_xt_grid
+from store import EVENTS_FILE, XT_GRID_FILE, find_match_dirs, load_events, read_season_events, write_xt_grid
+from synthetic import EVENTS_PER_MATCH, season_fixtures, synthetic_events
 
-for x in range(x_zones):
-    dummy_xT_grid[:, x] = (x / x_zones) ** 3 * 0.1
+XT_MODEL_COLUMNS = ['x', 'y', 'end_x', 'end_y', 'type_display_name', 'outcome_type_display_name']
 
-pd.DataFrame(dummy_xT_grid).to_csv("./data/xT_grid.csv", header=False, index=False)
-print("xT_grid.csv created successfully.")
\ No newline at end of file
+def load_training_events(match_dirs):
+    """The columns the xT model needs from every match: one bulk read of the Feather stores,
+    then the CSV-only matches one by one."""
+    stored = [d for d in match_dirs if os.path.exists(os.path.join(d, EVENTS_FILE))]
+    frames = [read_season_events([os.path.join(d, EVENTS_FILE) for d in stored], XT_MODEL_COLUMNS)] if stored else []
+    frames += [load_events(d, XT_MODEL_COLUMNS) for d in match_dirs if d not in stored]
+    return pd.concat(frames, ignore_index=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Learn the xT grid from stored matches with value iteration.")
+    parser.add_argument("match_dirs", nargs="*", help="match directories to train on (default: every match under --data-dir)")
+    parser.add_argument("--data-dir", default="./data")
+    parser.add_argument("--synthetic", type=int, metavar="N", help="train on N synthetic matches instead of stored ones")
+    parser.add_argument("--seed", type=int, default=0, help="seed of the synthetic season")
+    parser.add_argument("--rows", type=int, default=12, help="zones across the pitch width")
+    parser.add_argument("--cols", type=int, default=16, help="zones along the pitch length")
+    parser.add_argument("--tol", type=float, default=1e-6, help="stop once no zone's xT changes by more than this")
+    parser.add_argument("--output", help=f"grid file, .npy or .csv (default: <data-dir>/{XT_GRID_FILE})")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        if args.synthetic:
+            df_events = synthetic_events(args.synthetic * EVENTS_PER_MATCH, args.seed, season_fixtures(args.synthetic, seed=args.seed))
+            source = f"{args.synthetic} synthetic matches"
+        else:
+            match_dirs = args.match_dirs or find_match_dirs(args.data_dir)
+            if not match_dirs:
+                print(f"FATAL ERROR: No matches found under {args.data_dir}. Run scraper.py or pass --synthetic N.")
+                return 1
+            df_events = load_training_events(match_dirs)
+            source = f"{len(match_dirs)} matches"
+    except (OSError, KeyError, ValueError) as e:
+        print(f"FATAL ERROR: Could not read the match events. Error: {e}")
+        return 1
+    loaded = time.perf_counter()
+
+    xT_grid, iterations = fit_xt_grid(df_events, args.rows, args.cols, args.tol)
+    output = args.output or os.path.join(args.data_dir, XT_GRID_FILE)
+    write_xt_grid(xT_grid, output)
+    print(f"{output} created from {source} ({len(df_events):,} events): {args.rows}x{args.cols} zones, "
+          f"{iterations} iterations, max xT {xT_grid.max():.3f}; "
+          f"loaded in {loaded - start:.2f}s, trained in {time.perf_counter() - loaded:.2f}s")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
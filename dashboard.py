@@ -1,115 +1,370 @@
+import argparse
+import io
 import json
-import pandas as pd
-import matplotlib.pyplot as plt
-import numpy as np
-from mplsoccer import Pitch
 import os
+import sys
+from functools import partial
+import numpy as np
 
+import profiling
+from cache import DEFAULT_ARTIFACT_CACHE_MB, ArtifactCache, content_hash
+from context import MatchContext
 from metrics import (
-    prepare_enhanced_passes, get_pass_combinations, get_enhanced_positions, 
-    calculate_team_metrics, filter_defensive_actions, calculate_player_defensive_positions, 
-    calculate_match_stats, 
+    get_pass_combinations, get_enhanced_positions, calculate_team_metrics,
+    calculate_player_defensive_positions,
+    calculate_match_stats,
     get_enhanced_positions_all, calculate_team_metrics_all,
     get_half_pass_map,
-    get_ball_recovery_turnover
-)
-from viz import (
-    plot_enhanced_network, defensive_block, draw_progressive_pass_map, 
-    plot_xt_momentum_subplot, plot_match_stats_subplot,
-    plot_half_pass_density,
-    plot_recovery_turnover_map
+    get_ball_recovery_turnover, get_progressive_passes,
+    compute_xt_momentum
 )
+from profiling import span
+from store import EVENTS_FILE, EVENTS_CSV_FILE, TEAMS_FILE, PLAYERS_FILE, PLAYER_NAMES_FILE, MATCHDICT_FILE, load_events, load_match_meta, load_xt_grid, xt_grid_file
 
-try:
-    with open("config.json", "r") as f:
-        config = json.load(f)
-    
-    DATA_DIR = config["MATCH_SETTINGS"]["DATA_DIR"]
-    OUTPUT_FILE_DASHBOARD = config["MATCH_SETTINGS"]["OUTPUT_FILE_DASHBOARD"]
-    
-    df_events = pd.read_csv(os.path.join(DATA_DIR, "df_events.csv"))
-    xT_grid = pd.read_csv(os.path.join(DATA_DIR, "xT_grid.csv"), header=None).values 
-    with open(os.path.join(DATA_DIR, "matchdict.json"), "r") as f:
-        matchdict_data = json.load(f)
-
-    home_team = matchdict_data['home']
-    away_team = matchdict_data['away']
-    home_team_id = home_team['teamId']
-    away_team_id = away_team['teamId']
-    home_team_name = config["TEAM_COLORS"]["HOME_NAME"]
-    away_team_name = config["TEAM_COLORS"]["AWAY_NAME"]
-    team_id_to_name = {home_team_id: home_team_name, away_team_id: away_team_name}
-    
-    OUTPUT_DASHBOARD_PATH = os.path.join(DATA_DIR, OUTPUT_FILE_DASHBOARD)
+# savefig settings per output profile; "print" is the full 300 dpi report.
+OUTPUT_PROFILES = {
+    'print': {'format': 'png', 'dpi': 300, 'bbox_inches': 'tight'},
+    'preview': {'format': 'png', 'dpi': 50},
+    'web': {'format': 'webp', 'dpi': 100, 'pil_kwargs': {'quality': 80}},
+    'vector': {'format': 'svg', 'dpi': 150},
+}
+OUTPUT_FORMATS = ['png', 'jpg', 'webp', 'svg', 'pdf']
+RASTER_FORMATS = ('png', 'jpg', 'jpeg', 'webp')
 
-except Exception as e:
-    print(f"FATAL ERROR: Configuration or Data loading failed. Check config.json and data files. Error: {e}")
-    exit()
+# Panel names in row-major order of the 4x3 grid, used for tile file names.
+PANEL_LAYOUT = [
+    'home_network', 'away_network', 'match_stats',
+    'home_network_all', 'away_network_all', 'xt_momentum',
+    'home_defensive_block', 'away_defensive_block', 'home_half_pass',
+    'home_progressive_passes', 'away_progressive_passes', 'away_recovery_turnover',
+]
 
-df_events['prog_pass'] = np.where(
-    (df_events['type_display_name'] == 'Pass'),
-    np.sqrt((105 - df_events['x'])**2 + (34 - df_events['y'])**2) - np.sqrt((105 - df_events['end_x'])**2 + (34 - df_events['end_y'])**2),
-    0
-)
+# Columns of the cached xT and progressive-pass frames, i.e. what the momentum and
+# progressive-pass panels read.
+XT_COLUMNS = ['team_id', 'minute', 'xT', 'xT_clipped']
+PROGRESSIVE_COLUMNS = ['x_sb', 'y_sb', 'end_x_sb', 'end_y_sb']
+# Code the cached metric results depend on: the metric modules and every project module
+# they import. Editing any of it invalidates the artifact cache.
+ARTIFACT_SOURCES = ['context.py', 'metrics.py', 'store.py', 'zones.py', 'profiling.py']
+
+# The match_metrics entries each panel draws from.
+PANEL_INPUTS = {
+    'home_network': ['home_avg_locs', 'home_combinations', 'home_metrics'],
+    'away_network': ['away_avg_locs', 'away_combinations', 'away_metrics'],
+    'match_stats': ['stats'],
+    'home_network_all': ['home_avg_locs_all', 'home_combinations', 'home_metrics_all'],
+    'away_network_all': ['away_avg_locs_all', 'away_combinations', 'away_metrics_all'],
+    'xt_momentum': ['xt_momentum'],
+    'home_defensive_block': ['home_positions', 'home_actions'],
+    'away_defensive_block': ['away_positions', 'away_actions'],
+    'home_half_pass': ['home_half_pass_df'],
+    'home_progressive_passes': ['home_progressive_passes'],
+    'away_progressive_passes': ['away_progressive_passes'],
+    'away_recovery_turnover': ['away_recovery_df'],
+}
+def load_config(path="config.json"):
+    with open(path, "r") as f:
+        return json.load(f)
+
+def _load_events(match_dir):
+    with span('load.events'):
+        return load_events(match_dir, compact=True)
+
+def _load_xt_grid(match_dir, xt_grid_path=None):
+    with span('load.xt_grid'):
+        return load_xt_grid(xt_grid_path or xt_grid_file(match_dir))
+
+def _load_meta(match_dir):
+    with span('load.meta'):
+        return load_match_meta(match_dir)
+
+def load_match(match_dir, xt_grid_path=None):
+    return _load_events(match_dir), _load_meta(match_dir), _load_xt_grid(match_dir, xt_grid_path)
+
+def open_match(match_dir, xt_grid_path=None):
+    """A ``MatchContext`` for ``match_dir`` that reads the events only once a frame needs them."""
+    return MatchContext(partial(_load_events, match_dir), _load_meta(match_dir), _load_xt_grid(match_dir, xt_grid_path))
+
+def input_files(match_dir, xt_grid_path=None):
+    """The files ``load_match`` reads for ``match_dir``."""
+    events = EVENTS_FILE if os.path.exists(os.path.join(match_dir, EVENTS_FILE)) else EVENTS_CSV_FILE
+    meta = [TEAMS_FILE, PLAYERS_FILE, PLAYER_NAMES_FILE] if os.path.exists(os.path.join(match_dir, PLAYERS_FILE)) else [MATCHDICT_FILE]
+    return [os.path.join(match_dir, name) for name in [events] + meta] + [xt_grid_path or xt_grid_file(match_dir)]
+
+def artifact_data_key(match_dir, xt_grid_path=None):
+    """SHA-256 over the match's input files and the metric code, the data part of every
+    artifact cache key."""
+    code_dir = os.path.dirname(os.path.abspath(__file__))
+    paths = input_files(match_dir, xt_grid_path) + [os.path.join(code_dir, name) for name in ARTIFACT_SOURCES]
+    digests = []
+    for path in paths:
+        with open(path, "rb") as f:
+            digests.append(content_hash(f.read()))
+    return content_hash("".join(digests).encode())
+
+def artifact_cache(config, cache_dir=None, max_mb=DEFAULT_ARTIFACT_CACHE_MB):
+    return ArtifactCache(cache_dir or os.path.join(config["MATCH_SETTINGS"]["DATA_DIR"], "cache", "artifacts"), max_mb * 2**20)
+
+def momentum_params(config):
+    """``compute_xt_momentum`` keyword arguments from the ``XT_MOMENTUM`` config section."""
+    settings = config.get("XT_MOMENTUM", {})
+    return {'window': settings.get("WINDOW", 4), 'decay': settings.get("DECAY", 0.25), 'sigma': settings.get("SIGMA", 1.0)}
+
+def compute_match_metrics(ctx, config, cache=None, data_key=None, stats_only=False):
+    """Runs every metric the dashboard needs on a ``MatchContext`` and returns them keyed by name.
+
+    With an ``ArtifactCache`` every result is stored under a key made of ``data_key``
+    (see ``artifact_data_key``), its name and its parameters, and computed only on a
+    miss; when everything hits, the match events are never read. ``stats_only`` computes
+    just the match stats.
+    """
+    def cached(name, compute, params=None):
+        if cache is None:
+            return compute()
+        return cache.memoize(cache.key(data_key, name, params), compute)
+
+    match_metrics = {'home_team_id': ctx.home_team_id, 'away_team_id': ctx.away_team_id}
+    if stats_only:
+        match_metrics['stats'] = cached('stats', lambda: calculate_match_stats(ctx))
+        return match_metrics
+    for side, team_id in zip(('home', 'away'), ctx.team_ids):
+        avg_locs = cached(f'{side}_avg_locs', lambda: get_enhanced_positions(ctx, team_id))
+        avg_locs_all = cached(f'{side}_avg_locs_all', lambda: get_enhanced_positions_all(ctx, team_id))
+        match_metrics.update({
+            f'{side}_avg_locs': avg_locs,
+            f'{side}_avg_locs_all': avg_locs_all,
+            f'{side}_combinations': cached(f'{side}_combinations', lambda: get_pass_combinations(ctx, team_id)),
+            f'{side}_metrics': cached(f'{side}_metrics', lambda: calculate_team_metrics(ctx, avg_locs, team_id)),
+            f'{side}_metrics_all': cached(f'{side}_metrics_all', lambda: calculate_team_metrics_all(ctx, avg_locs_all, team_id)),
+            f'{side}_positions': cached(f'{side}_positions', lambda: calculate_player_defensive_positions(ctx, team_id)),
+            f'{side}_actions': cached(f'{side}_actions', lambda: ctx.team_defensive_actions(team_id)),
+            f'{side}_half_pass_df': cached(f'{side}_half_pass_df', lambda: get_half_pass_map(ctx, team_id)[0]),
+            f'{side}_recovery_df': cached(f'{side}_recovery_df', lambda: get_ball_recovery_turnover(ctx, team_id)),
+            f'{side}_progressive_passes': cached(f'{side}_progressive_passes', lambda: get_progressive_passes(ctx, team_id)[PROGRESSIVE_COLUMNS]),
+        })
+
+    momentum = momentum_params(config)
+    match_metrics['stats'] = cached('stats', lambda: calculate_match_stats(ctx))
+    match_metrics['xt_momentum'] = cached(
+        'xt_momentum', lambda: compute_xt_momentum(cached('xt', lambda: ctx.xt[XT_COLUMNS]), ctx.team_ids, **momentum), momentum
+    )
+    return match_metrics
+
+def output_settings(profile='print', fmt=None):
+    """savefig keyword arguments for ``profile``, with ``fmt`` overriding its image format."""
+    settings = dict(OUTPUT_PROFILES[profile])
+    if fmt:
+        settings['format'] = fmt
+    if settings['format'] not in ('webp', 'jpg', 'jpeg'):
+        settings.pop('pil_kwargs', None)
+    return settings
 
-passes_df = prepare_enhanced_passes(df_events) 
-home_avg_locs = get_enhanced_positions(passes_df, home_team_id, home_team['players'], matchdict_data['playerIdNameDictionary'])
-home_combinations = get_pass_combinations(passes_df, home_team_id)
-home_metrics = calculate_team_metrics(passes_df, home_avg_locs, home_team_id)
-away_avg_locs = get_enhanced_positions(passes_df, away_team_id, away_team['players'], matchdict_data['playerIdNameDictionary'])
-away_combinations = get_pass_combinations(passes_df, away_team_id)
-away_metrics = calculate_team_metrics(passes_df, away_avg_locs, away_team_id)
-home_avg_locs_all = get_enhanced_positions_all(passes_df, home_team_id, home_team['players'], matchdict_data['playerIdNameDictionary'])
-home_metrics_all = calculate_team_metrics_all(passes_df, home_avg_locs_all, home_team_id)
-away_avg_locs_all = get_enhanced_positions_all(passes_df, away_team_id, away_team['players'], matchdict_data['playerIdNameDictionary'])
-away_metrics_all = calculate_team_metrics_all(passes_df, away_avg_locs_all, away_team_id)
-defensive_actions = filter_defensive_actions(df_events)
-home_positions = calculate_player_defensive_positions(defensive_actions, home_team_id, home_team['players'])
-away_positions = calculate_player_defensive_positions(defensive_actions, away_team_id, away_team['players'])
-home_actions = defensive_actions[defensive_actions['team_id'] == home_team_id]
-away_actions = defensive_actions[df_events['team_id'] == away_team_id]
-stats = calculate_match_stats(df_events, home_team_id, away_team_id)
-home_half_pass_df, _ = get_half_pass_map(df_events, home_team_id)
-away_half_pass_df, _ = get_half_pass_map(df_events, away_team_id)
-home_recovery_df = get_ball_recovery_turnover(df_events, home_team_id)
-away_recovery_df = get_ball_recovery_turnover(df_events, away_team_id)
-
-def generate_dashboard():
+def output_path_for(path, settings):
+    return os.path.splitext(path)[0] + '.' + settings['format']
+
+def canvas_size(width_in, height_in, dpi):
+    """Pixel size of the Agg canvas matplotlib allocates for a ``width_in`` x ``height_in`` figure."""
+    from matplotlib.transforms import Affine2D, Bbox, TransformedBbox
+    bbox = TransformedBbox(Bbox.from_bounds(0, 0, width_in, height_in), Affine2D().scale(dpi))
+    return int(bbox.width), int(bbox.height)
+
+def render_rgba(fig, dpi, bbox_inches=None):
+    """Renders ``fig`` once into an ``(height, width, 4)`` uint8 array."""
+    buffer = io.BytesIO()
+    fig.savefig(buffer, format='rgba', dpi=dpi, bbox_inches=bbox_inches)
+    width, height = canvas_size(*(bbox_inches.size if bbox_inches is not None else fig.get_size_inches()), dpi)
+    return np.frombuffer(buffer.getbuffer(), dtype=np.uint8).reshape(height, width, 4)
+
+def pixel_region(bbox, origin, dpi, shape, pad=0):
+    """``(top, bottom, left, right)`` pixels of an inch ``bbox`` in an image whose top-left
+    corner is at ``origin`` (inches, figure coordinates)."""
+    height, width = shape[:2]
+    return (max(int((origin[1] - bbox.y1) * dpi) - pad, 0), min(int(np.ceil((origin[1] - bbox.y0) * dpi)) + pad, height),
+            max(int((bbox.x0 - origin[0]) * dpi) - pad, 0), min(int(np.ceil((bbox.x1 - origin[0]) * dpi)) + pad, width))
+
+def write_tiles(tiles, tiles_dir, fmt):
+    """Writes the ``tiles.json`` index for the panel files ``tiles`` saved in ``tiles_dir``."""
+    entries = [{'panel': name, 'file': f"{name}.{fmt}"} for name in tiles]
+    with open(os.path.join(tiles_dir, "tiles.json"), "w") as f:
+        json.dump({'columns': 3, 'tiles': entries}, f, indent=4)
+    return entries
+
+def save_raster_tiles(image, boxes, origin, dpi, tiles_dir, settings):
+    """Crops each panel's inch bbox out of a rendered ``image`` and saves it as a tile."""
+    from PIL import Image
+    os.makedirs(tiles_dir, exist_ok=True)
+    for name, bbox in boxes.items():
+        top, bottom, left, right = pixel_region(bbox, origin, dpi, image.shape)
+        tile = Image.fromarray(image[top:bottom, left:right])
+        if settings['format'] in ('jpg', 'jpeg'):
+            tile = tile.convert('RGB')
+        tile.save(os.path.join(tiles_dir, f"{name}.{settings['format']}"), **settings.get('pil_kwargs', {}))
+    return write_tiles(boxes, tiles_dir, settings['format'])
+
+def save_panel_tiles(fig, panels, tiles_dir, settings):
+    """Saves every panel as its own image in ``tiles_dir`` plus a ``tiles.json`` index.
+
+    Raster tiles are cropped from a single render of the figure; vector tiles need
+    one savefig per panel.
+    """
+    os.makedirs(tiles_dir, exist_ok=True)
+    boxes = {name: ax.get_tightbbox().transformed(fig.dpi_scale_trans.inverted()).padded(0.1) for name, ax in panels.items()}
+    if settings['format'] in RASTER_FORMATS:
+        dpi = settings.get('dpi', fig.dpi)
+        return save_raster_tiles(render_rgba(fig, dpi), boxes, (0, fig.get_figheight()), dpi, tiles_dir, settings)
+    for name, bbox in boxes.items():
+        fig.savefig(os.path.join(tiles_dir, f"{name}.{settings['format']}"), **{**settings, 'bbox_inches': bbox})
+    return write_tiles(boxes, tiles_dir, settings['format'])
+
+def new_dashboard_figure(config):
+    """The empty 4x3 dashboard figure with its title, and its axes keyed by panel name."""
+    from matplotlib.figure import Figure
+    fig = Figure(figsize=(24, 20), facecolor=config["AESTHETICS"]["BG_COLOR"])
+    axs = fig.subplots(4, 3)
+    fig.suptitle(f'{config["TEAM_COLORS"]["HOME_NAME"]} vs {config["TEAM_COLORS"]["AWAY_NAME"]} - Full Tactical Report',
+                 fontsize=32, color=config["AESTHETICS"]["LINE_COLOR"], weight='bold', y=0.98)
+    return fig, dict(zip(PANEL_LAYOUT, axs.flat))
+
+def apply_dashboard_layout(fig):
+    fig.tight_layout()
+    fig.subplots_adjust(top=0.94, hspace=0.3, wspace=0.15)
+
+def draw_panels(panels, match_metrics, config, names=None):
+    """Draws the named panels (all by default) onto their axes in ``panels``."""
+    from viz import (
+        plot_enhanced_network, defensive_block, draw_progressive_pass_map,
+        plot_xt_momentum_subplot, plot_match_stats_subplot,
+        plot_half_pass_density,
+        plot_recovery_turnover_map
+    )
 
     BG_COLOR = config["AESTHETICS"]["BG_COLOR"]
-    LINE_COLOR = config["AESTHETICS"]["LINE_COLOR"]
     HOME_COLOR = config["TEAM_COLORS"]["HOME_COLOR"]
     AWAY_COLOR = config["TEAM_COLORS"]["AWAY_COLOR"]
+    home_team_name = config["TEAM_COLORS"]["HOME_NAME"]
+    away_team_name = config["TEAM_COLORS"]["AWAY_NAME"]
+    heatmap = {'bandwidth': config.get("HEATMAP", {}).get("BANDWIDTH"), 'resolution': config.get("HEATMAP", {}).get("RESOLUTION", 2)}
+    home_team_id, away_team_id = match_metrics['home_team_id'], match_metrics['away_team_id']
+    team_id_to_name = {home_team_id: home_team_name, away_team_id: away_team_name}
+    m = match_metrics
+
+    drawers = {
+        'home_network': lambda ax: plot_enhanced_network(ax, m['home_avg_locs'], m['home_combinations'], m['home_metrics'],
+                                                         f'{home_team_name} (Starters)', HOME_COLOR, True, BG_COLOR),
+        'away_network': lambda ax: plot_enhanced_network(ax, m['away_avg_locs'], m['away_combinations'], m['away_metrics'],
+                                                         f'{away_team_name} (Starters)', AWAY_COLOR, False, BG_COLOR),
+        'match_stats': lambda ax: plot_match_stats_subplot(ax, m['stats'], home_team_name, away_team_name, HOME_COLOR, AWAY_COLOR),
+        'home_network_all': lambda ax: plot_enhanced_network(ax, m['home_avg_locs_all'], m['home_combinations'], m['home_metrics_all'],
+                                                             f'{home_team_name} (All Players)', HOME_COLOR, True, BG_COLOR),
+        'away_network_all': lambda ax: plot_enhanced_network(ax, m['away_avg_locs_all'], m['away_combinations'], m['away_metrics_all'],
+                                                             f'{away_team_name} (All Players)', AWAY_COLOR, False, BG_COLOR),
+        'xt_momentum': lambda ax: plot_xt_momentum_subplot(ax, m['xt_momentum'], team_id_to_name, home_team_id, away_team_id, HOME_COLOR, AWAY_COLOR),
+        'home_defensive_block': lambda ax: defensive_block(ax, m['home_positions'], m['home_actions'], home_team_name, HOME_COLOR, is_away_team=False, **heatmap),
+        'away_defensive_block': lambda ax: defensive_block(ax, m['away_positions'], m['away_actions'], away_team_name, AWAY_COLOR, is_away_team=True, **heatmap),
+        'home_half_pass': lambda ax: plot_half_pass_density(ax, m['home_half_pass_df'], home_team_name, HOME_COLOR, is_away_team=False),
+        'home_progressive_passes': lambda ax: draw_progressive_pass_map(ax, m['home_progressive_passes'], home_team_name, HOME_COLOR, is_away_team=False),
+        'away_progressive_passes': lambda ax: draw_progressive_pass_map(ax, m['away_progressive_passes'], away_team_name, AWAY_COLOR, is_away_team=True),
+        'away_recovery_turnover': lambda ax: plot_recovery_turnover_map(ax, m['away_recovery_df'], away_team_name, is_away_team=True, **heatmap),
+    }
+    for name in names or PANEL_LAYOUT:
+        with span(f'panel.{name}', cat='panel', profile=True):
+            drawers[name](panels[name])
 
-    fig, axs = plt.subplots(4, 3, figsize=(24, 20), facecolor=BG_COLOR)
-    fig.suptitle(f'{home_team_name} vs {away_team_name} - Full Tactical Report', fontsize=32, color=LINE_COLOR, weight='bold', y=0.98)
-    
-    plot_enhanced_network(axs[0,0], passes_df, home_avg_locs, home_combinations, home_metrics, 
-                          f'{home_team_name} (Starters)', HOME_COLOR, True, BG_COLOR)
-    plot_enhanced_network(axs[0,1], passes_df, away_avg_locs, away_combinations, away_metrics, 
-                          f'{away_team_name} (Starters)', AWAY_COLOR, False, BG_COLOR)
-    plot_match_stats_subplot(axs[0,2], stats, home_team_name, away_team_name) 
-
-    plot_enhanced_network(axs[1,0], passes_df, home_avg_locs_all, home_combinations, home_metrics_all, 
-                          f'{home_team_name} (All Players)', HOME_COLOR, True, BG_COLOR)
-    plot_enhanced_network(axs[1,1], passes_df, away_avg_locs_all, away_combinations, away_metrics_all, 
-                          f'{away_team_name} (All Players)', AWAY_COLOR, False, BG_COLOR)
-    plot_xt_momentum_subplot(axs[1,2], df_events, xT_grid, team_id_to_name, home_team_id, away_team_id)
-
-    defensive_block(axs[2,0], home_positions, home_actions, home_team_name, HOME_COLOR, is_away_team=False)
-    defensive_block(axs[2,1], away_positions, away_actions, away_team_name, AWAY_COLOR, is_away_team=True)
-    plot_half_pass_density(axs[2,2], home_half_pass_df, home_team_name, HOME_COLOR, is_away_team=False) 
-
-    draw_progressive_pass_map(axs[3,0], df_events, home_team_id, home_team_name, HOME_COLOR, is_away_team=False) 
-    draw_progressive_pass_map(axs[3,1], df_events, away_team_id, away_team_name, AWAY_COLOR, is_away_team=True) 
-    plot_recovery_turnover_map(axs[3,2], away_recovery_df, away_team_name, is_away_team=True) 
-
-    plt.tight_layout()
-    plt.subplots_adjust(top=0.94, hspace=0.3, wspace=0.15) 
-    
-    print(f"Saving dashboard image to {OUTPUT_DASHBOARD_PATH}...")
-    plt.savefig(OUTPUT_DASHBOARD_PATH, dpi=300, bbox_inches='tight')
+def generate_dashboard(match_metrics, config, output_path, profile='print', fmt=None, tiles_dir=None, workers=1):
+    """Renders the dashboard to ``output_path``. With ``workers`` > 1 and a raster format
+    the panels are drawn in a process pool and composited (see ``compositor.py``)."""
+    settings = output_settings(profile, fmt)
+    print(f"Saving dashboard image to {output_path}...")
+    if workers > 1 and settings['format'] in RASTER_FORMATS:
+        from compositor import render_composited
+        with span('render.composited', workers=workers):
+            render_composited(match_metrics, config, output_path, settings, workers, tiles_dir)
+    else:
+        with span('render.figure'):
+            fig, panels = new_dashboard_figure(config)
+        draw_panels(panels, match_metrics, config)
+        with span('render.layout'):
+            apply_dashboard_layout(fig)
+        with span('render.save', format=settings['format'], dpi=settings.get('dpi')):
+            fig.savefig(output_path, **settings)
+        if tiles_dir:
+            with span('render.tiles'):
+                save_panel_tiles(fig, panels, tiles_dir, settings)
+    if tiles_dir:
+        print(f"Panel tiles saved to {tiles_dir}")
     print("Dashboard image saved successfully!")
 
+def build_dashboard(match_dir, config, output=None, stats_only=False, xt_grid_path=None, profile='print', fmt=None, tiles_dir=None, workers=1,
+                    cache=None):
+    """Loads one match from ``match_dir`` and renders its dashboard to ``output``.
+
+    ``profile`` picks one of ``OUTPUT_PROFILES`` and ``fmt`` overrides its format;
+    ``tiles_dir`` additionally saves every panel as its own image, and ``workers`` > 1
+    renders panels in that many processes. With ``stats_only`` nothing is rendered and
+    matplotlib is never imported; the key match stats are returned (and written as JSON
+    to ``output`` if given). With an ``ArtifactCache`` the metric results are reused
+    while the match files and metric code are unchanged, so style-only config changes
+    go straight to rendering.
+    """
+    with span('load'):
+        ctx = open_match(match_dir, xt_grid_path)
+        data_key = artifact_data_key(match_dir, xt_grid_path) if cache is not None else None
+    with span('metrics'):
+        match_metrics = compute_match_metrics(ctx, config, cache, data_key, stats_only)
+    if cache is not None:
+        # stderr, so ``--stats-only`` output on stdout stays valid JSON.
+        print(f"Artifact cache: {cache.format_stats()}", file=sys.stderr)
+
+    if stats_only:
+        if output:
+            with open(output, "w") as f:
+                json.dump(match_metrics['stats'], f, indent=4)
+        return match_metrics['stats']
+
+    output = output or output_path_for(os.path.join(match_dir, config["MATCH_SETTINGS"]["OUTPUT_FILE_DASHBOARD"]), output_settings(profile, fmt))
+    generate_dashboard(match_metrics, config, output, profile, fmt, tiles_dir, workers)
+    return match_metrics
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate the 4x3 tactical dashboard for one scraped match.")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--match-dir", help="directory holding the scraped match files (default: DATA_DIR)")
+    parser.add_argument("--xt-grid", help="path to the xT grid, .npy or .csv (default: <match-dir>/xT_grid.npy, else xT_grid.csv)")
+    parser.add_argument("--output", help="output image path, or JSON path with --stats-only")
+    parser.add_argument("--stats-only", action="store_true", help="compute the key match stats as JSON without rendering")
+    parser.add_argument("--profile", choices=list(OUTPUT_PROFILES), default="print",
+                        help="output profile: print (300 dpi PNG), preview (50 dpi PNG), web (WebP) or vector (SVG)")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="override the profile's image format")
+    parser.add_argument("--tiles", help="also save each panel as its own image in this directory")
+    parser.add_argument("--workers", type=int, default=1, help="render panels in this many processes and composite them (raster formats)")
+    parser.add_argument("--cache-dir", help="metric artifact cache directory (default: <DATA_DIR>/cache/artifacts)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_ARTIFACT_CACHE_MB, help="artifact cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="recompute every metric and store nothing")
+    parser.add_argument("--trace", help="write a Chrome/Perfetto trace of the pipeline stages to this JSON file")
+    parser.add_argument("--trace-summary", help="write per-stage wall time, CPU time and peak RSS to this JSON file")
+    parser.add_argument("--profile-panels", metavar="DIR", help="write a cProfile dump per panel (<panel>.prof) to this directory")
+    args = parser.parse_args(argv)
+
+    tracer = profiling.start(args.profile_panels) if args.trace or args.trace_summary or args.profile_panels else None
+    try:
+        config = load_config(args.config)
+        match_dir = args.match_dir or config["MATCH_SETTINGS"]["DATA_DIR"]
+        cache = None if args.no_cache else artifact_cache(config, args.cache_dir, args.cache_size)
+        result = build_dashboard(match_dir, config, args.output, stats_only=args.stats_only, xt_grid_path=args.xt_grid,
+                                 profile=args.profile, fmt=args.format, tiles_dir=args.tiles, workers=args.workers, cache=cache)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"FATAL ERROR: Configuration or Data loading failed. Check config.json and data files. Error: {e}")
+        return 1
+    finally:
+        profiling.stop()
+
+    if tracer:
+        tracer.write(args.trace, args.trace_summary)
+        print(tracer.format_summary(limit=15))
+
+    if args.stats_only and not args.output:
+        print(json.dumps(result, indent=4))
+    return 0
+
 if __name__ == "__main__":
-    generate_dashboard()
\ No newline at end of file
+    sys.exit(main())
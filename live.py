@@ -0,0 +1,496 @@
+import argparse
+import heapq
+import json
+import os
+import sys
+import time
+from collections import Counter
+
+import numpy as np
+import pandas as pd
+
+from cache import is_match_finished
+from context import DEFENSIVE_TYPES, MatchContext
+from dashboard import (
+    PANEL_INPUTS, PANEL_LAYOUT, OUTPUT_PROFILES, OUTPUT_FORMATS, RASTER_FORMATS, XT_COLUMNS, PROGRESSIVE_COLUMNS,
+    load_config, momentum_params, new_dashboard_figure, apply_dashboard_layout, draw_panels,
+    output_settings, output_path_for, render_rgba, pixel_region, save_raster_tiles, write_tiles
+)
+from metrics import (
+    RECOVERY_TYPES, TURNOVER_TYPES, XT_ACTION_TYPES, build_event_count_cube, match_stats_from_cube, momentum_from_minutes, verticality_score,
+    get_enhanced_positions, get_enhanced_positions_all, calculate_team_metrics, calculate_team_metrics_all,
+    get_half_pass_map, get_ball_recovery_turnover, get_progressive_passes
+)
+from profiling import span
+from scraper import BACKENDS, make_backend, match_url, scrape_match
+from store import compact_events, load_events, load_match_meta, load_xt_grid, normalize_events, xt_grid_file
+
+DEFAULT_POLL_INTERVAL = 30
+CUBE_KEYS = ['match_id', 'team_id', 'type', 'outcome', 'is_touch', 'third']
+# Extra pixels copied around each redrawn panel, as in compositor.py.
+REGION_PAD = 2
+# Event types each appended subset can contain; a batch without any of them leaves
+# the subset unchanged and is not filtered.
+SUBSET_TYPES = {
+    'actions': DEFENSIVE_TYPES,
+    'half_pass_df': ['Pass'],
+    'recovery_df': RECOVERY_TYPES + TURNOVER_TYPES + ['Foul'],
+    'progressive_passes': ['Pass'],
+}
+
+class RunningMedian:
+    """Exact streaming median of the values added so far: a max-heap of the lower half
+    and a min-heap of the upper half, so ``add`` is O(log n) and ``median`` O(1). Values
+    keep their numpy dtype, so float32 columns give the same median as pandas."""
+    __slots__ = ('low', 'high')
+
+    def __init__(self):
+        self.low, self.high = [], []
+
+    def add(self, value):
+        if value != value:  # NaN, skipped like pandas' median
+            return
+        if self.low and value > -self.low[0]:
+            heapq.heappush(self.high, value)
+        else:
+            heapq.heappush(self.low, -value)
+        if len(self.low) > len(self.high) + 1:
+            heapq.heappush(self.high, -heapq.heappop(self.low))
+        elif len(self.high) > len(self.low):
+            heapq.heappush(self.low, -heapq.heappop(self.high))
+
+    def __len__(self):
+        return len(self.low) + len(self.high)
+
+    def median(self):
+        if not self.low:
+            return np.nan
+        if len(self.low) > len(self.high):
+            return -self.low[0]
+        return (-self.low[0] + self.high[0]) / 2
+
+class _Locations:
+    """Running median location and count of one player's passes or defensive actions."""
+    __slots__ = ('x', 'y', 'count')
+
+    def __init__(self):
+        self.x, self.y, self.count = RunningMedian(), RunningMedian(), 0
+
+    def add(self, x, y):
+        self.x.add(x)
+        self.y.add(y)
+        self.count += 1
+
+class LiveMatch:
+    """The dashboard's ``match_metrics`` for a match whose events arrive in batches.
+
+    ``update`` appends only events whose ``id`` has not been seen and folds them into
+    running aggregates instead of recomputing over the whole history: the stat count
+    cube behind ``calculate_match_stats``, pass-pair counters behind
+    ``get_pass_combinations``, streaming medians for player positions and verticality,
+    per-minute xT maxima for the momentum series, and appended event subsets for the
+    heatmap and pass-map panels. After every update ``metrics`` equals what
+    ``compute_match_metrics`` returns for all events so far.
+    """
+
+    def __init__(self, matchdict, xT_grid, config):
+        self.matchdict = matchdict
+        self.xT_grid = xT_grid
+        self.momentum = momentum_params(config)
+        # Holds the roster and the streamed pass locations for the metric functions.
+        self.view = MatchContext(pd.DataFrame(), matchdict, xT_grid)
+        self.team_ids = self.view.team_ids
+        self.sides = dict(zip(self.team_ids, ('home', 'away')))
+        self.ids = set()
+        self.n_events = 0
+        self.cube = Counter()
+        self.last_pass = None
+        self.pairs = {team_id: Counter() for team_id in self.team_ids}
+        self.pass_locations = {}
+        self.defensive_locations = {}
+        self.angles = {team_id: RunningMedian() for team_id in self.team_ids}
+        self.frames = {}
+        self.per_minute = np.zeros((1, 2, 0))
+        self.observed = np.zeros((1, 0), dtype=bool)
+        self.metrics = {'home_team_id': self.team_ids[0], 'away_team_id': self.team_ids[1]}
+
+    def update(self, df_events):
+        """Adds the unseen events of ``df_events`` (normalized, in match order) and returns
+        the names of the ``metrics`` entries that changed."""
+        new = df_events[~df_events['id'].isin(self.ids)]
+        if new.empty:
+            return set()
+        new = compact_events(new)
+        new = new.set_axis(pd.RangeIndex(self.n_events, self.n_events + len(new)))
+        self.ids.update(new['id'].tolist())
+        self.n_events += len(new)
+        chunk = MatchContext(new, self.matchdict, self.xT_grid)
+        types = set(new['type_display_name'].tolist())
+
+        changed = self._update_stats(chunk.events)
+        if 'Pass' in types:
+            changed |= self._update_passes(chunk)
+        if types & set(DEFENSIVE_TYPES):
+            changed |= self._update_defensive_positions(chunk)
+        changed |= self._update_frames(chunk, types)
+        if types & set(XT_ACTION_TYPES) or 'xt_momentum' not in self.metrics:
+            changed |= self._update_momentum(chunk)
+        self._refresh(changed)
+        return changed
+
+    def _update_stats(self, new):
+        cube = build_event_count_cube(new, np.zeros(len(new), dtype=int))
+        for *key, count in zip(*(cube[column].tolist() for column in CUBE_KEYS + ['count'])):
+            self.cube[tuple(key)] += count
+        return {'stats'}
+
+    def _update_passes(self, chunk):
+        changed = set()
+        passes = chunk.passes
+        for team_id, player_id, x, y, angle in zip(*(passes[column].to_numpy() for column in ('team_id', 'player_id', 'x', 'y', 'pass_angle_abs'))):
+            # The receiver of a pass is whoever makes the next successful pass.
+            if self.last_pass is not None:
+                passer_team, passer = self.last_pass
+                if passer_team in self.pairs and not pd.isna(passer) and not pd.isna(player_id):
+                    self.pairs[passer_team][(min(passer, player_id), max(passer, player_id))] += 1
+                    changed.add(f'{self.sides[passer_team]}_combinations')
+            self.last_pass = (team_id, player_id)
+            if team_id not in self.sides:
+                continue
+            if not pd.isna(player_id):
+                self.pass_locations.setdefault((team_id, player_id), _Locations()).add(x, y)
+            if 0 <= angle <= 90:
+                self.angles[team_id].add(angle)
+            side = self.sides[team_id]
+            changed |= {f'{side}_avg_locs', f'{side}_avg_locs_all', f'{side}_metrics', f'{side}_metrics_all'}
+        return changed
+
+    def _update_defensive_positions(self, chunk):
+        changed = set()
+        actions = chunk.defensive_actions
+        for team_id, player_id, x, y in zip(*(actions[column].to_numpy() for column in ('team_id', 'player_id', 'x_sb', 'y_sb'))):
+            if team_id in self.sides and not pd.isna(player_id):
+                self.defensive_locations.setdefault((team_id, player_id), _Locations()).add(x, y)
+                changed.add(f'{self.sides[team_id]}_positions')
+        return changed
+
+    def _update_frames(self, chunk, types):
+        changed = set()
+        present = set(chunk.raw_events['team_id'].tolist())
+        for team_id, side in self.sides.items():
+            subsets = {
+                'actions': lambda: chunk.team_defensive_actions(team_id),
+                'half_pass_df': lambda: get_half_pass_map(chunk, team_id)[0],
+                'recovery_df': lambda: get_ball_recovery_turnover(chunk, team_id),
+                'progressive_passes': lambda: get_progressive_passes(chunk, team_id)[PROGRESSIVE_COLUMNS],
+            }
+            for subset, compute in subsets.items():
+                name = f'{side}_{subset}'
+                if name not in self.frames:
+                    # The first batch always runs, so every subset starts with its columns.
+                    self.frames[name] = [compute()]
+                    changed.add(name)
+                elif team_id in present and types & set(SUBSET_TYPES[subset]):
+                    frame = compute()
+                    if len(frame):
+                        self.frames[name].append(frame)
+                        changed.add(name)
+        return changed
+
+    def _update_momentum(self, chunk):
+        xt = chunk.xt[XT_COLUMNS]
+        side = xt['team_id'].map({team_id: i for i, team_id in enumerate(self.team_ids)})
+        keep = side.notna().values
+        if not keep.any():
+            return {'xt_momentum'} if 'xt_momentum' not in self.metrics else set()
+        minutes = xt['minute'].values[keep].astype(int)
+        if minutes.max() >= self.observed.shape[1]:
+            grow = minutes.max() + 1 - self.observed.shape[1]
+            self.per_minute = np.pad(self.per_minute, ((0, 0), (0, 0), (0, grow)))
+            self.observed = np.pad(self.observed, ((0, 0), (0, grow)))
+        np.maximum.at(self.per_minute, (0, side.values[keep].astype(int), minutes), xt['xT_clipped'].values[keep])
+        self.observed[0, minutes] = True
+        return {'xt_momentum'}
+
+    def _location_frame(self):
+        keys = sorted(self.pass_locations)
+        index = pd.MultiIndex.from_tuples(keys, names=['team_id', 'player_id']) if keys else \
+            pd.MultiIndex.from_arrays([[], []], names=['team_id', 'player_id'])
+        locations = pd.DataFrame({
+            # float32 like the batch path's groupby median, so team lines and labels match.
+            'x_avg': np.array([self.pass_locations[key].x.median() for key in keys], dtype=np.float32),
+            'y_avg': np.array([self.pass_locations[key].y.median() for key in keys], dtype=np.float32),
+            'pass_count': [self.pass_locations[key].count for key in keys],
+        }, index=index)
+        return locations.join(self.view.roster.drop(columns='lineup_name'))
+
+    def _defensive_positions(self, team_id):
+        roster = self.view.team_roster(team_id)
+        positions = {}
+        for key in sorted(key for key in self.defensive_locations if key[0] == team_id):
+            player_id = key[1]
+            if player_id not in roster.index or roster.at[player_id, 'isFirstEleven'] != True:
+                continue
+            location = self.defensive_locations[key]
+            player = roster.loc[player_id]
+            positions[player_id] = {
+                # Python floats like the batch path's to_dict, so labels format the same.
+                'x': float(location.x.median()), 'y': float(location.y.median()), 'action_count': location.count,
+                'name': player['lineup_name'], 'position': player['position'], 'shirtNo': player['shirtNo'], 'is_starter': True,
+            }
+        return positions
+
+    def _combinations(self, team_id):
+        pairs = sorted(self.pairs[team_id].items())
+        return pd.DataFrame({
+            'pos_min': pd.array([pair[0] for pair, _ in pairs], dtype='Int64'),
+            'pos_max': pd.array([pair[1] for pair, _ in pairs], dtype='Int64'),
+            'pass_count': np.array([count for _, count in pairs], dtype=np.int64),
+        })
+
+    def _refresh(self, changed):
+        m = self.metrics
+        if 'stats' in changed:
+            cube = pd.DataFrame(list(self.cube), columns=CUBE_KEYS).assign(count=list(self.cube.values()))
+            m['stats'] = match_stats_from_cube(cube, {0: self.team_ids})[0]
+        stale = [side for side in self.sides.values() if f'{side}_avg_locs' in changed or f'{side}_avg_locs' not in m]
+        if stale:
+            self.view.pass_locations = self._location_frame()
+        for team_id, side in self.sides.items():
+            if side in stale:
+                verticality = verticality_score(self.angles[team_id].median())
+                m[f'{side}_avg_locs'] = get_enhanced_positions(self.view, team_id)
+                m[f'{side}_avg_locs_all'] = get_enhanced_positions_all(self.view, team_id)
+                m[f'{side}_metrics'] = calculate_team_metrics(None, m[f'{side}_avg_locs'], team_id, verticality)
+                m[f'{side}_metrics_all'] = calculate_team_metrics_all(None, m[f'{side}_avg_locs_all'], team_id, verticality)
+            if f'{side}_combinations' in changed or f'{side}_combinations' not in m:
+                m[f'{side}_combinations'] = self._combinations(team_id)
+            if f'{side}_positions' in changed or f'{side}_positions' not in m:
+                m[f'{side}_positions'] = self._defensive_positions(team_id)
+        for name, frames in self.frames.items():
+            if name in changed:
+                if len(frames) > 1:
+                    frame = pd.concat(frames)
+                    if name.endswith('_recovery_df'):
+                        # get_ball_recovery_turnover lists all recoveries before all turnovers
+                        frame = frame.sort_values('action_type', kind='stable')
+                    self.frames[name] = frames = [frame]
+                m[name] = frames[0]
+        if 'xt_momentum' in changed:
+            m['xt_momentum'] = momentum_from_minutes(self.per_minute, self.observed, np.array([0]), **self.momentum)
+
+class LiveDashboard:
+    """The dashboard figure and its last rendered image, kept between updates.
+
+    The first ``render`` draws and lays out every panel; later ones clear and redraw only
+    the panels whose ``PANEL_INPUTS`` changed, render them with every other panel hidden
+    at the same layout and crop, and paste their regions into the kept image. Vector
+    formats are re-saved in full.
+    """
+
+    def __init__(self, config, output_path, settings, tiles_dir=None):
+        self.config = config
+        self.output_path = output_path
+        self.settings = settings
+        self.tiles_dir = tiles_dir
+        self.fig = self.panels = self.image = None
+
+    def _boxes(self, names):
+        """Tight bboxes of ``names`` in inches, from the last render."""
+        return {name: self.panels[name].get_tightbbox().transformed(self.fig.dpi_scale_trans.inverted()) for name in names}
+
+    def _save(self, names):
+        import matplotlib.image
+        settings = self.settings
+        matplotlib.image.imsave(self.output_path, self.image, format=settings['format'], dpi=self.dpi, pil_kwargs=settings.get('pil_kwargs'))
+        if self.tiles_dir:
+            boxes = {name: box.padded(0.1) for name, box in self._boxes(names).items()}
+            save_raster_tiles(self.image, boxes, self.origin, self.dpi, self.tiles_dir, settings)
+            write_tiles(PANEL_LAYOUT, self.tiles_dir, settings['format'])
+
+    def _first_render(self, match_metrics):
+        import matplotlib
+        self.fig, self.panels = new_dashboard_figure(self.config)
+        draw_panels(self.panels, match_metrics, self.config)
+        apply_dashboard_layout(self.fig)
+        if self.settings['format'] not in RASTER_FORMATS:
+            return
+        self.dpi = self.settings.get('dpi', self.fig.dpi)
+        self.fig.dpi = self.dpi
+        self.bbox_inches = None
+        if self.settings.get('bbox_inches') == 'tight':
+            pad = self.settings.get('pad_inches', matplotlib.rcParams['savefig.pad_inches'])
+            self.bbox_inches = self.fig.get_tightbbox().padded(pad)
+        self.origin = (self.bbox_inches.x0, self.bbox_inches.y1) if self.bbox_inches is not None else (0, self.fig.get_figheight())
+        self.image = render_rgba(self.fig, self.dpi, self.bbox_inches).copy()
+
+    def render(self, match_metrics, changed=None):
+        """Renders the dashboard for ``match_metrics`` and returns the redrawn panel names.
+        ``changed`` holds the metric names updated since the last call (None: all)."""
+        if self.fig is None:
+            self._first_render(match_metrics)
+            names = list(PANEL_LAYOUT)
+        else:
+            names = [name for name in PANEL_LAYOUT if changed is None or changed & set(PANEL_INPUTS[name])]
+            if not names:
+                return names
+            old_boxes = self._boxes(names) if self.image is not None else None
+            for name in names:
+                self.panels[name].clear()
+            draw_panels(self.panels, match_metrics, self.config, names)
+            if self.image is not None:
+                self._paste(names, old_boxes)
+
+        if self.image is None:
+            self.fig.savefig(self.output_path, **self.settings)
+        else:
+            self._save(names)
+        return names
+
+    def _paste(self, names, old_boxes):
+        for name, ax in self.panels.items():
+            ax.set_visible(name in names)
+        try:
+            rendered = render_rgba(self.fig, self.dpi, self.bbox_inches)
+            new_boxes = self._boxes(names)
+        finally:
+            for ax in self.panels.values():
+                ax.set_visible(True)
+        for name in names:
+            box = type(old_boxes[name]).union([old_boxes[name], new_boxes[name]])
+            top, bottom, left, right = pixel_region(box, self.origin, self.dpi, self.image.shape, REGION_PAD)
+            self.image[top:bottom, left:right] = rendered[top:bottom, left:right]
+
+class ReplaySource:
+    """Stands in for a live feed by replaying a saved match ``batch_size`` events per poll."""
+
+    def __init__(self, match_dir, batch_size=1):
+        self.events = load_events(match_dir)
+        self.matchdict = load_match_meta(match_dir)
+        self.batch_size = batch_size
+        self.position = 0
+
+    @property
+    def finished(self):
+        return self.position >= len(self.events)
+
+    def poll(self):
+        chunk = self.events.iloc[self.position:self.position + self.batch_size]
+        self.position += len(chunk)
+        return chunk
+
+class WhoScoredSource:
+    """Fetches the match page on every poll; ``LiveMatch`` keeps only the new event ids."""
+
+    def __init__(self, url, backend):
+        self.url = match_url(url)
+        self.backend = backend
+        self.matchdict = None
+        self.finished = False
+
+    def poll(self):
+        matchdict, df_events = scrape_match(self.url, self.backend)
+        if matchdict is None:
+            raise ValueError("matchCentreData not found")
+        self.matchdict = matchdict
+        self.finished = is_match_finished(matchdict)
+        return normalize_events(df_events)
+
+def _percentiles(values):
+    if not values:
+        return {}
+    return {'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)), 'max': float(np.max(values))}
+
+def run_live(source, xT_grid, config, dashboard=None, interval=DEFAULT_POLL_INTERVAL, max_updates=None):
+    """Polls ``source`` until the match is finished, updating the metrics and re-rendering
+    the changed panels of ``dashboard`` (if given) after every poll with new events.
+
+    Returns the ``LiveMatch`` and one latency record per update: new events, milliseconds
+    spent updating the metrics and rendering, and the redrawn panels.
+    """
+    live, updates = None, []
+    while max_updates is None or len(updates) < max_updates:
+        poll_start = time.perf_counter()
+        df_new = source.poll()
+        if live is None:
+            live = LiveMatch(source.matchdict, xT_grid, config)
+        start = time.perf_counter()
+        with span('live.update'):
+            changed = live.update(df_new)
+        updated = time.perf_counter()
+        panels = []
+        if changed and dashboard is not None:
+            with span('live.render'):
+                panels = dashboard.render(live.metrics, changed)
+        if changed:
+            updates.append({'events': live.n_events, 'new_events': len(df_new), 'update_ms': (updated - start) * 1000,
+                            'render_ms': (time.perf_counter() - updated) * 1000, 'panels': panels})
+        if source.finished:
+            break
+        time.sleep(max(0, interval - (time.perf_counter() - poll_start)))
+    return live, updates
+
+def latency_summary(updates):
+    return {
+        'updates': len(updates),
+        'update_ms': _percentiles([u['update_ms'] for u in updates]),
+        'render_ms': _percentiles([u['render_ms'] for u in updates if u['panels']]),
+        'panels_per_render': float(np.mean([len(u['panels']) for u in updates if u['panels']])) if any(u['panels'] for u in updates) else 0,
+    }
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Live dashboard: poll a match and re-render the panels whose data changed.")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    source = parser.add_mutually_exclusive_group()
+    source.add_argument("--url", help="match URL or id to poll (default: WHOSCORED_URL)")
+    source.add_argument("--replay", metavar="MATCH_DIR", help="replay a saved match instead of polling WhoScored")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="http")
+    parser.add_argument("--html-dir", help="directory of saved <match_id>.html pages for --backend local")
+    parser.add_argument("--batch-size", type=int, default=1, help="events per poll when replaying")
+    parser.add_argument("--interval", type=float, help=f"seconds between polls (default: {DEFAULT_POLL_INTERVAL}, 0 when replaying)")
+    parser.add_argument("--xt-grid", help="path to the xT grid (default: xT_grid.npy, else xT_grid.csv, in DATA_DIR)")
+    parser.add_argument("--output", help="output image path (default: OUTPUT_FILE_DASHBOARD in DATA_DIR)")
+    parser.add_argument("--profile", choices=list(OUTPUT_PROFILES), default="preview")
+    parser.add_argument("--format", choices=OUTPUT_FORMATS, help="override the profile's image format")
+    parser.add_argument("--tiles", help="also keep each panel as its own image in this directory")
+    parser.add_argument("--no-render", action="store_true", help="only update the metrics (latency measurement)")
+    parser.add_argument("--latency", help="write per-update latencies and their summary to this JSON file")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+        data_dir = config["MATCH_SETTINGS"]["DATA_DIR"]
+        xT_grid = load_xt_grid(args.xt_grid or xt_grid_file(args.replay or data_dir))
+        if args.replay:
+            source = ReplaySource(args.replay, args.batch_size)
+        else:
+            source = WhoScoredSource(args.url or config["MATCH_SETTINGS"]["WHOSCORED_URL"], make_backend(args.backend, args.html_dir))
+    except (OSError, KeyError, ValueError) as e:
+        print(f"FATAL ERROR: Configuration or Data loading failed. Check config.json and data files. Error: {e}")
+        return 1
+
+    settings = output_settings(args.profile, args.format)
+    output = args.output or output_path_for(os.path.join(args.replay or data_dir, config["MATCH_SETTINGS"]["OUTPUT_FILE_DASHBOARD"]), settings)
+    dashboard = None if args.no_render else LiveDashboard(config, output, settings, args.tiles)
+    interval = args.interval if args.interval is not None else (0 if args.replay else DEFAULT_POLL_INTERVAL)
+    try:
+        live, updates = run_live(source, xT_grid, config, dashboard, interval)
+    except KeyboardInterrupt:
+        print("Stopped.")
+        return 0
+    finally:
+        if isinstance(source, WhoScoredSource):
+            source.backend.close()
+
+    summary = latency_summary(updates)
+    print(f"{live.n_events} events in {summary['updates']} updates; metric update p50 {summary['update_ms'].get('p50', 0):.1f} ms, "
+          f"p95 {summary['update_ms'].get('p95', 0):.1f} ms"
+          + (f"; render p50 {summary['render_ms']['p50']:.0f} ms, p95 {summary['render_ms']['p95']:.0f} ms, "
+             f"{summary['panels_per_render']:.1f} panels per render" if summary['render_ms'] else ""))
+    if args.latency:
+        with open(args.latency, "w") as f:
+            json.dump({'summary': summary, 'updates': updates}, f, indent=4)
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
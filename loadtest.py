@@ -0,0 +1,153 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+import numpy as np
+
+from dashboard import PANEL_LAYOUT, load_config
+from synthetic import write_synthetic_season
+
+PALETTE = ['#EF0107', '#43A1D5', '#000000', '#FFD700']
+STARTUP_TIMEOUT = 60
+
+def request(base_url, params):
+    """GETs ``/render`` and returns ``(latency_s, match_cache, bytes)``."""
+    start = time.perf_counter()
+    with urlopen(f"{base_url}/render?{urlencode(params)}") as response:
+        body = response.read()
+        return time.perf_counter() - start, response.headers.get('X-Match-Cache'), len(body)
+
+def random_params(rng, match, full_share, profile):
+    """A request for ``match`` in one of a few team colors, for one to three panels or,
+    with chance ``full_share``, the full dashboard."""
+    params = {'match': match, 'profile': profile, 'home_color': PALETTE[rng.integers(len(PALETTE))]}
+    if rng.random() >= full_share:
+        params['panels'] = ','.join(rng.choice(PANEL_LAYOUT, rng.integers(1, 4), replace=False))
+    return params
+
+def latency_stats(latencies):
+    ms = np.asarray(latencies) * 1000
+    if len(ms) == 0:
+        return {'count': 0}
+    return {'count': len(ms), 'p50': round(float(np.percentile(ms, 50)), 1), 'p99': round(float(np.percentile(ms, 99)), 1),
+            'mean': round(float(ms.mean()), 1), 'max': round(float(ms.max()), 1)}
+
+def _run(base_url, jobs, concurrency):
+    latencies, errors = {'hit': [], 'miss': []}, 0
+    with ThreadPoolExecutor(concurrency) as pool:
+        for future in [pool.submit(request, base_url, params) for params in jobs]:
+            try:
+                latency, match_cache, _ = future.result()
+            except (HTTPError, OSError):
+                errors += 1
+                continue
+            latencies['hit' if match_cache == 'hit' else 'miss'].append(latency)
+    return latencies, errors
+
+def _health(base_url):
+    with urlopen(f"{base_url}/health") as response:
+        return json.load(response)
+
+def run_load(base_url, matches, n_requests=100, concurrency=4, full_share=0.1, profile='preview', seed=0):
+    """Four phases against a service that has not loaded ``matches`` yet:
+
+    - cold: every match once, one request at a time (each loads its match)
+    - warm: ``n_requests`` random panel and dashboard requests, one at a time
+    - concurrent: the same mix from ``concurrency`` threads, for throughput
+    - burst: ``concurrency`` identical requests at once, which the service coalesces
+
+    Returns latency stats per phase and the service's ``/health`` counters.
+    """
+    rng = np.random.default_rng(seed)
+    phases = {
+        'cold': ([random_params(rng, match, full_share, profile) for match in matches], 1),
+        'warm': ([random_params(rng, matches[rng.integers(len(matches))], full_share, profile) for _ in range(n_requests)], 1),
+        'concurrent': ([random_params(rng, matches[rng.integers(len(matches))], full_share, profile) for _ in range(n_requests)], concurrency),
+        'burst': ([random_params(rng, matches[0], 0, profile)] * concurrency, concurrency),
+    }
+    results, errors = {}, 0
+    for name, (jobs, threads) in phases.items():
+        coalesced = _health(base_url)['coalesced']
+        start = time.perf_counter()
+        latencies, failed = _run(base_url, jobs, threads)
+        elapsed = time.perf_counter() - start
+        errors += failed
+        results[name] = {**latency_stats(latencies['miss'] if name == 'cold' else latencies['hit'] + latencies['miss']),
+                         'throughput_rps': round(len(jobs) / elapsed, 2), 'coalesced': _health(base_url)['coalesced'] - coalesced}
+    return {'phases': results, 'errors': errors, 'service': _health(base_url)}
+
+def start_service(config_path, data_dir, workers, extra_args=()):
+    """Starts ``service.py`` on a free localhost port and returns ``(process, base_url)``."""
+    process = subprocess.Popen(
+        [sys.executable, 'service.py', '--config', config_path, '--data-dir', data_dir, '--port', '0', '--workers', str(workers), *extra_args],
+        stdout=subprocess.PIPE, text=True, env={**os.environ, 'MPLBACKEND': 'Agg'}, cwd=os.path.dirname(os.path.abspath(__file__)),
+    )
+    deadline = time.time() + STARTUP_TIMEOUT
+    while time.time() < deadline:
+        line = process.stdout.readline()
+        if not line:
+            break
+        if line.startswith("Serving"):
+            return process, line.split(" on ")[1].split()[0]
+    process.kill()
+    raise RuntimeError(f"service.py did not start: {process.stdout.read()}")
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Load-test the render service and report cold vs warm latency.")
+    parser.add_argument("--url", help="a running service, e.g. http://127.0.0.1:8050 (default: start one on synthetic matches)")
+    parser.add_argument("--match-ids", nargs="+", help="matches to request from --url")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--matches", type=int, default=6, help="synthetic matches to serve without --url")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="render workers of the started service")
+    parser.add_argument("--requests", type=int, default=100, help="requests in the warm and in the concurrent phase")
+    parser.add_argument("--concurrency", type=int, default=4, help="client threads")
+    parser.add_argument("--full-share", type=float, default=0.1, help="share of warm requests for the full dashboard")
+    parser.add_argument("--profile", default="preview")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", help="write the results to this file")
+    args = parser.parse_args(argv)
+
+    if args.url and not args.match_ids:
+        parser.error("--url needs --match-ids")
+    try:
+        with tempfile.TemporaryDirectory() as root:
+            process = None
+            if args.url:
+                base_url, matches = args.url.rstrip('/'), args.match_ids
+            else:
+                config = load_config(args.config)
+                match_ids = write_synthetic_season(root, np.zeros((12, 16)), args.matches, seed=args.seed)
+                config_path = os.path.join(root, "config.json")
+                with open(config_path, "w") as f:
+                    json.dump({**config, 'MATCH_SETTINGS': {**config['MATCH_SETTINGS'], 'DATA_DIR': root}}, f)
+                process, base_url = start_service(config_path, root, args.workers, ['--no-cache'])
+                matches = [str(match_id) for match_id in match_ids]
+            try:
+                results = run_load(base_url, matches, args.requests, args.concurrency, args.full_share, args.profile, args.seed)
+            finally:
+                if process is not None:
+                    process.terminate()
+                    process.wait()
+    except (OSError, KeyError, ValueError, RuntimeError) as e:
+        print(f"FATAL ERROR: Load test failed. Error: {e}")
+        return 1
+
+    for name, stats in results['phases'].items():
+        if stats['count']:
+            print(f"{name:>10}: {stats['count']:>4} requests, p50 {stats['p50']:>6.0f} ms, p99 {stats['p99']:>6.0f} ms, "
+                  f"{stats['throughput_rps']:5.1f} req/s, {stats['coalesced']} coalesced")
+    print(f"{results['errors']} errors; match cache {results['service']['matches']}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=4)
+    return 1 if results['errors'] else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,219 +1,346 @@
 import numpy as np
 import pandas as pd
 
-def prepare_enhanced_passes(df_events):
-    passes = df_events[
-        (df_events['type_display_name'] == 'Pass') &
-        (df_events['outcome_type_display_name'] == 'Successful')
-    ].copy()
+from profiling import traced
+from zones import DEFENSIVE_THIRD, MIDDLE_THIRD, FINAL_THIRD, THIRD_LINES, N_LANES, X_SCALE, Y_SCALE, ZONE_14, third, xt_cell, zone_counts
 
-    passes['x'] = passes['x'] * 1.2
-    passes['y'] = passes['y'] * 0.8
-    passes['end_x'] = passes['end_x'] * 1.2
-    passes['end_y'] = passes['end_y'] * 0.8
-
-    passes['pass_angle'] = np.degrees(np.arctan2(passes['end_y'] - passes['y'], passes['end_x'] - passes['x']))
-    passes['pass_angle_abs'] = np.abs(passes['pass_angle'])
-    
-    passes['receiver'] = passes['player_id'].shift(-1).astype('Int64')
-    
-    return passes
-
-def get_pass_combinations(passes_df, team_id):
-    team_passes = passes_df[passes_df['team_id'] == team_id].copy()
-    
+RECOVERY_TYPES = ['BallRecovery', 'Interception', 'Tackle']
+# Unsuccessful events of these types, and every Foul, count as turnovers.
+TURNOVER_TYPES = ['Pass', 'Dribble', 'Challenge']
+XT_ACTION_TYPES = ['Pass', 'Carry']
+SHOT_TYPES = ['Goal', 'SavedShot', 'MissedShots', 'ShotOnPost']
+
+@traced()
+def get_pass_combinations(ctx, team_id):
+    team_passes = ctx.team_passes(team_id)
     team_passes = team_passes[team_passes['receiver'].notna() & team_passes['player_id'].notna()]
 
-    team_passes['pos_min'] = team_passes[['player_id', 'receiver']].min(axis=1)
-    team_passes['pos_max'] = team_passes[['player_id', 'receiver']].max(axis=1)
-    
-    pass_combinations = team_passes.groupby(['pos_min', 'pos_max']).size().reset_index(name='pass_count')
-    
+    pair = team_passes[['player_id', 'receiver']]
+    pass_combinations = pair.groupby([pair.min(axis=1).rename('pos_min'), pair.max(axis=1).rename('pos_max')]).size().reset_index(name='pass_count')
+
     return pass_combinations
 
-def get_enhanced_positions(passes_df, team_id, team_players, player_names_dict):
-    team_passes = passes_df[passes_df['team_id'] == team_id]
-    
-    avg_locs = team_passes.groupby('player_id').agg({
-        'x': 'median',  
-        'y': 'median',  
-        'player_id': 'count'
-    }).rename(columns={'x': 'x_avg', 'y': 'y_avg', 'player_id': 'pass_count'})
-    
-    player_info = {}
-    for player in team_players:
-        player_id = player['playerId']
-        player_info[player_id] = {
-            'name': player_names_dict.get(str(player_id), player['name']),
-            'shirtNo': player['shirtNo'],
-            'position': player['position'],
-            'isFirstEleven': player.get('isFirstEleven', False)
-        }
-        
-    player_df = pd.DataFrame.from_dict(player_info, orient='index')
-    avg_locs = avg_locs.join(player_df)
-    
-    return avg_locs[avg_locs['isFirstEleven'] == True] 
-
-def calculate_team_metrics(passes_df, avg_locs, team_id):
-    team_passes = passes_df[passes_df['team_id'] == team_id]
-    
+def _team_pass_locations(ctx, team_id):
+    locations = ctx.pass_locations
+    if team_id not in locations.index.get_level_values('team_id'):
+        return locations.iloc[:0].droplevel('team_id')
+    return locations.xs(team_id, level='team_id')
+
+@traced()
+def get_enhanced_positions(ctx, team_id):
+    avg_locs = _team_pass_locations(ctx, team_id)
+    return avg_locs[avg_locs['isFirstEleven'] == True]
+
+def _verticality(ctx, team_id):
+    team_passes = ctx.team_passes(team_id)
     valid_passes = team_passes[(team_passes['pass_angle_abs'] >= 0) & (team_passes['pass_angle_abs'] <= 90)]
-    median_angle = valid_passes['pass_angle_abs'].median()
-    verticality = round((1 - median_angle/90) * 100, 2)
-    
+    return verticality_score(valid_passes['pass_angle_abs'].median())
+
+def verticality_score(median_angle):
+    """Verticality in percent from the median absolute angle of forward passes."""
+    return round((1 - median_angle/90) * 100, 2)
+
+@traced()
+def calculate_team_metrics(ctx, avg_locs, team_id, verticality=None):
     team_median = avg_locs['x_avg'].median()
-    
+
     center_backs = avg_locs[avg_locs['position'] == 'DC']
     defense_line = center_backs['x_avg'].median() if len(center_backs) > 0 else avg_locs['x_avg'].min()
 
     attackers = avg_locs[avg_locs['position'].isin(['FW', 'AMC', 'AML', 'AMR'])]
     forward_line = attackers['x_avg'].mean() if len(attackers) > 0 else avg_locs['x_avg'].max()
-    
+
     return {
-        'verticality': verticality,
+        'verticality': _verticality(ctx, team_id) if verticality is None else verticality,
         'defense_line': defense_line,
         'forward_line': forward_line,
         'team_median': team_median
     }
 
-def get_enhanced_positions_all(passes_df, team_id, team_players, player_names_dict):
-    team_passes = passes_df[passes_df['team_id'] == team_id]
-    
-    avg_locs = team_passes.groupby('player_id').agg({
-        'x': 'median',  
-        'y': 'median',  
-        'player_id': 'count'
-    }).rename(columns={'x': 'x_avg', 'y': 'y_avg', 'player_id': 'pass_count'})
-    
-    player_info = {}
-    for player in team_players:
-        player_id = player['playerId']
-        player_info[player_id] = {
-            'name': player_names_dict.get(str(player_id), player['name']),
-            'shirtNo': player['shirtNo'],
-            'position': player['position'],
-            'isFirstEleven': player.get('isFirstEleven', False)
-        }
-        
-    player_df = pd.DataFrame.from_dict(player_info, orient='index')
-    avg_locs = avg_locs.join(player_df)
-    
+@traced()
+def get_enhanced_positions_all(ctx, team_id):
+    avg_locs = _team_pass_locations(ctx, team_id)
     return avg_locs[avg_locs['pass_count'] > 0]
 
-
-def calculate_team_metrics_all(passes_df, avg_locs_all, team_id):
-    team_passes = passes_df[passes_df['team_id'] == team_id]
-    
-    valid_passes = team_passes[(team_passes['pass_angle_abs'] >= 0) & (team_passes['pass_angle_abs'] <= 90)]
-    median_angle = valid_passes['pass_angle_abs'].median()
-    verticality = round((1 - median_angle/90) * 100, 2)
-    
-    team_median = avg_locs_all['x_avg'].median()
-    
-    defense_line = avg_locs_all['x_avg'].min() 
-    forward_line = avg_locs_all['x_avg'].max()
-    
+@traced()
+def calculate_team_metrics_all(ctx, avg_locs_all, team_id, verticality=None):
     return {
-        'verticality': verticality,
-        'defense_line': defense_line,
-        'forward_line': forward_line,
-        'team_median': team_median
+        'verticality': _verticality(ctx, team_id) if verticality is None else verticality,
+        'defense_line': avg_locs_all['x_avg'].min(),
+        'forward_line': avg_locs_all['x_avg'].max(),
+        'team_median': avg_locs_all['x_avg'].median()
     }
 
-def filter_defensive_actions(df_events: pd.DataFrame) -> pd.DataFrame:
-    defensive_types = ['Tackle', 'Interception', 'BallRecovery', 'BlockedPass', 'Challenge', 'Clearance', 'Foul', 'Aerial']
-    
-    defensive_actions = df_events[df_events['type_display_name'].isin(defensive_types)].copy()
-    
-    defensive_actions['x_sb'] = defensive_actions['x'] * 1.2
-    defensive_actions['y_sb'] = defensive_actions['y'] * 0.8
-    
-    return defensive_actions
-
-def calculate_player_defensive_positions(defensive_actions: pd.DataFrame, team_id: int, team_players: list) -> dict:
-    team_actions = defensive_actions[defensive_actions['team_id'] == team_id]
+@traced()
+def calculate_player_defensive_positions(ctx, team_id: int) -> dict:
+    team_actions = ctx.team_defensive_actions(team_id)
     if len(team_actions) == 0: return {}
-    
-    player_info = {p['playerId']: {'name': p['name'], 'position': p['position'], 
-                                   'shirtNo': p['shirtNo'], 
-                                   'is_starter': p.get('isFirstEleven', False)} for p in team_players}
-    
-    player_stats = (
-        team_actions.groupby('player_id')
-        .agg({'x_sb': 'median', 'y_sb': 'median', 'id': 'count'})
-        .rename(columns={'id': 'action_count'})
-    )
-    
-    positions = {}
-    for player_id, stats in player_stats.iterrows():
-        if player_id in player_info and player_info[player_id]['is_starter']:
-            positions[player_id] = {
-                'x': stats['x_sb'],
-                'y': stats['y_sb'],
-                'action_count': stats['action_count'],
-                **player_info[player_id]
-            }
-    return positions
-
-def calculate_match_stats(df, hteam_id, ateam_id):
-    stats = {}
-    
-    home_passes = df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Pass')]
-    away_passes = df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Pass')] 
-    total_passes = len(home_passes) + len(away_passes)
-    stats['Possession'] = {'home': round((len(home_passes) / total_passes) * 100, 2) if total_passes else 0,
-                           'away': round((len(away_passes) / total_passes) * 100, 2) if total_passes else 0}
-    
-    home_touches = df[(df['team_id'] == hteam_id) & (df['is_touch'] == True) & (df['x'] >= 70)]
-    away_touches = df[(df['team_id'] == ateam_id) & (df['is_touch'] == True) & (df['x'] >= 70)] 
-    total_touches = len(home_touches) + len(away_touches)
-    stats['Field Tilt'] = {'home': round((len(home_touches) / total_touches) * 100, 2) if total_touches else 0,
-                           'away': round((len(away_touches) / total_touches) * 100, 2) if total_touches else 0}
-    
-    home_def_actions = df[(df['team_id'] == hteam_id) & (df['type_display_name'].isin(['Interception', 'Tackle', 'Foul', 'Challenge'])) & (df['x'] > 35)]
-    away_def_actions = df[(df['team_id'] == ateam_id) & (df['type_display_name'].isin(['Interception', 'Tackle', 'Foul', 'Challenge'])) & (df['x'] > 35)]
-    home_passes_ppda = df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Pass') & (df['outcome_type_display_name'] == 'Successful') & (df['x'] < 70)]
-    away_passes_ppda = df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Pass') & (df['outcome_type_display_name'] == 'Successful') & (df['x'] < 70)]
-    
-    stats['PPDA'] = {'home': round(len(away_passes_ppda) / len(home_def_actions), 2) if len(home_def_actions) > 0 else 0,
-                     'away': round(len(home_passes_ppda) / len(away_def_actions), 2) if len(away_def_actions) > 0 else 0}
-
-    stats['Tackles (Wins)'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Tackle') & (df['outcome_type_display_name'] == 'Successful')]),
-                               'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Tackle') & (df['outcome_type_display_name'] == 'Successful')])}
-    stats['Interceptions'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Interception')]),
-                              'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Interception')])}
-    stats['Clearance'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Clearance')]),
-                          'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Clearance')])}
-    stats['Aerials (Wins)'] = {'home': len(df[(df['team_id'] == hteam_id) & (df['type_display_name'] == 'Aerial') & (df['outcome_type_display_name'] == 'Successful')]),
-                               'away': len(df[(df['team_id'] == ateam_id) & (df['type_display_name'] == 'Aerial') & (df['outcome_type_display_name'] == 'Successful')])}
-    return stats
-
-def get_half_pass_map(df_events: pd.DataFrame, team_id: int):
-    passes_df = prepare_enhanced_passes(df_events)
-    team_passes = passes_df[passes_df['team_id'] == team_id].copy()
-    attacking_half_passes = team_passes[(team_passes['x'] >= 60) & (team_passes['end_x'] >= 60)].copy()
-    total_passes = len(attacking_half_passes)
-    if total_passes > 0:
-        plot_df = attacking_half_passes[['x', 'y', 'end_x', 'end_y', 'minute']].copy()
-    else:
-        plot_df = pd.DataFrame(columns=['x', 'y', 'end_x', 'end_y', 'minute'])
-    return plot_df, {}
 
-def get_ball_recovery_turnover(df_events: pd.DataFrame, team_id: int):
-    recoveries = df_events[
-        (df_events['team_id'] == team_id) & 
-        (df_events['type_display_name'].isin(['BallRecovery', 'Interception', 'Tackle'])) &
+    player_stats = team_actions.groupby('player_id').agg(x=('x_sb', 'median'), y=('y_sb', 'median'), action_count=('id', 'count'))
+    roster = ctx.team_roster(team_id).drop(columns='name').rename(columns={'lineup_name': 'name'})
+    starters = player_stats.join(roster, how='inner')
+    starters = starters[starters['isFirstEleven'] == True].rename(columns={'isFirstEleven': 'is_starter'})
+    return starters[['x', 'y', 'action_count', 'name', 'position', 'shirtNo', 'is_starter']].to_dict('index')
+
+# Each stat is computed from the team x type x outcome x third count cube.
+# 'count' reports the team's own count, 'share' its percentage of both teams'
+# counts, and 'opponent_ratio' divides the opponent's 'numerator' count by the
+# team's own 'denominator' count (e.g. PPDA).
+MATCH_STAT_SPECS = {
+    'Possession': {'kind': 'share', 'filter': {'type': ['Pass']}},
+    'Field Tilt': {'kind': 'share', 'filter': {'is_touch': True, 'third': [FINAL_THIRD]}},
+    'PPDA': {'kind': 'opponent_ratio',
+             'numerator': {'type': ['Pass'], 'outcome': ['Successful'], 'third': [DEFENSIVE_THIRD, MIDDLE_THIRD]},
+             'denominator': {'type': ['Interception', 'Tackle', 'Foul', 'Challenge'], 'third': [MIDDLE_THIRD, FINAL_THIRD]}},
+    'Tackles (Wins)': {'kind': 'count', 'filter': {'type': ['Tackle'], 'outcome': ['Successful']}},
+    'Interceptions': {'kind': 'count', 'filter': {'type': ['Interception']}},
+    'Clearance': {'kind': 'count', 'filter': {'type': ['Clearance']}},
+    'Aerials (Wins)': {'kind': 'count', 'filter': {'type': ['Aerial'], 'outcome': ['Successful']}},
+}
+
+def build_event_count_cube(df: pd.DataFrame, match_ids=None) -> pd.DataFrame:
+    """Counts events per match x team x type x outcome x touch x third cell in one pass.
+    Uses the ``third`` column of the spatial index when ``df`` has one."""
+    keys = {
+        'match_id': df['match_id'].values if match_ids is None else match_ids,
+        'team_id': df['team_id'].values,
+        'type': df['type_display_name'].values,
+        'outcome': df['outcome_type_display_name'].values,
+        'is_touch': (df['is_touch'] == True).values,
+        'third': df['third'].values if 'third' in df else third(df['x'].to_numpy()),
+    }
+
+    codes, uniques = zip(*(pd.factorize(values, use_na_sentinel=False) for values in keys.values()))
+    shape = [max(len(u), 1) for u in uniques]
+    cells, counts = np.unique(np.ravel_multi_index(codes, shape), return_counts=True)
+    cube = pd.DataFrame({key: u[c] for key, u, c in zip(keys, uniques, np.unravel_index(cells, shape))})
+    cube['count'] = counts
+    return cube
+
+def calculate_match_stats_by_match(df: pd.DataFrame, team_ids: dict, match_ids=None) -> dict:
+    """Returns ``{match_id: stats}`` for every ``match_id: (home_id, away_id)`` in ``team_ids``."""
+    return match_stats_from_cube(build_event_count_cube(df, match_ids), team_ids)
+
+def match_stats_from_cube(cube: pd.DataFrame, team_ids: dict) -> dict:
+    """``calculate_match_stats_by_match`` on a count cube, e.g. one summed over event batches."""
+    matches = list(team_ids)
+    match_pos = pd.Index(matches).get_indexer(cube['match_id'])
+    home_ids = np.array([team_ids[m][0] for m in matches] + [None])[match_pos]
+    away_ids = np.array([team_ids[m][1] for m in matches] + [None])[match_pos]
+    side = np.where(cube['team_id'].values == home_ids, 0, np.where(cube['team_id'].values == away_ids, 1, -1))
+    in_match = (match_pos >= 0) & (side >= 0)
+    slot = match_pos * 2 + side
+
+    def counts(filters):
+        mask = in_match.copy()
+        for key, value in filters.items():
+            mask &= cube[key].isin(value).values if isinstance(value, list) else (cube[key] == value).values
+        totals = np.bincount(slot[mask], weights=cube['count'].values[mask], minlength=2 * len(matches))
+        return totals.astype(int).reshape(-1, 2).tolist()
+
+    columns = {}
+    for name, spec in MATCH_STAT_SPECS.items():
+        if spec['kind'] == 'opponent_ratio':
+            columns[name] = [(round(an / hd, 2) if hd > 0 else 0, round(hn / ad, 2) if ad > 0 else 0)
+                             for (hn, an), (hd, ad) in zip(counts(spec['numerator']), counts(spec['denominator']))]
+        elif spec['kind'] == 'share':
+            columns[name] = [(round((h / (h + a)) * 100, 2), round((a / (h + a)) * 100, 2)) if h + a else (0, 0)
+                             for h, a in counts(spec['filter'])]
+        else:
+            columns[name] = [tuple(pair) for pair in counts(spec['filter'])]
+
+    return {
+        match_id: {name: {'home': values[i][0], 'away': values[i][1]} for name, values in columns.items()}
+        for i, match_id in enumerate(matches)
+    }
+
+@traced()
+def calculate_match_stats(ctx):
+    df = ctx.events
+    return calculate_match_stats_by_match(df, {0: ctx.team_ids}, match_ids=np.zeros(len(df), dtype=int))[0]
+
+@traced()
+def get_half_pass_map(ctx, team_id: int):
+    team_passes = ctx.team_passes(team_id)
+    attacking_half_passes = team_passes[(team_passes['half'] == 1) & (team_passes['end_half'] == 1)]
+    return attacking_half_passes[['x', 'y', 'end_x', 'end_y', 'minute']], {}
+
+@traced()
+def get_ball_recovery_turnover(ctx, team_id: int):
+    team_events = ctx.team_events(team_id)
+    recoveries = team_events[
+        (team_events['type_display_name'].isin(RECOVERY_TYPES)) &
+        (team_events['outcome_type_display_name'] == 'Successful')
+    ]
+    turnovers = team_events[
+        (team_events['type_display_name'].isin(TURNOVER_TYPES) & (team_events['outcome_type_display_name'] == 'Unsuccessful')) |
+        (team_events['type_display_name'] == 'Foul')
+    ]
+    plot_df = pd.concat([
+        recoveries[['x_sb', 'y_sb', 'minute']].assign(action_type='Recovery'),
+        turnovers[['x_sb', 'y_sb', 'minute']].assign(action_type='Turnover'),
+    ])
+    return plot_df[['x_sb', 'y_sb', 'action_type', 'minute']]
+
+@traced()
+def get_progressive_passes(ctx, team_id: int):
+    team_events = ctx.team_events(team_id)
+    return team_events[
+        (team_events['type_display_name'] == 'Pass') &
+        (team_events['outcome_type_display_name'] == 'Successful') &
+        ~(team_events['is_corner'] | team_events['is_freekick']) &
+        # From the 35 line on; ``third`` keeps x = 35 in the defensive third, as PPDA counts it.
+        (team_events['x'] >= THIRD_LINES[0]) &
+        (team_events['prog_pass'] >= 9.11)
+    ]
+
+@traced()
+def get_zone_entries(ctx, team_id: int) -> dict:
+    """Successful passes and carries into the final third from outside it, per lane of
+    their end location, and into zone 14 from any other zone."""
+    team_events = ctx.team_events(team_id)
+    moves = team_events[
+        (team_events['type_display_name'].isin(XT_ACTION_TYPES)) &
+        (team_events['outcome_type_display_name'] == 'Successful')
+    ]
+    entries = moves[moves['third'].isin([DEFENSIVE_THIRD, MIDDLE_THIRD]) & (moves['end_third'] == FINAL_THIRD)]
+    return {
+        'final_third_entries': zone_counts(entries['end_lane'], N_LANES).tolist(),
+        'zone_14_entries': int(((moves['zone'] != ZONE_14) & (moves['end_zone'] == ZONE_14)).sum()),
+    }
+
+@traced()
+def calculate_xt(df_events: pd.DataFrame, xT_grid: np.ndarray, clip_max: float = 0.1) -> pd.DataFrame:
+    """Values every successful Pass/Carry by the xT gained between its start and end cell.
+
+    Works on any number of matches at once; the grid is indexed with the cells of all
+    actions in a single fancy-indexing step. The cells come from the spatial index when
+    ``df_events`` has one for this grid's shape (``MatchContext.events``).
+    """
+    actions = df_events[
+        (df_events['type_display_name'].isin(XT_ACTION_TYPES)) &
         (df_events['outcome_type_display_name'] == 'Successful')
     ].copy()
-    turnovers = df_events[
-        (df_events['team_id'] == team_id) & 
-        (
-            (df_events['type_display_name'].isin(['Pass', 'Dribble', 'Challenge']) & (df_events['outcome_type_display_name'] == 'Unsuccessful')) |
-            (df_events['type_display_name'] == 'Foul') 
-        )
-    ].copy()
-    recoveries['x_sb'] = recoveries['x'] * 1.2; recoveries['y_sb'] = recoveries['y'] * 0.8; recoveries['action_type'] = 'Recovery'
-    turnovers['x_sb'] = turnovers['x'] * 1.2; turnovers['y_sb'] = turnovers['y'] * 0.8; turnovers['action_type'] = 'Turnover'
-    plot_df = pd.concat([recoveries[['x_sb', 'y_sb', 'action_type', 'minute']], turnovers[['x_sb', 'y_sb', 'action_type', 'minute']]])
-    return plot_df
\ No newline at end of file
+
+    values = xT_grid.ravel()
+    actions['xT'] = values[_xt_cells(actions, xT_grid.shape, 'end_')] - values[_xt_cells(actions, xT_grid.shape)]
+    actions['xT_clipped'] = np.clip(actions['xT'], 0, clip_max)
+    return actions
+
+def _xt_cells(df_events, shape, prefix=''):
+    """xT cells of the start (or ``end_``) locations, from the spatial index when it was
+    built for this grid shape."""
+    if df_events.attrs.get('xt_shape') == shape:
+        return df_events[f'{prefix}xt_cell'].to_numpy()
+    return xt_cell(df_events[f'{prefix}x'].to_numpy() * X_SCALE, df_events[f'{prefix}y'].to_numpy() * Y_SCALE, *shape)
+
+@traced()
+def fit_xt_grid(df_events: pd.DataFrame, n_rows: int = 12, n_cols: int = 16, tol: float = 1e-6, max_iter: int = 1000):
+    """Learns an expected-threat grid from any number of matches. Returns ``(grid, iterations)``.
+
+    Per zone, the shot and move probabilities and the goal rate of shots are counted with
+    ``np.bincount`` and successful moves give a sparse zone-to-zone transition matrix;
+    ``xT = P(shot) * P(goal) + P(move) * T @ xT`` is then iterated until no zone changes by
+    more than ``tol``. Zones are binned exactly as ``calculate_xt`` looks them up.
+    """
+    from scipy import sparse
+    n_zones = n_rows * n_cols
+    types = df_events['type_display_name']
+    is_move = types.isin(XT_ACTION_TYPES).to_numpy()
+    is_shot = types.isin(SHOT_TYPES).to_numpy()
+    is_goal = (types == 'Goal').to_numpy()
+    zone = _xt_cells(df_events, (n_rows, n_cols))
+
+    moves = zone_counts(zone[is_move], n_zones)
+    shots = zone_counts(zone[is_shot], n_zones)
+    goals = zone_counts(zone[is_goal], n_zones)
+    actions = moves + shots
+    move_prob = np.divide(moves, actions, out=np.zeros(n_zones), where=actions > 0)
+    shot_prob = np.divide(shots, actions, out=np.zeros(n_zones), where=actions > 0)
+    goal_prob = np.divide(goals, shots, out=np.zeros(n_zones), where=shots > 0)
+
+    # A failed move loses the ball, so its share of a zone's moves leads nowhere.
+    done = is_move & (df_events['outcome_type_display_name'] == 'Successful').to_numpy()
+    end_zone = _xt_cells(df_events, (n_rows, n_cols), 'end_')[done]
+    counts = sparse.csr_matrix((np.ones(len(end_zone)), (zone[done], end_zone)), shape=(n_zones, n_zones))
+    transitions = sparse.diags(np.divide(1.0, moves, out=np.zeros(n_zones), where=moves > 0)) @ counts
+
+    scoring = shot_prob * goal_prob
+    xt = np.zeros(n_zones)
+    for iteration in range(1, max_iter + 1):
+        updated = scoring + move_prob * (transitions @ xt)
+        converged = np.abs(updated - xt).max() < tol
+        xt = updated
+        if converged:
+            break
+    return xt.reshape(n_rows, n_cols), iteration
+
+def _gaussian_smooth(values, sigma, truncate=4.0):
+    if sigma <= 0 or len(values) == 0:
+        return np.asarray(values, dtype=float)
+    radius = int(truncate * sigma + 0.5)
+    offsets = np.arange(-radius, radius + 1)
+    kernel = np.exp(-0.5 * (offsets / sigma) ** 2)
+    kernel /= kernel.sum()
+    padded = np.pad(np.asarray(values, dtype=float), radius, mode='symmetric')
+    return np.convolve(padded, kernel, mode='valid')
+
+@traced()
+def compute_xt_momentum(df_xT: pd.DataFrame, team_ids, window: int = 4, decay: float = 0.25, sigma: float = 1.0) -> pd.DataFrame:
+    """Decayed xT momentum (home minus away) for every minute with xT activity.
+
+    ``df_xT`` is the output of ``calculate_xt``. ``team_ids`` is a ``(home_id, away_id)``
+    tuple for a single match, or a ``{match_id: (home_id, away_id)}`` dict to compute
+    many matches in one call. Each minute sums the per-minute max xT of the last
+    ``window`` minutes weighted by ``exp(-decay * lag)``; the series is then Gaussian
+    smoothed with ``sigma``.
+    """
+    if isinstance(team_ids, dict):
+        match_ids = df_xT['match_id'].values
+    else:
+        team_ids = {0: tuple(team_ids)}
+        match_ids = np.zeros(len(df_xT), dtype=int)
+
+    home_ids = pd.Series({m: t[0] for m, t in team_ids.items()}).reindex(match_ids).values
+    away_ids = pd.Series({m: t[1] for m, t in team_ids.items()}).reindex(match_ids).values
+    team_col = df_xT['team_id'].values
+    side = np.where(team_col == home_ids, 0, np.where(team_col == away_ids, 1, -1))
+    keep = side >= 0
+
+    match_codes, match_index = pd.factorize(match_ids[keep])
+    minutes = df_xT['minute'].values[keep].astype(int)
+    side = side[keep]
+    n_minutes = minutes.max() + 1 if len(minutes) else 0
+    per_minute = np.zeros((len(match_index), 2, n_minutes))
+    np.maximum.at(per_minute, (match_codes, side, minutes), df_xT['xT_clipped'].values[keep])
+    observed = np.zeros((len(match_index), n_minutes), dtype=bool)
+    observed[match_codes, minutes] = True
+    return momentum_from_minutes(per_minute, observed, match_index, window, decay, sigma)
+
+def momentum_from_minutes(per_minute, observed, match_index, window=4, decay=0.25, sigma=1.0) -> pd.DataFrame:
+    """The ``compute_xt_momentum`` frame from per-minute maxima: ``per_minute[match, side, minute]``
+    is the largest clipped xT of that side in that minute and ``observed[match, minute]``
+    marks minutes with any xT action."""
+    columns = ['match_id', 'minute', 'home_xT', 'away_xT', 'momentum', 'momentum_smoothed']
+    if not observed.any():
+        return pd.DataFrame(columns=columns)
+
+    n_minutes = per_minute.shape[-1]
+    weighted = np.zeros_like(per_minute)
+    # Lags past the last observed minute add nothing (and would not broadcast).
+    for lag, weight in enumerate(np.exp(-decay * np.arange(min(window, n_minutes)))):
+        weighted[..., lag:] += weight * per_minute[..., :n_minutes - lag]
+
+    row_match, row_minute = np.nonzero(observed)
+    momentum = pd.DataFrame({
+        'match_id': match_index[row_match],
+        'minute': row_minute,
+        'home_xT': weighted[row_match, 0, row_minute],
+        'away_xT': weighted[row_match, 1, row_minute],
+    })
+    momentum['momentum'] = momentum['home_xT'] - momentum['away_xT']
+    bounds = np.flatnonzero(np.diff(row_match)) + 1
+    momentum['momentum_smoothed'] = np.concatenate(
+        [_gaussian_smooth(chunk, sigma) for chunk in np.split(momentum['momentum'].values, bounds)]
+    )
+    return momentum[columns]
@@ -0,0 +1,170 @@
+import json
+import os
+import sys
+import threading
+import time
+from contextlib import nullcontext
+from functools import wraps
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# The active Tracer, or None. Spans check this first, so disabled tracing costs one
+# global lookup per span.
+_tracer = None
+_DISABLED = nullcontext()
+
+def peak_rss():
+    """Peak resident set size of this process in bytes (None where unsupported)."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and kilobytes on Linux
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+class _Span:
+    __slots__ = ('tracer', 'name', 'cat', 'profile', 'args', 'start', 'cpu_start', 'rss_start', 'profiler')
+
+    def __init__(self, tracer, name, cat, profile, args):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.profile = profile and tracer.profile_dir is not None
+        self.args = args
+
+    def __enter__(self):
+        if self.profile:
+            import cProfile
+            self.profiler = cProfile.Profile()
+            self.profiler.enable()
+        self.rss_start = peak_rss()
+        self.cpu_start = time.process_time()
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        end = time.perf_counter()
+        cpu = time.process_time() - self.cpu_start
+        if self.profile:
+            self.profiler.disable()
+            self.tracer.dump_profile(self.name, self.profiler)
+        rss = peak_rss()
+        self.tracer.records.append({
+            'name': self.name, 'cat': self.cat, 'start': self.start, 'wall': end - self.start, 'cpu': cpu,
+            'peak_rss': rss, 'rss_growth': rss - self.rss_start if rss is not None else None,
+            'tid': threading.get_ident(), 'args': self.args,
+        })
+        return False
+
+class Tracer:
+    """Collects named spans with wall time, CPU time and peak RSS.
+
+    ``profile_dir`` additionally runs cProfile inside every span opened with
+    ``profile=True`` (the dashboard panels) and dumps it to ``<profile_dir>/<name>.prof``.
+    Peak RSS is the process high-water mark when the span ended; ``rss_growth`` is how
+    much the span raised it.
+    """
+
+    def __init__(self, profile_dir=None):
+        self.profile_dir = profile_dir
+        self.records = []
+        self.origin = time.perf_counter()
+        self.pid = os.getpid()
+        if profile_dir:
+            os.makedirs(profile_dir, exist_ok=True)
+
+    def dump_profile(self, name, profiler):
+        profiler.dump_stats(os.path.join(self.profile_dir, f"{name}.prof"))
+
+    def summary(self):
+        """Per span name, in order of first use: call count, total wall and CPU time in
+        milliseconds and the largest peak RSS and RSS growth in megabytes."""
+        spans = {}
+        for record in self.records:
+            entry = spans.setdefault(record['name'], {'cat': record['cat'], 'count': 0, 'wall_ms': 0.0, 'cpu_ms': 0.0,
+                                                      'peak_rss_mb': None, 'rss_growth_mb': None})
+            entry['count'] += 1
+            entry['wall_ms'] += record['wall'] * 1000
+            entry['cpu_ms'] += record['cpu'] * 1000
+            if record['peak_rss'] is not None:
+                entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0, record['peak_rss'] / 2**20)
+                entry['rss_growth_mb'] = max(entry['rss_growth_mb'] or 0, record['rss_growth'] / 2**20)
+        first = {}
+        for record in self.records:
+            first.setdefault(record['name'], record['start'])
+        return {
+            'wall_s': time.perf_counter() - self.origin,
+            'peak_rss_mb': peak_rss() / 2**20 if resource is not None else None,
+            'spans': {name: spans[name] for name in sorted(spans, key=first.get)},
+        }
+
+    def chrome_trace(self):
+        """The spans as a Chrome trace (``chrome://tracing``, https://ui.perfetto.dev):
+        one complete event per span and a peak-RSS counter track."""
+        events = [{'name': 'process_name', 'ph': 'M', 'pid': self.pid, 'args': {'name': 'dashboard'}}]
+        for record in self.records:
+            ts = (record['start'] - self.origin) * 1e6
+            events.append({
+                'name': record['name'], 'cat': record['cat'], 'ph': 'X', 'pid': self.pid, 'tid': record['tid'],
+                'ts': round(ts, 3), 'dur': round(record['wall'] * 1e6, 3),
+                'args': {'cpu_ms': round(record['cpu'] * 1000, 3), **record['args']},
+            })
+            if record['peak_rss'] is not None:
+                events.append({'name': 'peak_rss_mb', 'ph': 'C', 'pid': self.pid, 'ts': round(ts + record['wall'] * 1e6, 3),
+                               'args': {'peak_rss_mb': round(record['peak_rss'] / 2**20, 1)}})
+        return {'traceEvents': events, 'displayTimeUnit': 'ms'}
+
+    def write(self, trace_path=None, summary_path=None):
+        if trace_path:
+            with open(trace_path, "w") as f:
+                json.dump(self.chrome_trace(), f)
+        if summary_path:
+            with open(summary_path, "w") as f:
+                json.dump(self.summary(), f, indent=4)
+
+    def format_summary(self, limit=None):
+        """Text table of the spans, slowest first."""
+        spans = sorted(self.summary()['spans'].items(), key=lambda item: -item[1]['wall_ms'])[:limit]
+        width = max([len(name) for name, _ in spans] + [4])
+        lines = [f"{'span':<{width}} {'calls':>5} {'wall ms':>9} {'cpu ms':>9} {'peak MB':>8}"]
+        for name, entry in spans:
+            peak = f"{entry['peak_rss_mb']:8.0f}" if entry['peak_rss_mb'] is not None else f"{'-':>8}"
+            lines.append(f"{name:<{width}} {entry['count']:>5} {entry['wall_ms']:>9.1f} {entry['cpu_ms']:>9.1f} {peak}")
+        return "\n".join(lines)
+
+def start(profile_dir=None):
+    """Turns tracing on for this process and returns the new ``Tracer``."""
+    global _tracer
+    _tracer = Tracer(profile_dir)
+    return _tracer
+
+def stop():
+    """Turns tracing off and returns the ``Tracer`` that was active."""
+    global _tracer
+    tracer, _tracer = _tracer, None
+    return tracer
+
+def active():
+    return _tracer
+
+def span(name, cat='stage', profile=False, **args):
+    """Context manager timing ``name``; a shared no-op when tracing is off."""
+    if _tracer is None:
+        return _DISABLED
+    return _Span(_tracer, name, cat, profile, args)
+
+def traced(name=None, cat='metric'):
+    """Decorator that runs every call of the function in a span (named after it by default)."""
+    def decorate(func):
+        label = name or func.__name__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if _tracer is None:
+                return func(*args, **kwargs)
+            with _Span(_tracer, label, cat, False, {}):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorate
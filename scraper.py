@@ -1,93 +1,356 @@
+import argparse
 import json
+import os
+import re
+import sys
+import threading
 import time
+from abc import ABC, abstractmethod
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 import pandas as pd
-from bs4 import BeautifulSoup
-from selenium import webdriver
-from selenium.webdriver.safari.webdriver import WebDriver as SafariDriver
-from selenium.common.exceptions import WebDriverException
-import os
 
-try:
-    with open("config.json", "r") as f:
-        config = json.load(f)
-    WHOSCORED_URL = config["MATCH_SETTINGS"]["WHOSCORED_URL"]
-    OUTPUT_DIR = config["MATCH_SETTINGS"]["DATA_DIR"]
-except FileNotFoundError:
-    print("FATAL ERROR: config.json not found. Please create it.")
-    exit()
-except KeyError as e:
-    print(f"FATAL ERROR: Key {e} missing from config.json under MATCH_SETTINGS.")
-    exit()
-
-def scrape_whoscored_events():
-    print("Starting WhoScored scraping using Safari...")
-    
-    try:
-        driver = webdriver.Safari() 
-        driver.set_page_load_timeout(45)
-    except WebDriverException as e:
-        print(f"CRITICAL SAFARI DRIVER ERROR: {e}")
-        print("Ensure Safari's 'Develop > Allow Remote Automation' is enabled.")
-        return None, None
-    except Exception as e:
-        print(f"General driver error: {e}")
-        return None, None
+from cache import DEFAULT_LIVE_TTL, PageCache
+from store import (
+    EVENTS_FILE, EVENTS_CSV_FILE, QUALIFIERS_FILE,
+    build_qualifier_index, normalize_events, write_events, write_qualifier_index, write_match_meta, export_events_csv
+)
 
-    try:
-        driver.get(WHOSCORED_URL)
-        time.sleep(5)  
-        soup = BeautifulSoup(driver.page_source, 'html.parser')
-        
-        element = soup.select_one('script:-soup-contains("matchCentreData")')
-        driver.quit()
-
-        if element:
-            match_data_raw = element.text.split("matchCentreData: ")[1].split(',\n')[0]
-            matchdict = json.loads(match_data_raw)
-            
-            df_events = pd.DataFrame(matchdict['events'])
-            
-            df_events = df_events.rename(columns={
-                'eventId': 'id', 
-                'outcomeType': 'outcome_type', 
-                'playerId': 'player_id', 
-                'teamId': 'team_id',
-                'endX': 'end_x', 
-                'endY': 'end_y',
-                'isTouch': 'is_touch',
-                'isShot': 'is_shot',
-                'isGoal': 'is_goal'
-            })
-            
-            get_display_name = lambda x: x['displayName'] if isinstance(x, dict) and 'displayName' in x else None
-            df_events['type_display_name'] = df_events['type'].apply(get_display_name)
-            df_events['outcome_type_display_name'] = df_events['outcome_type'].apply(get_display_name)
-            
-            print("WhoScored Data extracted successfully.")
-            return matchdict, df_events
-        else:
-            print("ERROR: matchCentreData not found!")
-            return None, None
-
-    except Exception as e:
-        print(f"An error occurred during page interaction: {e}")
-        if 'driver' in locals():
+MATCH_URL_TEMPLATE = "https://www.whoscored.com/matches/{match_id}/live"
+MATCH_CENTRE_MARKER = "matchCentreData: "
+PAGE_LOAD_TIMEOUT = 45
+
+def match_id_from_url(url):
+    match = re.search(r"/matches/(\d+)", str(url))
+    if match:
+        return int(match.group(1))
+    return int(url) if str(url).isdigit() else None
+
+def match_url(url_or_id):
+    return MATCH_URL_TEMPLATE.format(match_id=url_or_id) if str(url_or_id).isdigit() else url_or_id
+
+def extract_match_centre_data(html):
+    """Pulls the ``matchCentreData`` object out of a match page without parsing the DOM."""
+    start = html.find(MATCH_CENTRE_MARKER)
+    if start < 0:
+        return None
+    matchdict, _ = json.JSONDecoder().raw_decode(html, start + len(MATCH_CENTRE_MARKER))
+    return matchdict
+
+def read_match_centre_data(stream, chunk_size=1 << 16):
+    """Streaming variant of ``extract_match_centre_data`` for file-like objects.
+
+    Only the text from the marker onwards is kept in memory, and reading stops as
+    soon as the JSON object is complete.
+    """
+    buffer, found, read_size = "", False, chunk_size
+    keep = len(MATCH_CENTRE_MARKER)
+    while True:
+        chunk = stream.read(read_size)
+        if not chunk:
+            return None
+        buffer += chunk
+        if not found:
+            start = buffer.find(MATCH_CENTRE_MARKER)
+            if start < 0:
+                buffer = buffer[-keep:]
+                continue
+            buffer, found = buffer[start + len(MATCH_CENTRE_MARKER):], True
+        try:
+            return json.JSONDecoder().raw_decode(buffer)[0]
+        except ValueError:
+            # Grow reads geometrically so an incomplete object is re-parsed O(log n) times.
+            read_size = max(chunk_size, len(buffer))
+
+def events_from_matchdict(matchdict):
+    df_events = pd.DataFrame(matchdict['events'])
+
+    df_events = df_events.rename(columns={
+        'eventId': 'id',
+        'outcomeType': 'outcome_type',
+        'playerId': 'player_id',
+        'teamId': 'team_id',
+        'endX': 'end_x',
+        'endY': 'end_y',
+        'isTouch': 'is_touch',
+        'isShot': 'is_shot',
+        'isGoal': 'is_goal'
+    })
+
+    get_display_name = lambda x: x['displayName'] if isinstance(x, dict) and 'displayName' in x else None
+    df_events['type_display_name'] = df_events['type'].apply(get_display_name)
+    df_events['outcome_type_display_name'] = df_events['outcome_type'].apply(get_display_name)
+    return df_events
+
+class FetchBackend(ABC):
+    """Fetches the HTML of a match page. ``fetch`` may be called from several threads."""
+    max_workers = None
+
+    @abstractmethod
+    def fetch(self, url):
+        """The page's HTML."""
+
+    def close(self):
+        pass
+
+class WebDriverBackend(FetchBackend):
+    """One browser per worker thread; waits for ``matchCentreData`` instead of sleeping."""
+
+    def __init__(self, timeout=PAGE_LOAD_TIMEOUT):
+        self.timeout = timeout
+        self._local = threading.local()
+        self._drivers = []
+        self._lock = threading.Lock()
+
+    @abstractmethod
+    def create_driver(self):
+        """A new selenium WebDriver for the calling thread."""
+
+    def _driver(self):
+        if not hasattr(self._local, 'driver'):
+            driver = self.create_driver()
+            driver.set_page_load_timeout(self.timeout)
+            self._local.driver = driver
+            with self._lock:
+                self._drivers.append(driver)
+        return self._local.driver
+
+    def fetch(self, url):
+        from selenium.webdriver.support.ui import WebDriverWait
+        driver = self._driver()
+        driver.get(url)
+        WebDriverWait(driver, self.timeout, poll_frequency=0.25).until(
+            lambda d: d.execute_script("return document.documentElement.innerHTML.indexOf('matchCentreData') >= 0")
+        )
+        return driver.page_source
+
+    def close(self):
+        for driver in self._drivers:
             driver.quit()
+        self._drivers = []
+
+class SafariBackend(WebDriverBackend):
+    # safaridriver only allows a single automation session.
+    max_workers = 1
+
+    def create_driver(self):
+        from selenium import webdriver
+        return webdriver.Safari()
+
+class ChromiumBackend(WebDriverBackend):
+    def create_driver(self):
+        from selenium import webdriver
+        options = webdriver.ChromeOptions()
+        options.add_argument("--headless=new")
+        options.add_argument("--disable-gpu")
+        return webdriver.Chrome(options=options)
+
+class FirefoxBackend(WebDriverBackend):
+    def create_driver(self):
+        from selenium import webdriver
+        options = webdriver.FirefoxOptions()
+        options.add_argument("-headless")
+        return webdriver.Firefox(options=options)
+
+class HTTPBackend(FetchBackend):
+    def __init__(self, timeout=PAGE_LOAD_TIMEOUT, headers=None):
+        import requests
+        self.timeout = timeout
+        self.headers = headers or {'User-Agent': 'Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15'}
+        self._local = threading.local()
+        self._requests = requests
+
+    def fetch(self, url):
+        if not hasattr(self._local, 'session'):
+            self._local.session = self._requests.Session()
+        response = self._local.session.get(url, headers=self.headers, timeout=self.timeout)
+        response.raise_for_status()
+        return response.text
+
+class LocalHTMLBackend(FetchBackend):
+    """Serves saved match pages named ``<match_id>.html`` from a directory."""
+
+    def __init__(self, html_dir):
+        self.html_dir = html_dir
+
+    def path(self, url):
+        return os.path.join(self.html_dir, f"{match_id_from_url(url)}.html")
+
+    def fetch(self, url):
+        with open(self.path(url), "r", encoding="utf-8") as f:
+            return f.read()
+
+    def fetch_match_centre_data(self, url):
+        with open(self.path(url), "r", encoding="utf-8") as f:
+            return read_match_centre_data(f)
+
+BACKENDS = {
+    'safari': SafariBackend,
+    'chromium': ChromiumBackend,
+    'firefox': FirefoxBackend,
+    'http': HTTPBackend,
+    'local': LocalHTMLBackend,
+}
+
+def scrape_match(url, backend):
+    if hasattr(backend, 'fetch_match_centre_data'):
+        matchdict = backend.fetch_match_centre_data(url)
+    else:
+        matchdict = extract_match_centre_data(backend.fetch(url))
+    if matchdict is None:
         return None, None
+    return matchdict, events_from_matchdict(matchdict)
+
+def save_match(matchdict, df_events, output_dir, match_id=None):
+    os.makedirs(output_dir, exist_ok=True)
+    qualifier_index = build_qualifier_index(df_events)
+    df_events = normalize_events(df_events, match_id=match_id, qualifier_index=qualifier_index)
+    write_events(df_events, os.path.join(output_dir, EVENTS_FILE))
+    write_qualifier_index(qualifier_index, os.path.join(output_dir, QUALIFIERS_FILE))
+    export_events_csv(df_events, os.path.join(output_dir, EVENTS_CSV_FILE))
+    write_match_meta(matchdict, output_dir, match_id or 0)
+
+def update_match(url, backend, match_dir, cache=None, force=False):
+    """Brings one match's derived files in ``match_dir`` up to date and returns its status.
 
-def main_scrape():
-    if not os.path.exists(OUTPUT_DIR):
-        os.makedirs(OUTPUT_DIR)
-
-    matchdict, df_events = scrape_whoscored_events()
-    
-    if matchdict and df_events is not None and not df_events.empty:
-        df_events.to_csv(os.path.join(OUTPUT_DIR, "df_events.csv"), index=False)
-        with open(os.path.join(OUTPUT_DIR, "matchdict.json"), "w") as f:
-            json.dump(matchdict, f, indent=4)
-        print(f"Saved df_events.csv and matchdict.json to {OUTPUT_DIR}")
+    With a ``cache``, fresh entries (finished matches, or in-progress ones within the
+    TTL) are served without fetching, and refetched pages whose data hash is unchanged
+    do not rewrite existing files.
+    """
+    match_id = match_id_from_url(url)
+    built = os.path.exists(os.path.join(match_dir, EVENTS_FILE))
+    if cache is not None and not force and cache.is_fresh(match_id):
+        if built:
+            return 'cached'
+        matchdict = cache.load_matchdict(match_id)
+        save_match(matchdict, events_from_matchdict(matchdict), match_dir, match_id)
+        return 'rebuilt'
+
+    if cache is None:
+        matchdict, df_events = scrape_match(match_url(url), backend)
+        changed = True
     else:
-        print("CRITICAL: Failed to save any core WhoScored match data.")
-        
+        page = backend.fetch(match_url(url))
+        matchdict = extract_match_centre_data(page)
+        df_events = events_from_matchdict(matchdict) if matchdict is not None else None
+        if matchdict is not None:
+            _, changed = cache.put(match_id, matchdict, page)
+    if matchdict is None or df_events.empty:
+        raise ValueError("matchCentreData not found")
+    if not changed and built:
+        return 'unchanged'
+    save_match(matchdict, df_events, match_dir, match_id)
+    return 'saved'
+
+def _run_pool(pool, jobs):
+    results = {}
+    futures = {pool.submit(*job): match_id for match_id, job in jobs.items()}
+    for future in as_completed(futures):
+        match_id = futures[future]
+        try:
+            results[match_id] = future.result()
+            print(f"Match {match_id}: {results[match_id]}")
+        except Exception as e:
+            results[match_id] = f"error: {e}"
+            print(f"ERROR: match {match_id} failed: {e}")
+    return results
+
+def scrape_batch(urls, backend, output_dir, workers=4, cache=None, force=False):
+    """Scrapes many matches through a bounded worker pool into ``output_dir/<match_id>/``.
+
+    Returns ``{match_id: status}`` and the elapsed wall time.
+    """
+    workers = min(workers, backend.max_workers or workers)
+    start = time.perf_counter()
+    jobs = {
+        match_id_from_url(url): (update_match, url, backend, os.path.join(output_dir, str(match_id_from_url(url))), cache, force)
+        for url in urls
+    }
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as pool:
+            results = _run_pool(pool, jobs)
+    finally:
+        backend.close()
+    return results, time.perf_counter() - start
+
+def _rebuild_match(cache, match_id, match_dir):
+    matchdict = cache.load_matchdict(match_id)
+    save_match(matchdict, events_from_matchdict(matchdict), match_dir, match_id)
+    return 'rebuilt'
+
+def rebuild_from_cache(cache, output_dir, match_ids=None, workers=4):
+    """Regenerates derived files for cached matches without fetching anything."""
+    start = time.perf_counter()
+    jobs = {
+        match_id: (_rebuild_match, cache, match_id, os.path.join(output_dir, str(match_id)))
+        for match_id in (match_ids or cache.match_ids())
+    }
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        results = _run_pool(pool, jobs)
+    return results, time.perf_counter() - start
+
+def make_backend(name, html_dir=None):
+    if name == 'local':
+        return LocalHTMLBackend(html_dir)
+    return BACKENDS[name]()
+
+def main_scrape(argv=None):
+    parser = argparse.ArgumentParser(description="Scrape WhoScored match events.")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--backend", choices=sorted(BACKENDS), default="safari")
+    parser.add_argument("--html-dir", help="directory of saved <match_id>.html pages for --backend local")
+    parser.add_argument("--matches", nargs="*", help="match URLs or ids to scrape in batch mode")
+    parser.add_argument("--matches-file", help="file with one match URL or id per line")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--cache-dir", help="raw page cache directory (default: <DATA_DIR>/cache)")
+    parser.add_argument("--no-cache", action="store_true", help="always fetch and never store raw pages")
+    parser.add_argument("--force", action="store_true", help="refetch matches even if they are cached")
+    parser.add_argument("--ttl", type=float, default=DEFAULT_LIVE_TTL, help="seconds before an in-progress match is refetched")
+    parser.add_argument("--rebuild", action="store_true", help="regenerate derived files from the cache without fetching")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.config, "r") as f:
+            config = json.load(f)
+        whoscored_url = config["MATCH_SETTINGS"]["WHOSCORED_URL"]
+        output_dir = config["MATCH_SETTINGS"]["DATA_DIR"]
+    except FileNotFoundError:
+        print("FATAL ERROR: config.json not found. Please create it.")
+        return 1
+    except KeyError as e:
+        print(f"FATAL ERROR: Key {e} missing from config.json under MATCH_SETTINGS.")
+        return 1
+
+    cache = None if args.no_cache else PageCache(args.cache_dir or os.path.join(output_dir, "cache"), ttl=args.ttl)
+    urls = list(args.matches or [])
+    if args.matches_file:
+        with open(args.matches_file, "r") as f:
+            urls += [line.strip() for line in f if line.strip()]
+
+    if args.rebuild:
+        if cache is None:
+            print("FATAL ERROR: --rebuild needs the page cache.")
+            return 1
+        results, elapsed = rebuild_from_cache(cache, output_dir, [match_id_from_url(url) for url in urls] or None, args.workers)
+    elif urls:
+        results, elapsed = scrape_batch(urls, make_backend(args.backend, args.html_dir), output_dir, args.workers, cache, args.force)
+    else:
+        backend = make_backend(args.backend, args.html_dir)
+        print(f"Updating {whoscored_url} using {type(backend).__name__}...")
+        try:
+            status = update_match(whoscored_url, backend, output_dir, cache, args.force)
+        except Exception as e:
+            print(f"CRITICAL: Failed to save any core WhoScored match data. Error: {e}")
+            if isinstance(backend, SafariBackend):
+                print("Ensure Safari's 'Develop > Allow Remote Automation' is enabled.")
+            return 1
+        finally:
+            backend.close()
+        print(f"{status.capitalize()}: {EVENTS_FILE}, {QUALIFIERS_FILE}, {EVENTS_CSV_FILE} and match metadata in {output_dir}")
+        return 0
+
+    failed = sum(status.startswith("error") for status in results.values())
+    print(f"Processed {len(results) - failed}/{len(results)} matches in {elapsed:.1f}s ({len(results) / elapsed * 60:.1f} matches/min)")
+    return 1 if failed else 0
+
 if __name__ == "__main__":
-    main_scrape()
\ No newline at end of file
+    sys.exit(main_scrape())
@@ -0,0 +1,307 @@
+import argparse
+import io
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+import numpy as np
+import pandas as pd
+
+from batch import match_config
+from cache import DEFAULT_ARTIFACT_CACHE_MB
+from dashboard import (
+    OUTPUT_PROFILES, OUTPUT_FORMATS, PANEL_LAYOUT,
+    load_config, open_match, input_files, artifact_data_key, artifact_cache, compute_match_metrics,
+    new_dashboard_figure, apply_dashboard_layout, draw_panels, output_settings
+)
+
+DEFAULT_PORT = 8050
+DEFAULT_MATCH_CACHE_MB = 256
+STREAM_CHUNK = 1 << 16
+CONTENT_TYPES = {'png': 'image/png', 'jpg': 'image/jpeg', 'webp': 'image/webp', 'svg': 'image/svg+xml', 'pdf': 'application/pdf'}
+# Query parameter -> TEAM_COLORS key a request may override.
+STYLE_PARAMS = {'home_color': 'HOME_COLOR', 'away_color': 'AWAY_COLOR', 'home_name': 'HOME_NAME', 'away_name': 'AWAY_NAME'}
+# Size of one dashboard panel in inches (the 24 x 20 figure is a 3 x 4 grid).
+PANEL_SIZE = (8, 5)
+
+def approx_bytes(value):
+    """Rough memory held by ``value``: frames and arrays by their buffers, containers recursively."""
+    if isinstance(value, (pd.DataFrame, pd.Series)):
+        return int(np.sum(value.memory_usage(deep=True)))
+    if isinstance(value, np.ndarray):
+        return value.nbytes
+    if isinstance(value, dict):
+        return sum(approx_bytes(v) for v in value.values()) + sys.getsizeof(value)
+    if isinstance(value, (list, tuple)):
+        return sum(approx_bytes(v) for v in value) + sys.getsizeof(value)
+    return sys.getsizeof(value)
+
+def render_image(match_metrics, config, settings, names=None):
+    """The dashboard (or only the panels ``names``, in rows of up to three) as image bytes."""
+    if names is None:
+        fig, panels = new_dashboard_figure(config)
+        draw_panels(panels, match_metrics, config)
+        apply_dashboard_layout(fig)
+    else:
+        from matplotlib.figure import Figure
+        n_cols = min(len(names), 3)
+        n_rows = -(-len(names) // n_cols)
+        fig = Figure(figsize=(PANEL_SIZE[0] * n_cols, PANEL_SIZE[1] * n_rows), facecolor=config["AESTHETICS"]["BG_COLOR"])
+        axs = fig.subplots(n_rows, n_cols, squeeze=False).flat
+        panels = dict(zip(names, axs))
+        for ax in axs[len(names):]:
+            ax.set_visible(False)
+        draw_panels(panels, match_metrics, config, names)
+        fig.tight_layout()
+    buffer = io.BytesIO()
+    fig.savefig(buffer, **settings)
+    return buffer.getvalue()
+
+def _init_worker():
+    # The service's SIGTERM handler is inherited by forked workers; the pool stops them.
+    signal.signal(signal.SIGTERM, signal.SIG_DFL)
+    import matplotlib
+    matplotlib.use('Agg')
+    import viz  # noqa: F401 - pitch templates and fonts load once per worker
+
+class MatchLRU:
+    """Loaded matches keyed by match directory, dropped least recently used once their
+    approximate size passes ``max_bytes``. Each entry remembers the size and mtime of the
+    match's input files and is reloaded when they change."""
+
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self.entries = OrderedDict()
+        self.size = 0
+        self.hits = self.misses = self.evictions = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, signature):
+        with self._lock:
+            entry = self.entries.get(key)
+            if entry is None or entry[0] != signature:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key, signature, value, nbytes):
+        with self._lock:
+            if key in self.entries:
+                self.size -= self.entries.pop(key)[2]
+            self.entries[key] = (signature, value, nbytes)
+            self.size += nbytes
+            while self.size > self.max_bytes and len(self.entries) > 1:
+                self.size -= self.entries.popitem(last=False)[1][2]
+                self.evictions += 1
+
+    def stats(self):
+        return {'matches': len(self.entries), 'size_mb': round(self.size / 2**20, 1), 'max_mb': round(self.max_bytes / 2**20, 1),
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions}
+
+class Coalescer:
+    """Runs one call per key at a time: callers asking for a key already in flight wait
+    for that call and share its result (or exception)."""
+
+    def __init__(self):
+        self.inflight = {}
+        self.coalesced = 0
+        self._lock = threading.Lock()
+
+    def run(self, key, func):
+        with self._lock:
+            future = self.inflight.get(key)
+            owner = future is None
+            if owner:
+                future = self.inflight[key] = Future()
+            else:
+                self.coalesced += 1
+        if not owner:
+            return future.result()
+        try:
+            result = func()
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self.inflight[key]
+
+class RenderService:
+    """Loads matches from ``data_dir`` into a ``MatchLRU`` and renders them on a process
+    pool of ``workers``. Identical loads and renders in flight are coalesced."""
+
+    def __init__(self, config, data_dir, workers=None, max_bytes=DEFAULT_MATCH_CACHE_MB * 2**20, cache=None, xt_grid_path=None):
+        self.config = config
+        self.data_dir = os.path.abspath(data_dir)
+        self.cache = cache
+        self.xt_grid_path = xt_grid_path
+        self.matches = MatchLRU(max_bytes)
+        self.loads = Coalescer()
+        self.renders = Coalescer()
+        self.pool = ProcessPoolExecutor(workers or os.cpu_count(), initializer=_init_worker)
+        self.rendered = 0
+
+    def close(self):
+        self.pool.shutdown(cancel_futures=True)
+
+    def match_dir(self, match):
+        """``DATA_DIR/<match>``, or ``DATA_DIR`` itself for an empty match."""
+        if match and (os.path.basename(match) != match or match in ('.', '..')):
+            raise ValueError(f"invalid match {match!r}")
+        match_dir = os.path.join(self.data_dir, match) if match else self.data_dir
+        if not os.path.isdir(match_dir):
+            raise FileNotFoundError(f"no match {match!r} in {self.data_dir}")
+        return match_dir
+
+    def load(self, match_dir):
+        """``(ctx, match_metrics, hit)`` for ``match_dir``, from the LRU when its files are unchanged."""
+        signature = tuple((path, os.stat(path).st_size, os.stat(path).st_mtime_ns) for path in input_files(match_dir, self.xt_grid_path))
+        loaded = self.matches.get(match_dir, signature)
+        if loaded is not None:
+            return (*loaded, True)
+
+        def compute():
+            ctx = open_match(match_dir, self.xt_grid_path)
+            data_key = artifact_data_key(match_dir, self.xt_grid_path) if self.cache is not None else None
+            match_metrics = compute_match_metrics(ctx, self.config, self.cache, data_key)
+            self.matches.put(match_dir, signature, (ctx, match_metrics), approx_bytes(vars(ctx)) + approx_bytes(match_metrics))
+            return ctx, match_metrics
+        return (*self.loads.run(match_dir, compute), False)
+
+    def request_config(self, matchdict, params):
+        config = match_config(self.config, {}, matchdict)
+        colors = dict(config["TEAM_COLORS"])
+        colors.update({key: params[name] for name, key in STYLE_PARAMS.items() if params.get(name)})
+        return {**config, 'TEAM_COLORS': colors}
+
+    def render(self, params):
+        """Image bytes, content type and whether the match was already loaded, for the
+        query ``params``: ``match``, ``profile``, ``format``, ``panels`` and the STYLE_PARAMS."""
+        profile = params.get('profile', 'preview')
+        if profile not in OUTPUT_PROFILES:
+            raise ValueError(f"unknown profile {profile!r}; choose from {', '.join(OUTPUT_PROFILES)}")
+        if params.get('format') and params['format'] not in OUTPUT_FORMATS:
+            raise ValueError(f"unknown format {params['format']!r}; choose from {', '.join(OUTPUT_FORMATS)}")
+        names = [name for name in params.get('panels', '').split(',') if name] or None
+        unknown = [name for name in names or [] if name not in PANEL_LAYOUT]
+        if unknown:
+            raise ValueError(f"unknown panel(s) {', '.join(unknown)}; choose from {', '.join(PANEL_LAYOUT)}")
+
+        match_dir = self.match_dir(params.get('match', ''))
+        ctx, match_metrics, hit = self.load(match_dir)
+        config = self.request_config(ctx.matchdict, params)
+        settings = output_settings(profile, params.get('format'))
+        key = (match_dir, id(match_metrics), json.dumps([config["TEAM_COLORS"], settings, names], sort_keys=True))
+        image = self.renders.run(key, lambda: self.pool.submit(render_image, match_metrics, config, settings, names).result())
+        self.rendered += 1
+        return image, CONTENT_TYPES[settings['format']], hit
+
+    def stats(self, params):
+        _, match_metrics, hit = self.load(self.match_dir(params.get('match', '')))
+        return match_metrics['stats'], hit
+
+    def health(self):
+        return {'matches': self.matches.stats(), 'rendered': self.rendered, 'coalesced': self.renders.coalesced + self.loads.coalesced,
+                'in_flight': len(self.renders.inflight)}
+
+class RenderHandler(BaseHTTPRequestHandler):
+    """``GET /render``, ``/stats`` and ``/health`` on the server's ``RenderService``."""
+    protocol_version = 'HTTP/1.1'
+    verbose = False
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        params = {key: values[-1] for key, values in parse_qs(url.query).items()}
+        start = time.perf_counter()
+        try:
+            if url.path == '/render':
+                body, content_type, hit = self.server.service.render(params)
+            elif url.path == '/stats':
+                stats, hit = self.server.service.stats(params)
+                body, content_type = json.dumps(stats).encode(), 'application/json'
+            elif url.path == '/health':
+                body, content_type, hit = json.dumps(self.server.service.health()).encode(), 'application/json', True
+            else:
+                return self.send_error(404, f"unknown path {url.path}")
+        except ValueError as e:
+            return self.send_error(400, str(e))
+        except FileNotFoundError as e:
+            return self.send_error(404, str(e))
+        except Exception as e:
+            return self.send_error(500, f"{type(e).__name__}: {e}")
+
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('X-Match-Cache', 'hit' if hit else 'miss')
+        self.send_header('X-Elapsed-Ms', f"{(time.perf_counter() - start) * 1000:.1f}")
+        self.end_headers()
+        view = memoryview(body)
+        for offset in range(0, len(body), STREAM_CHUNK):
+            self.wfile.write(view[offset:offset + STREAM_CHUNK])
+
+    def log_message(self, format, *args):
+        if self.verbose:
+            super().log_message(format, *args)
+
+def serve(service, host='127.0.0.1', port=DEFAULT_PORT, verbose=False):
+    handler = type('Handler', (RenderHandler,), {'verbose': verbose})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+def _interrupt(signum, frame):
+    raise KeyboardInterrupt
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve dashboards and panels of stored matches over HTTP.")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--data-dir", help="directory of <match_id>/ folders (default: DATA_DIR)")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="render processes")
+    parser.add_argument("--match-cache", type=int, default=DEFAULT_MATCH_CACHE_MB, help="memory for loaded matches in MB")
+    parser.add_argument("--xt-grid", help="path to the xT grid (default: each match's xT_grid.npy, else xT_grid.csv)")
+    parser.add_argument("--cache-dir", help="metric artifact cache directory (default: <DATA_DIR>/cache/artifacts)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_ARTIFACT_CACHE_MB, help="artifact cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="recompute the metrics of every match loaded")
+    parser.add_argument("--verbose", action="store_true", help="log every request")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+        data_dir = args.data_dir or config["MATCH_SETTINGS"]["DATA_DIR"]
+        cache = None if args.no_cache else artifact_cache(config, args.cache_dir, args.cache_size)
+        service = RenderService(config, data_dir, args.workers, args.match_cache * 2**20, cache, args.xt_grid)
+        server = serve(service, args.host, args.port, args.verbose)
+    except (OSError, KeyError, ValueError) as e:
+        print(f"FATAL ERROR: Could not start the render service. Error: {e}")
+        return 1
+
+    print(f"Serving {data_dir} on http://{args.host}:{server.server_port} with {args.workers} render workers", flush=True)
+    # SIGTERM (e.g. from loadtest.py) stops the server like Ctrl-C, so the finally
+    # block shuts the render pool down instead of orphaning its workers.
+    signal.signal(signal.SIGTERM, _interrupt)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,298 @@
+import ast
+import json
+import os
+import numpy as np
+import pandas as pd
+
+EVENTS_FILE = "df_events.feather"
+EVENTS_CSV_FILE = "df_events.csv"
+QUALIFIERS_FILE = "df_qualifiers.feather"
+TEAMS_FILE = "teams.feather"
+PLAYERS_FILE = "players.feather"
+PLAYER_NAMES_FILE = "player_names.feather"
+MATCH_META_FILE = "match_meta.json"
+MATCHDICT_FILE = "matchdict.json"
+XT_GRID_FILE = "xT_grid.npy"
+XT_GRID_CSV_FILE = "xT_grid.csv"
+
+EVENT_DTYPES = {
+    'match_id': 'int32',
+    'id': 'int64',
+    'minute': 'int16',
+    'second': 'float32',
+    'expandedMinute': 'int16',
+    'team_id': 'int32',
+    'player_id': 'Int32',
+    'x': 'float32',
+    'y': 'float32',
+    'end_x': 'float32',
+    'end_y': 'float32',
+    'is_touch': 'bool',
+    'type_display_name': 'category',
+    'outcome_type_display_name': 'category',
+}
+
+# Boolean event columns decoded from the WhoScored qualifier list; every other
+# qualifier stays reachable through the qualifier index.
+QUALIFIER_FLAGS = {
+    'is_corner': ['CornerTaken'],
+    'is_freekick': ['FreekickTaken', 'IndirectFreekickTaken', 'DirectFreekick'],
+    'is_throw_in': ['ThrowIn'],
+    'is_goal_kick': ['GoalKick'],
+    'is_cross': ['Cross'],
+    'is_longball': ['Longball'],
+    'is_through_ball': ['Throughball'],
+    'is_key_pass': ['KeyPass'],
+    'is_head_pass': ['HeadPass'],
+    'is_chipped': ['Chipped'],
+    'is_big_chance': ['BigChanceCreated', 'BigChance'],
+}
+
+# The event columns MatchContext, the metrics and the live mode read; everything else
+# (the raw ``qualifiers`` JSON, other stringified nested columns) stays on disk.
+COMPACT_EVENT_COLUMNS = [
+    'match_id', 'id', 'minute', 'second', 'team_id', 'player_id', 'type_display_name', 'outcome_type_display_name',
+    'x', 'y', 'end_x', 'end_y', 'is_touch', *QUALIFIER_FLAGS,
+]
+COMPACT_DTYPES = {**EVENT_DTYPES, 'second': 'int8'}
+
+# matchdict player key -> (players table column, dtype)
+PLAYER_COLUMNS = {
+    'playerId': ('player_id', 'int32'),
+    'name': ('name', 'str'),
+    'shirtNo': ('shirt_no', 'Int16'),
+    'position': ('position', 'category'),
+    'isFirstEleven': ('is_first_eleven', 'bool'),
+    'age': ('age', 'Int16'),
+    'height': ('height', 'Int16'),
+    'weight': ('weight', 'Int16'),
+    'isManOfTheMatch': ('is_man_of_the_match', 'bool'),
+}
+
+# Raw WhoScored dict columns whose displayName already lives in a *_display_name column.
+REDUNDANT_NESTED_COLUMNS = ['type', 'outcome_type']
+
+def _is_nested(values):
+    sample = values.dropna()
+    return len(sample) > 0 and isinstance(sample.iloc[0], (dict, list))
+
+def _decode_qualifiers(value):
+    if isinstance(value, list):
+        return value
+    if not isinstance(value, str) or not value:
+        return []
+    try:
+        return json.loads(value)
+    except ValueError:
+        return ast.literal_eval(value)
+
+def build_qualifier_index(df_events: pd.DataFrame) -> pd.DataFrame:
+    """Decodes the ``qualifiers`` column once into a long (row, qualifier, value) table."""
+    if 'qualifiers' not in df_events.columns:
+        return pd.DataFrame({'row': np.array([], dtype='int32'), 'qualifier': pd.Categorical([]), 'value': []})
+    decoded = [_decode_qualifiers(value) for value in df_events['qualifiers'].values]
+    lengths = np.fromiter((len(q) for q in decoded), dtype=np.int64, count=len(decoded))
+    flat = [q for qualifiers in decoded for q in qualifiers]
+    return pd.DataFrame({
+        'row': np.repeat(np.arange(len(decoded), dtype=np.int32), lengths),
+        'qualifier': pd.Categorical([q['type']['displayName'] for q in flat]),
+        'value': [q.get('value') for q in flat],
+    })
+
+def add_qualifier_flags(df_events: pd.DataFrame, qualifier_index: pd.DataFrame) -> pd.DataFrame:
+    for flag, names in QUALIFIER_FLAGS.items():
+        values = np.zeros(len(df_events), dtype=bool)
+        values[qualifier_index['row'].values[qualifier_index['qualifier'].isin(names).values]] = True
+        df_events[flag] = values
+    return df_events
+
+def events_with_qualifier(df_events: pd.DataFrame, qualifier_index: pd.DataFrame, qualifier: str) -> pd.DataFrame:
+    rows = qualifier_index['row'].values[(qualifier_index['qualifier'] == qualifier).values]
+    return df_events.iloc[np.unique(rows)]
+
+def normalize_events(df_events: pd.DataFrame, match_id=None, qualifier_index=None) -> pd.DataFrame:
+    """Returns the typed, columnar form of a scraped or CSV-loaded event table.
+
+    ``qualifier_index`` is built from the ``qualifiers`` column when not supplied.
+    """
+    if qualifier_index is None:
+        qualifier_index = build_qualifier_index(df_events)
+    df = df_events.loc[:, ~df_events.columns.duplicated()].reset_index(drop=True)
+    df = add_qualifier_flags(df, qualifier_index)
+    df = df.drop(columns=[c for c in REDUNDANT_NESTED_COLUMNS if c in df.columns])
+    if match_id is not None:
+        df = df.assign(match_id=match_id)
+
+    for column in df.columns[df.dtypes == object]:
+        if _is_nested(df[column]):
+            df[column] = df[column].map(json.dumps, na_action='ignore')
+
+    for column, dtype in EVENT_DTYPES.items():
+        if column not in df.columns:
+            continue
+        if dtype == 'bool':
+            df[column] = df[column].fillna(False).astype(bool)
+        elif dtype[0] == 'i':
+            df[column] = df[column].fillna(0).astype(dtype)
+        else:
+            df[column] = df[column].astype(dtype)
+    return df
+
+def compact_events(df_events: pd.DataFrame) -> pd.DataFrame:
+    """The normalized events cut down to ``COMPACT_EVENT_COLUMNS``: categorical type and
+    outcome, float32 coordinates, int8 seconds and int32 ids where they fit. Rows keep
+    their order, so qualifier index rows still point at the same events."""
+    df = df_events[[column for column in COMPACT_EVENT_COLUMNS if column in df_events.columns]]
+    dtypes = {column: dtype for column, dtype in COMPACT_DTYPES.items() if column in df.columns and df[column].dtype != dtype}
+    if 'id' in df.columns and len(df) and df['id'].min() >= np.iinfo(np.int32).min and df['id'].max() <= np.iinfo(np.int32).max:
+        dtypes['id'] = 'int32'
+    return df.assign(**{
+        column: (df[column].fillna(0) if dtype[0] == 'i' else df[column]).astype(dtype) for column, dtype in dtypes.items()
+    })
+
+def write_events(df_events: pd.DataFrame, path):
+    import pyarrow.feather as feather
+    # Uncompressed so readers can memory-map the file instead of decoding it.
+    feather.write_feather(df_events, path, compression='uncompressed')
+
+def read_events(path, columns=None) -> pd.DataFrame:
+    """Memory-maps one event file, reading only ``columns`` if given."""
+    import pyarrow.feather as feather
+    return feather.read_table(path, columns=columns, memory_map=True).to_pandas()
+
+def read_season_table(paths, columns=None) -> pd.DataFrame:
+    """Reads many Feather files of one kind into one frame with shared category codes."""
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    tables = [feather.read_table(path, columns=columns, memory_map=True) for path in paths]
+    return pa.concat_tables(tables, promote_options='permissive').unify_dictionaries().to_pandas()
+
+def read_season_events(paths, columns=None, compact=False) -> pd.DataFrame:
+    """Many matches' events in one frame. With ``compact`` only the compact columns are
+    read (see ``compact_events``); the qualifier strings are never decoded."""
+    if compact:
+        import pyarrow as pa
+        stored = set().union(*(pa.ipc.open_file(pa.memory_map(path)).schema.names for path in paths)) if paths else set()
+        columns = [column for column in columns or COMPACT_EVENT_COLUMNS if column in stored]
+        return compact_events(read_season_table(paths, columns))
+    return read_season_table(paths, columns)
+
+def read_season_rosters(match_dirs, columns=None) -> pd.DataFrame:
+    """Players of many matches in one bulk read, keyed by ``match_id`` and ``team_id``."""
+    return read_season_table([os.path.join(match_dir, PLAYERS_FILE) for match_dir in match_dirs], columns)
+
+def write_qualifier_index(qualifier_index: pd.DataFrame, path):
+    write_events(qualifier_index, path)
+
+def load_qualifier_index(match_dir) -> pd.DataFrame:
+    path = os.path.join(match_dir, QUALIFIERS_FILE)
+    if os.path.exists(path):
+        return read_events(path)
+    return build_qualifier_index(pd.read_csv(os.path.join(match_dir, EVENTS_CSV_FILE), usecols=['qualifiers']))
+
+def load_events(match_dir, columns=None, compact=False) -> pd.DataFrame:
+    """Loads a match's events, preferring the columnar store over the CSV export.
+    ``compact`` returns ``compact_events`` of them."""
+    path = os.path.join(match_dir, EVENTS_FILE)
+    if os.path.exists(path):
+        if compact:
+            return read_season_events([path], columns, compact=True)
+        return read_events(path, columns)
+    df_events = normalize_events(pd.read_csv(os.path.join(match_dir, EVENTS_CSV_FILE)))
+    df_events = df_events[columns] if columns is not None else df_events
+    return compact_events(df_events) if compact else df_events
+
+def find_match_dirs(data_dir):
+    """Subdirectories of ``data_dir`` holding a stored or exported match."""
+    return sorted(
+        path for path in (os.path.join(data_dir, name) for name in os.listdir(data_dir))
+        if os.path.exists(os.path.join(path, EVENTS_FILE)) or os.path.exists(os.path.join(path, EVENTS_CSV_FILE))
+    )
+
+def export_events_csv(df_events: pd.DataFrame, path):
+    df_events.to_csv(path, index=False)
+
+def _typed(df, dtypes):
+    for column, dtype in dtypes.items():
+        df[column] = df[column].fillna(False).astype(bool) if dtype == 'bool' else df[column].astype(dtype)
+    return df
+
+def split_matchdict(matchdict, match_id=0):
+    """Splits ``matchCentreData`` into teams, players and player-name tables plus the
+    remaining metadata. Events are dropped; they live in the event store."""
+    teams, players = [], []
+    for side in ('home', 'away'):
+        team = matchdict[side]
+        teams.append({'match_id': match_id, 'side': side, 'team_id': team['teamId'], 'name': team.get('name')})
+        for player in team['players']:
+            row = {'match_id': match_id, 'team_id': team['teamId']}
+            row.update({column: player.get(key) for key, (column, _) in PLAYER_COLUMNS.items()})
+            players.append(row)
+
+    teams_df = _typed(pd.DataFrame(teams), {'match_id': 'int32', 'side': 'category', 'team_id': 'int32', 'name': 'str'})
+    players_df = pd.DataFrame(players, columns=['match_id', 'team_id'] + [column for column, _ in PLAYER_COLUMNS.values()])
+    players_df = _typed(players_df, {'match_id': 'int32', 'team_id': 'int32', **dict(PLAYER_COLUMNS.values())})
+    names = matchdict.get('playerIdNameDictionary', {})
+    names_df = _typed(pd.DataFrame({'match_id': match_id, 'player_id': list(names), 'name': list(names.values())}),
+                      {'match_id': 'int32', 'player_id': 'int32', 'name': 'str'})
+
+    meta = {key: value for key, value in matchdict.items() if key not in ('events', 'playerIdNameDictionary')}
+    for side in ('home', 'away'):
+        meta[side] = {key: value for key, value in matchdict[side].items() if key != 'players'}
+    return meta, teams_df, players_df, names_df
+
+def write_match_meta(matchdict, match_dir, match_id=0):
+    meta, teams_df, players_df, names_df = split_matchdict(matchdict, match_id)
+    write_events(teams_df, os.path.join(match_dir, TEAMS_FILE))
+    write_events(players_df, os.path.join(match_dir, PLAYERS_FILE))
+    write_events(names_df, os.path.join(match_dir, PLAYER_NAMES_FILE))
+    with open(os.path.join(match_dir, MATCH_META_FILE), "w") as f:
+        json.dump(meta, f, separators=(',', ':'))
+
+def _player_records(players_df):
+    keys = {column: key for key, (column, _) in PLAYER_COLUMNS.items()}
+    records = players_df[list(keys)].rename(columns=keys).astype(object)
+    return records.where(records.notna(), None).to_dict('records')
+
+def load_match_meta(match_dir):
+    """Returns the roster part of a matchdict (``home``/``away`` with ``teamId``, ``name`` and
+    ``players``, plus ``playerIdNameDictionary``) from the typed tables, without reading
+    events or the full metadata. Falls back to ``matchdict.json`` for older match folders."""
+    if not os.path.exists(os.path.join(match_dir, PLAYERS_FILE)):
+        with open(os.path.join(match_dir, MATCHDICT_FILE), "r") as f:
+            return json.load(f)
+
+    teams_df = read_events(os.path.join(match_dir, TEAMS_FILE))
+    players_df = read_events(os.path.join(match_dir, PLAYERS_FILE))
+    names_df = read_events(os.path.join(match_dir, PLAYER_NAMES_FILE))
+    matchdict = {'playerIdNameDictionary': dict(zip(names_df['player_id'].astype(str), names_df['name']))}
+    for team in teams_df.itertuples():
+        matchdict[team.side] = {
+            'teamId': int(team.team_id),
+            'name': team.name,
+            'players': _player_records(players_df[players_df['team_id'] == team.team_id]),
+        }
+    return matchdict
+
+def load_match_info(match_dir):
+    """The full match metadata (scores, formations, team stats, ...) without rosters or events."""
+    with open(os.path.join(match_dir, MATCH_META_FILE), "r") as f:
+        return json.load(f)
+
+def write_xt_grid(xT_grid, path):
+    """Saves an xT grid as ``.npy``, or as the headerless CSV export for any other suffix."""
+    if path.endswith('.npy'):
+        np.save(path, np.asarray(xT_grid, dtype=np.float64))
+    else:
+        pd.DataFrame(xT_grid).to_csv(path, header=False, index=False)
+
+def load_xt_grid(path) -> np.ndarray:
+    """Memory-maps a ``.npy`` xT grid; any other path is parsed as the CSV export."""
+    if path.endswith('.npy'):
+        return np.load(path, mmap_mode='r')
+    return pd.read_csv(path, header=None).values
+
+def xt_grid_file(directory):
+    """``<directory>/xT_grid.npy`` if it exists, else the CSV export next to it."""
+    path = os.path.join(directory, XT_GRID_FILE)
+    return path if os.path.exists(path) else os.path.join(directory, XT_GRID_CSV_FILE)
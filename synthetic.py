@@ -0,0 +1,255 @@
+import argparse
+import json
+import os
+import sys
+import numpy as np
+import pandas as pd
+
+from store import XT_GRID_FILE, load_xt_grid, write_match_meta, write_xt_grid
+
+EVENTS_PER_MATCH = 1700
+MATCH_MINUTES = 95
+TEAM_IDS = (13, 23)
+PLAYERS_PER_TEAM = 22
+MAX_SUBSTITUTIONS = 5
+
+EVENT_TYPE_WEIGHTS = {
+    'Pass': 0.45, 'Carry': 0.25, 'BallRecovery': 0.06, 'Tackle': 0.04, 'Interception': 0.03,
+    'Clearance': 0.04, 'Aerial': 0.04, 'Foul': 0.03, 'Challenge': 0.03, 'TakeOn': 0.03, 'MissedShots': 0.012,
+}
+SUCCESS_RATES = {
+    'Pass': 0.8, 'Carry': 0.97, 'BallRecovery': 1.0, 'Tackle': 0.65, 'Interception': 1.0,
+    'Clearance': 0.9, 'Aerial': 0.5, 'Foul': 0.5, 'Challenge': 0.3, 'TakeOn': 0.55, 'MissedShots': 0.0,
+}
+# Shots are drawn as MissedShots, moved in front of the goal and turned into a Goal with
+# chance GOAL_RATE[0] * exp(-distance / GOAL_RATE[1]) (metres), else a SavedShot with chance SAVED_RATE.
+GOAL_RATE = (0.5, 8.0)
+SAVED_RATE = 0.3
+DEFAULT_SUCCESS_RATE = 0.8
+NON_TOUCH_TYPES = ('Carry', 'Foul', 'Challenge')
+# Shift of the event location along the attacking direction, by type.
+TYPE_X_SHIFT = {'Clearance': -20, 'Interception': -12, 'BallRecovery': -10, 'Tackle': -10, 'Aerial': -5, 'TakeOn': 10}
+# Chance that the ball changes side after a successful / unsuccessful event.
+POSSESSION_SWITCH = (0.08, 0.85)
+
+# Starting eleven in PLAYER_POSITIONS order with their mean (x, y) on the 100 x 100 pitch,
+# and the share of their team's events each one takes part in.
+PLAYER_POSITIONS = ['GK', 'DR', 'DC', 'DC', 'DL', 'DMC', 'MC', 'MC', 'AMR', 'AML', 'FW']
+STARTER_SPOTS = [(6, 50), (32, 12), (26, 37), (26, 63), (32, 88), (42, 50), (52, 32), (52, 68), (66, 15), (66, 85), (76, 50)]
+STARTER_WEIGHTS = [0.03, 0.1, 0.1, 0.1, 0.1, 0.11, 0.11, 0.11, 0.085, 0.085, 0.07]
+
+# Per event type, the chance of each boolean WhoScored qualifier. Passes also carry
+# numeric Length and Angle qualifiers, as scraped passes do.
+QUALIFIER_RATES = {
+    'Pass': {
+        'Longball': 0.12, 'Cross': 0.04, 'HeadPass': 0.06, 'Throughball': 0.01, 'Chipped': 0.04, 'KeyPass': 0.02,
+        'BigChanceCreated': 0.003, 'CornerTaken': 0.012, 'FreekickTaken': 0.03, 'ThrowIn': 0.05, 'GoalKick': 0.01,
+    },
+    'Foul': {'Foul': 1.0},
+    'Clearance': {'HeadPass': 0.4},
+}
+QUALIFIER_IDS = {
+    'Longball': 1, 'Cross': 2, 'HeadPass': 3, 'Throughball': 4, 'FreekickTaken': 5, 'CornerTaken': 6, 'Foul': 13,
+    'KeyPass': 29, 'ThrowIn': 107, 'GoalKick': 124, 'Chipped': 155, 'BigChanceCreated': 211, 'Length': 212, 'Angle': 213,
+}
+
+def team_player_ids(team_id, n_players=PLAYERS_PER_TEAM):
+    return team_id * 100 + 1 + np.arange(n_players)
+
+def synthetic_team(team_id, name=None, n_players=PLAYERS_PER_TEAM):
+    """A WhoScored-shaped team entry: the starting eleven followed by ``n_players - 11`` substitutes."""
+    name = name or f"Team {team_id}"
+    positions = PLAYER_POSITIONS + ['Sub'] * (n_players - len(PLAYER_POSITIONS))
+    return {'teamId': team_id, 'name': name, 'players': [
+        {'playerId': int(player_id), 'name': f'{name} {i + 1}', 'shirtNo': i + 1,
+         'position': position, 'isFirstEleven': True if i < 11 else None}
+        for i, (player_id, position) in enumerate(zip(team_player_ids(team_id, n_players), positions))
+    ]}
+
+def season_fixtures(n_matches, n_teams=20, seed=0):
+    """``n_matches`` (home, away) team-id pairs from a double round robin of ``n_teams`` teams
+    with ids 13, 23, 33, ..."""
+    team_ids = [10 * i + 13 for i in range(n_teams)]
+    pairs = [(home, away) for home in team_ids for away in team_ids if home != away]
+    order = np.random.default_rng(seed).permutation(len(pairs))
+    return [pairs[order[i % len(pairs)]] for i in range(n_matches)]
+
+def _qualifier_lists(types, length, angle, rng, qualifier_rates):
+    names = [[] for _ in range(len(types))]
+    for event_type, rates in qualifier_rates.items():
+        is_type = types == event_type
+        for qualifier, rate in rates.items():
+            for i in np.flatnonzero(is_type & (rng.random(len(types)) < rate)):
+                names[i].append(qualifier)
+    is_pass = types == 'Pass'
+    return [
+        [{'type': {'value': QUALIFIER_IDS.get(name, 0), 'displayName': name}} for name in event_names] + (
+            [{'type': {'value': QUALIFIER_IDS['Length'], 'displayName': 'Length'}, 'value': f'{length[i]:.1f}'},
+             {'type': {'value': QUALIFIER_IDS['Angle'], 'displayName': 'Angle'}, 'value': f'{angle[i]:.2f}'}]
+            if is_pass[i] else []
+        )
+        for i, event_names in enumerate(names)
+    ]
+
+def synthetic_events(n_events, seed=0, fixtures=(TEAM_IDS,), events_per_match=EVENTS_PER_MATCH, n_players=PLAYERS_PER_TEAM,
+                     type_weights=EVENT_TYPE_WEIGHTS, qualifier_rates=None):
+    """A ``df_events``-shaped frame of ``n_events`` events in matches of ``events_per_match``.
+
+    Match ``i`` is played by the (home, away) team ids ``fixtures[i % len(fixtures)]``.
+    Events run in possession sequences that usually change side after an unsuccessful
+    event, are placed around each starter's role position, and substitutes replace up to
+    five outfield starters after the 55th minute. Shots are taken in front of the goal and
+    scored more often the closer they are. Player ids are ``team_id * 100 + 1..n_players``.
+    With ``qualifier_rates`` (e.g. ``QUALIFIER_RATES``) a ``qualifiers`` column of WhoScored
+    qualifier lists is added.
+    """
+    rng = np.random.default_rng(seed)
+    index = np.arange(n_events)
+    match_id = index // events_per_match
+    n_matches = int(match_id[-1]) + 1 if n_events else 0
+    fixtures = np.asarray(fixtures)[np.arange(n_matches) % len(fixtures)]
+
+    types = np.array(list(type_weights))
+    weights = np.array(list(type_weights.values()), dtype=float)
+    type_codes = rng.choice(len(types), n_events, p=weights / weights.sum())
+    success_rates = np.array([SUCCESS_RATES.get(t, DEFAULT_SUCCESS_RATE) for t in types])
+    success = rng.random(n_events) < success_rates[type_codes]
+
+    switch = rng.random(n_events) < np.where(np.roll(success, 1), *POSSESSION_SWITCH)
+    switch[0] = False
+    side = np.cumsum(switch) % 2
+    minute = (index % events_per_match) * MATCH_MINUTES // events_per_match
+
+    # Each team brings on substitutes for its first ``n_subs`` outfield slots in a random order.
+    n_subs = max(0, min(MAX_SUBSTITUTIONS, n_players - 11))
+    slot = rng.choice(11, n_events, p=np.array(STARTER_WEIGHTS) / sum(STARTER_WEIGHTS))
+    sub_rank = np.concatenate([np.full((n_matches, 2, 1), 10), rng.random((n_matches, 2, 10)).argsort(-1).argsort(-1)], axis=-1)
+    sub_minute = np.where(sub_rank < n_subs, rng.uniform(55, 90, (n_matches, 2, 11)), np.inf)
+    subbed = minute >= sub_minute[match_id, side, slot]
+    squad_index = np.where(subbed, 11 + sub_rank[match_id, side, slot], slot)
+
+    spots = np.array(STARTER_SPOTS, dtype=float)[slot]
+    x_shift = np.array([TYPE_X_SHIFT.get(t, 0) for t in types])[type_codes]
+    x = np.clip(spots[:, 0] + x_shift + rng.normal(0, 12, n_events), 0, 100)
+    y = np.clip(spots[:, 1] + rng.normal(0, 10, n_events), 0, 100)
+    event_types = types[type_codes]
+    is_pass, is_carry = event_types == 'Pass', event_types == 'Carry'
+    dx = np.where(is_pass, rng.normal(6, 16, n_events), np.where(is_carry, rng.normal(4, 5, n_events), 0))
+    dy = np.where(is_pass, rng.normal(0, 14, n_events), np.where(is_carry, rng.normal(0, 4, n_events), 0))
+    end_x, end_y = np.clip(x + dx, 0, 100), np.clip(y + dy, 0, 100)
+
+    is_shot = event_types == 'MissedShots'
+    if is_shot.any():
+        n_shots = int(is_shot.sum())
+        x[is_shot] = end_x[is_shot] = np.clip(100 - np.abs(rng.normal(8, 9, n_shots)), 60, 100)
+        y[is_shot] = end_y[is_shot] = np.clip(rng.normal(50, 12, n_shots), 20, 80)
+        distance = np.hypot((100 - x[is_shot]) * 1.05, (50 - y[is_shot]) * 0.68)
+        goal_chance = GOAL_RATE[0] * np.exp(-distance / GOAL_RATE[1])
+        draw = rng.random(n_shots)
+        event_types[is_shot] = np.where(draw < goal_chance, 'Goal', np.where(draw < goal_chance + SAVED_RATE, 'SavedShot', 'MissedShots'))
+        success[is_shot] = draw < goal_chance
+
+    team_id = fixtures[match_id, side] if n_events else np.array([], dtype=int)
+    df_events = pd.DataFrame({
+        'id': index,
+        'match_id': match_id,
+        'minute': minute,
+        'second': rng.integers(0, 60, n_events),
+        'team_id': team_id,
+        'player_id': team_id * 100 + 1 + squad_index,
+        'type_display_name': event_types,
+        'outcome_type_display_name': np.where(success, 'Successful', 'Unsuccessful'),
+        'x': x.round(1),
+        'y': y.round(1),
+        'end_x': end_x.round(1),
+        'end_y': end_y.round(1),
+        'is_touch': ~np.isin(event_types, NON_TOUCH_TYPES),
+    })
+    if qualifier_rates is not None:
+        length = np.hypot((end_x - x) * 1.05, (end_y - y) * 0.68)
+        angle = np.arctan2(end_y - y, end_x - x) % (2 * np.pi)
+        df_events['qualifiers'] = _qualifier_lists(event_types, length, angle, rng, qualifier_rates)
+    return df_events
+
+def synthetic_matchdict(seed=0, n_events=EVENTS_PER_MATCH, team_ids=TEAM_IDS, n_players=PLAYERS_PER_TEAM,
+                        qualifier_rates=QUALIFIER_RATES, events=True):
+    """A raw WhoScored-shaped ``matchCentreData`` dict with rosters and, with ``events``, the
+    events of one synthetic match."""
+    matchdict = {
+        'home': synthetic_team(team_ids[0], n_players=n_players),
+        'away': synthetic_team(team_ids[1], n_players=n_players),
+        'events': [],
+    }
+    matchdict['playerIdNameDictionary'] = {str(p['playerId']): p['name'] for side in ('home', 'away') for p in matchdict[side]['players']}
+    if not events:
+        return matchdict
+
+    df_events = synthetic_events(n_events, seed, fixtures=(team_ids,), events_per_match=n_events, n_players=n_players,
+                                 qualifier_rates=qualifier_rates or {})
+    matchdict['events'] = [
+        {'id': 2_800_000_000 + seed * 10_000 + i, 'eventId': i, 'minute': int(e.minute), 'second': int(e.second), 'teamId': int(e.team_id),
+         'playerId': int(e.player_id), 'x': e.x, 'y': e.y, 'endX': e.end_x, 'endY': e.end_y,
+         'type': {'value': 1, 'displayName': e.type_display_name}, 'outcomeType': {'value': 1 if e.outcome_type_display_name == 'Successful' else 0, 'displayName': e.outcome_type_display_name},
+         'period': {'value': 1 if e.minute < 45 else 2, 'displayName': 'FirstHalf' if e.minute < 45 else 'SecondHalf'},
+         'qualifiers': e.qualifiers, 'satisfiedEventsTypes': [91, 118], 'isTouch': bool(e.is_touch)}
+        for i, e in enumerate(df_events.itertuples())
+    ]
+    return matchdict
+
+def synthetic_match_page(matchdict, match_id, padding=400_000):
+    """A WhoScored match page embedding ``matchdict``, padded to a realistic page size."""
+    filler = "<script>var tracking = '" + "x" * padding + "';</script>\n"
+    return (f"<html><head>{filler}</head><body><div id='layout'></div><script>\n"
+            f"require.config.params[\"args\"] = {{\n    matchId: {match_id},\n    matchCentreData: {json.dumps(matchdict)},\n"
+            f"    matchCentreEventTypeJson: {{\"shotSixYardBox\": 0}},\n    formationIdNameMappings: {{}}\n}};\n</script></body></html>")
+
+def write_synthetic_match(match_dir, xT_grid, seed=0, n_events=EVENTS_PER_MATCH, team_ids=TEAM_IDS, n_players=PLAYERS_PER_TEAM,
+                          qualifier_rates=QUALIFIER_RATES, match_id=0):
+    """Writes one synthetic match folder as ``dashboard.py`` reads it: ``df_events.csv``, the
+    match metadata tables and ``xT_grid.npy``."""
+    os.makedirs(match_dir, exist_ok=True)
+    df_events = synthetic_events(n_events, seed, fixtures=(team_ids,), events_per_match=n_events, n_players=n_players,
+                                 qualifier_rates=qualifier_rates or {}).drop(columns=['match_id'])
+    df_events['qualifiers'] = df_events['qualifiers'].map(json.dumps)
+    df_events.to_csv(os.path.join(match_dir, "df_events.csv"), index=False)
+    write_match_meta(synthetic_matchdict(team_ids=team_ids, n_players=n_players, events=False), match_dir, match_id)
+    write_xt_grid(xT_grid, os.path.join(match_dir, XT_GRID_FILE))
+
+def write_synthetic_season(data_dir, xT_grid, n_matches, n_teams=20, seed=0, **kwargs):
+    """Writes ``n_matches`` synthetic match folders to ``data_dir/<match_id>/`` (ids from 1)
+    and returns the match ids. ``kwargs`` go to ``write_synthetic_match``."""
+    match_ids = list(range(1, n_matches + 1))
+    for match_id, fixture in zip(match_ids, season_fixtures(n_matches, n_teams, seed)):
+        write_synthetic_match(os.path.join(data_dir, str(match_id)), xT_grid, seed=seed + match_id, team_ids=fixture,
+                              match_id=match_id, **kwargs)
+    return match_ids
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Write synthetic WhoScored-shaped match folders for offline runs and benchmarks.")
+    parser.add_argument("output_dir", help="directory to write <match_id>/ folders into")
+    parser.add_argument("--matches", type=int, default=1)
+    parser.add_argument("--events", type=int, default=EVENTS_PER_MATCH, help="events per match")
+    parser.add_argument("--teams", type=int, default=20, help="teams in the round robin the fixtures come from")
+    parser.add_argument("--players", type=int, default=PLAYERS_PER_TEAM, help="players per team, starters included")
+    parser.add_argument("--qualifiers", help="JSON file of {event type: {qualifier: rate}} (default: QUALIFIER_RATES)")
+    parser.add_argument("--xt-grid", default="./data/xT_grid.csv", help="xT grid (.npy or .csv) copied into every match")
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args(argv)
+
+    try:
+        xT_grid = load_xt_grid(args.xt_grid)
+        qualifier_rates = QUALIFIER_RATES
+        if args.qualifiers:
+            with open(args.qualifiers, "r") as f:
+                qualifier_rates = json.load(f)
+    except (OSError, ValueError) as e:
+        print(f"FATAL ERROR: Could not read the xT grid or qualifier rates. Error: {e}")
+        return 1
+
+    match_ids = write_synthetic_season(args.output_dir, xT_grid, args.matches, args.teams, args.seed,
+                                       n_events=args.events, n_players=args.players, qualifier_rates=qualifier_rates)
+    print(f"Wrote {len(match_ids)} synthetic matches to {args.output_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,19 +1,133 @@
+from functools import lru_cache, partial
+
 import numpy as np
 import pandas as pd
-import matplotlib.pyplot as plt
 import matplotlib.patheffects as patheffects
 from matplotlib.colors import LinearSegmentedColormap, to_rgba
-from scipy.ndimage import gaussian_filter1d
+from matplotlib.figure import Figure
+from matplotlib.lines import Line2D
+from matplotlib.patches import Patch, PathPatch
+from matplotlib.spines import Spine
+from scipy.ndimage import gaussian_filter
 from mplsoccer import Pitch
+from mplsoccer.utils import set_visible
+
+from zones import LANE_LINES
 
 BG_COLOR = '#0C0D0E'
 LINE_COLOR = 'white'
 HOME_COLOR = '#43A1D5'
 AWAY_COLOR = '#FF4C4C'
-
-def plot_enhanced_network(ax, passes_df, avg_locs, pass_combinations, team_metrics, team_name, color, is_home, bg_color=BG_COLOR):
-    pitch = Pitch(pitch_type='statsbomb', line_color=LINE_COLOR, pitch_color=bg_color, linewidth=1)
+HEATMAP_RESOLUTION = 2
+
+def binned_kde(x, y, bandwidth=None, resolution=HEATMAP_RESOLUTION):
+    """Gaussian density of statsbomb-pitch points on a fixed grid of ``resolution`` cells per unit.
+
+    Points are binned once and smoothed with a separable Gaussian, so the cost grows
+    with the grid, not the number of points. ``bandwidth`` is in pitch units; by
+    default it follows Scott's rule per axis like seaborn's kdeplot.
+    """
+    x = np.asarray(x, dtype=float); y = np.asarray(y, dtype=float)
+    valid = ~(np.isnan(x) | np.isnan(y))
+    x, y = x[valid], y[valid]
+    if len(x) < 2:
+        return None
+
+    n_x, n_y = int(120 * resolution), int(80 * resolution)
+    col = np.minimum((np.clip(x, 0, 120) * resolution).astype(np.intp), n_x - 1)
+    row = np.minimum((np.clip(y, 0, 80) * resolution).astype(np.intp), n_y - 1)
+    counts = np.bincount(row * n_x + col, minlength=n_x * n_y).reshape(n_y, n_x).astype(float)
+
+    if bandwidth is None:
+        scott = len(x) ** (-1 / 6)
+        bw_x, bw_y = np.std(x, ddof=1) * scott, np.std(y, ddof=1) * scott
+    else:
+        bw_x = bw_y = bandwidth
+    density = gaussian_filter(counts, sigma=(max(bw_y, 1e-3) * resolution, max(bw_x, 1e-3) * resolution), mode='constant')
+    return density * resolution ** 2 / len(x)
+
+def _density_levels(density, isoprop):
+    values = np.sort(density.ravel())[::-1]
+    normalized = np.cumsum(values) / values.sum()
+    return np.take(values, np.searchsorted(normalized, 1 - np.asarray(isoprop)), mode='clip')
+
+def pitch_heatmap(ax, x, y, cmap, bandwidth=None, resolution=HEATMAP_RESOLUTION, thresh=0.05, levels=None, zorder=1, **kwargs):
+    """Draws a KDE-style heatmap as one image. Cells holding the lowest ``thresh`` of
+    the mass are left transparent; ``levels`` bands the colors like a filled contour."""
+    density = binned_kde(x, y, bandwidth, resolution)
+    if density is None or density.max() <= 0:
+        return None
+
+    if levels is None:
+        floor = _density_levels(density, thresh)
+        image = np.ma.masked_less(density, floor)
+    else:
+        bounds = _density_levels(density, np.linspace(thresh, 1, levels))
+        band = np.clip(np.searchsorted(bounds, density, side='right') - 1, 0, len(bounds) - 2)
+        image = np.ma.masked_array((bounds[band] + bounds[band + 1]) / 2, mask=density < bounds[0])
+        floor = bounds[0]
+
+    return ax.imshow(image, extent=(0, 120, 0, 80), origin='lower', cmap=cmap, vmin=floor, vmax=density.max(),
+                     interpolation='bilinear', aspect=ax.get_aspect(), zorder=zorder, **kwargs)
+
+@lru_cache(maxsize=None)
+def _pitch_template(style):
+    pitch = Pitch(pitch_type='statsbomb', **dict(style))
+    fig = Figure()
+    ax = fig.add_subplot()
     pitch.draw(ax=ax)
+    fig.draw_without_rendering()  # Arc paths are only final after a draw
+    markings = []
+    for artist in ax.get_children():
+        if not isinstance(artist, (Line2D, Patch)) or isinstance(artist, Spine) or artist is ax.patch:
+            continue
+        props = {'alpha': artist.get_alpha(), 'zorder': artist.get_zorder(), 'linewidth': artist.get_linewidth(), 'linestyle': artist.get_linestyle()}
+        if isinstance(artist, Line2D):
+            markings.append(partial(Line2D, artist.get_xdata(), artist.get_ydata(), color=artist.get_color(), **props))
+        else:
+            path = artist.get_patch_transform().transform_path(artist.get_path())
+            markings.append(partial(PathPatch, path, fill=artist.get_fill(), facecolor=artist.get_facecolor(),
+                                    edgecolor=artist.get_edgecolor(), **props))
+    return pitch, markings
+
+def draw_pitch(ax, **style):
+    """Draws a statsbomb pitch with ``style`` (``Pitch`` keyword arguments) on ``ax`` and returns the Pitch.
+
+    The Pitch and its markings' geometry are built once per style and shared by every
+    panel and match; each call only adds ready-made line and patch artists, skipping
+    mplsoccer's per-draw setup and the autoscale pass over every arc.
+    """
+    pitch, markings = _pitch_template(tuple(sorted(style.items())))
+    set_visible(ax, spine_bottom=pitch.axis, spine_top=pitch.axis, spine_left=pitch.axis, spine_right=pitch.axis,
+                grid=False, tick=pitch.tick, label=pitch.label)
+    ax.set_xlim(pitch.extent[0], pitch.extent[1])
+    ax.set_ylim(pitch.extent[2], pitch.extent[3])
+    ax.set_aspect(pitch.aspect)
+    ax.set_facecolor(pitch.pitch_color)
+    for marking in markings:
+        ax.add_artist(marking())
+    return pitch
+
+def player_markers(pitch, ax, x, y, is_starter, s=None, **kwargs):
+    """Draws a team's players with one scatter per marker group: circles for starters,
+    squares for substitutes. ``s`` may be a scalar or per player."""
+    x, y, is_starter = np.asarray(x), np.asarray(y), np.asarray(is_starter, dtype=bool)
+    for marker, group in (('o', is_starter), ('s', ~is_starter)):
+        if group.any():
+            # a scalar size keeps matplotlib's pixel-snapped single-marker drawing path
+            sizes = np.asarray(s)[group] if np.ndim(s) else s
+            pitch.scatter(x[group], y[group], s=sizes, marker=marker, ax=ax, **kwargs)
+
+def network_lines(pitch, ax, combinations, color, max_width=10, zorder=1):
+    """All pass-pair lines of a network as one LineCollection, width and alpha scaled by ``pass_count``."""
+    share = (combinations['pass_count'] / combinations['pass_count'].max()).values
+    colors = np.tile(to_rgba(color), (len(share), 1))
+    colors[:, 3] = 0.3 + share * 0.6
+    return pitch.lines(combinations['x_avg'].values, combinations['y_avg'].values, combinations['x_avg_end'].values, combinations['y_avg_end'].values,
+                       lw=share * max_width, color=colors, ax=ax, zorder=zorder)
+
+def plot_enhanced_network(ax, avg_locs, pass_combinations, team_metrics, team_name, color, is_home, bg_color=BG_COLOR):
+    pitch = draw_pitch(ax, line_color=LINE_COLOR, pitch_color=bg_color, linewidth=1)
     ax.set_xlim(0, 120); ax.set_ylim(0, 80); ax.set_facecolor(bg_color)
 
     if not is_home:
@@ -26,18 +140,12 @@ def plot_enhanced_network(ax, passes_df, avg_locs, pass_combinations, team_metri
     )
     
     if len(combinations) > 0:
-        max_passes = combinations['pass_count'].max()
-        combinations['line_width'] = (combinations['pass_count'] / max_passes) * 10 
-        combinations['alpha'] = 0.3 + (combinations['pass_count'] / max_passes) * 0.6
-        
-        for _, row in combinations.iterrows():
-            pitch.lines(row['x_avg'], row['y_avg'], row['x_avg_end'], row['y_avg_end'],
-                        lw=row['line_width'], color=color, alpha=row['alpha'], ax=ax, zorder=1)
+        network_lines(pitch, ax, combinations, color)
 
+    if len(avg_locs) > 0:
+        player_markers(pitch, ax, avg_locs['x_avg'], avg_locs['y_avg'], avg_locs['isFirstEleven'] == True,
+                       s=1000, color=LINE_COLOR, edgecolors=color, linewidth=2.5, zorder=3)
     for player_id, row in avg_locs.iterrows():
-        marker = 'o' if row['isFirstEleven'] else 's'
-        pitch.scatter(row['x_avg'], row['y_avg'], s=1000, marker=marker, 
-                      color=LINE_COLOR, edgecolors=color, linewidth=2.5, ax=ax, zorder=3)
         ax.text(row['x_avg'], row['y_avg'], str(row['shirtNo']),
                 ha='center', va='center', fontsize=12, color=color, weight='bold', 
                 path_effects=[patheffects.withStroke(linewidth=2, foreground=LINE_COLOR)], zorder=4)
@@ -52,9 +160,10 @@ def plot_enhanced_network(ax, passes_df, avg_locs, pass_combinations, team_metri
 
     ax.set_title(f"{team_name} - Passing Network", fontsize=13, color=LINE_COLOR, pad=10)
 
-def defensive_block(ax, team_positions: dict, team_actions: pd.DataFrame, team_name: str, team_color: str, is_away_team: bool = False):
-    pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5, line_zorder=2, corner_arcs=True) 
-    pitch.draw(ax=ax); ax.set_facecolor(BG_COLOR); ax.set_xlim(-0.5, 120.5); ax.set_ylim(-0.5, 80.5)
+def defensive_block(ax, team_positions: dict, team_actions: pd.DataFrame, team_name: str, team_color: str, is_away_team: bool = False,
+                    bandwidth=None, resolution=HEATMAP_RESOLUTION):
+    pitch = draw_pitch(ax, pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5, line_zorder=2, corner_arcs=True)
+    ax.set_facecolor(BG_COLOR); ax.set_xlim(-0.5, 120.5); ax.set_ylim(-0.5, 80.5)
     
     if len(team_positions) == 0 or len(team_actions) == 0:
         ax.set_title(f"{team_name}\nDefensive Action Heatmap (No Data)", color=LINE_COLOR, fontsize=12); return {} 
@@ -65,7 +174,7 @@ def defensive_block(ax, team_positions: dict, team_actions: pd.DataFrame, team_n
         ax.invert_xaxis(); ax.invert_yaxis()
 
     flamingo_cmap = LinearSegmentedColormap.from_list("Team colors", [BG_COLOR, team_color], N=500)
-    pitch.kdeplot(team_actions['x_sb'], team_actions['y_sb'], ax=ax, fill=True, levels=5000, thresh=0.02, cut=4, cmap=flamingo_cmap)
+    pitch_heatmap(ax, team_actions['x_sb'], team_actions['y_sb'], flamingo_cmap, bandwidth=bandwidth, resolution=resolution, thresh=0.02)
     
     dah = round(positions_df['x'].median(), 2)
     center_backs = positions_df[positions_df['position'] == 'DC']
@@ -83,15 +192,12 @@ def defensive_block(ax, team_positions: dict, team_actions: pd.DataFrame, team_n
     MAX_MARKER_SIZE = 3500
     positions_df['marker_size'] = (positions_df['action_count'] / positions_df['action_count'].max()) * 2500 
     
-    for idx, row in positions_df.iterrows():
-        x_plot = row['x']; y_plot = row['y']
-        
-        if is_away_team: 
-            x_plot = 120 - x_plot; y_plot = 80 - y_plot
-
-        marker = 'o' if row['is_starter'] else 's'
-        pitch.scatter(x_plot, y_plot, s=row['marker_size'] + 50, marker=marker, color=BG_COLOR, edgecolor=LINE_COLOR, linewidth=1.5, alpha=1, zorder=3) 
-        pitch.annotate(str(row['shirtNo']), xy=(x_plot, y_plot), c=LINE_COLOR, ha='center', va='center', size=10, ax=ax) 
+    x_plots = 120 - positions_df['x'] if is_away_team else positions_df['x']
+    y_plots = 80 - positions_df['y'] if is_away_team else positions_df['y']
+    player_markers(pitch, ax, x_plots, y_plots, positions_df['is_starter'] == True,
+                   s=positions_df['marker_size'] + 50, color=BG_COLOR, edgecolor=LINE_COLOR, linewidth=1.5, alpha=1, zorder=3)
+    for shirt_no, x_plot, y_plot in zip(positions_df['shirtNo'], x_plots, y_plots):
+        pitch.annotate(str(shirt_no), xy=(x_plot, y_plot), c=LINE_COLOR, ha='center', va='center', size=10, ax=ax) 
         
     ax.text(dah_plot - 1 if not is_away_team else dah_plot + 1, -3 if not is_away_team else 78, f"DAH: {round(dah * 1.2, 2)}m", fontsize=8, color=LINE_COLOR, ha='right' if not is_away_team else 'left', va='center') 
     ax.text(120 if not is_away_team else 0, -3 if not is_away_team else 78, f'Compact:{compactness}%', fontsize=8, color=LINE_COLOR, ha='right' if not is_away_team else 'left', va='center') 
@@ -100,35 +206,22 @@ def defensive_block(ax, team_positions: dict, team_actions: pd.DataFrame, team_n
 
     return {'Average_Defensive_Action_Height': dah, 'Compactness': compactness}
 
-def draw_progressive_pass_map(ax, df_events, team_id, team_name, team_color, is_away_team=False):
-    
-    dfpro = df_events[
-        (df_events['team_id'] == team_id) &
-        (df_events['type_display_name'] == 'Pass') &
-        (df_events['outcome_type_display_name'] == 'Successful') &
-        (~df_events['qualifiers'].astype(str).str.contains('CornerTaken|Freekick', na=False)) &
-        (df_events['x'] >= 35) &
-        (df_events['prog_pass'] >= 9.11)
-    ].copy()
-    
-    dfpro['x_sb'] = dfpro['x'] * 1.2
-    dfpro['y_sb'] = dfpro['y'] * 0.8
-    dfpro['end_x_sb'] = dfpro['end_x'] * 1.2
-    dfpro['end_y_sb'] = dfpro['end_y'] * 0.8
+def draw_progressive_pass_map(ax, dfpro, team_name, team_color, is_away_team=False):
+    """``dfpro`` holds the ``x_sb``/``y_sb``/``end_x_sb``/``end_y_sb`` of ``get_progressive_passes``."""
 
-    pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5, line_zorder=2, corner_arcs=True) 
-    pitch.draw(ax=ax); ax.set_facecolor(BG_COLOR); ax.set_xlim(-0.5, 120.5); ax.set_ylim(-0.5, 80.5)
+    pitch = draw_pitch(ax, pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5, line_zorder=2, corner_arcs=True)
+    ax.set_facecolor(BG_COLOR); ax.set_xlim(-0.5, 120.5); ax.set_ylim(-0.5, 80.5)
     
     if is_away_team:
         ax.invert_xaxis(); ax.invert_yaxis()
+        dfpro = dfpro.copy()
         dfpro['x_sb'], dfpro['end_x_sb'] = 120 - dfpro['x_sb'], 120 - dfpro['end_x_sb']
         dfpro['y_sb'], dfpro['end_y_sb'] = 80 - dfpro['y_sb'], 80 - dfpro['end_y_sb']
 
     pro_count = len(dfpro)
     
     if pro_count > 0:
-        ax.hlines(26.67, xmin=0, xmax=120, colors=LINE_COLOR, linestyle='dashed', alpha=0.35)
-        ax.hlines(53.33, xmin=0, xmax=120, colors=LINE_COLOR, linestyle='dashed', alpha=0.35)
+        ax.hlines(LANE_LINES, xmin=0, xmax=120, colors=LINE_COLOR, linestyle='dashed', alpha=0.35)
         
         label_x = 8 if not is_away_team else 120 - 8
         bbox_props = dict(boxstyle="round,pad=0.3", edgecolor="None", facecolor=BG_COLOR, alpha=0.75)
@@ -142,44 +235,21 @@ def draw_progressive_pass_map(ax, df_events, team_id, team_name, team_color, is_
     
     return {'Total_Progressive_Passes': pro_count}
 
-def plot_xt_momentum_subplot(ax, df_events, xT_grid, team_id_to_name, home_team_id, away_team_id):
+def plot_xt_momentum_subplot(ax, momentum_df, team_id_to_name, home_team_id, away_team_id, home_color=HOME_COLOR, away_color=AWAY_COLOR):
     ax.set_facecolor(BG_COLOR)
-    
-    df = df_events.copy()
-    df['x'] *= 1.2; df['y'] *= 0.8; df['end_x'] *= 1.2; df['end_y'] *= 0.8
-    df_xT = df[(df['type_display_name'].isin(['Pass', 'Carry'])) & (df['outcome_type_display_name'] == 'Successful')].copy()
 
-    if len(df_xT) == 0:
+    if len(momentum_df) == 0:
         ax.text(0.5, 0.5, 'No xT data available', transform=ax.transAxes, ha='center', va='center', color=LINE_COLOR, fontsize=10); return 
 
-    n_rows, n_cols = xT_grid.shape
-    def get_bin(val, max_val, n_bins):
-        val = max(0, min(val, max_val)); return min(int(val / max_val * n_bins), n_bins - 1)
-    df_xT['xT'] = df_xT.apply(lambda row: xT_grid[get_bin(row['end_y'], 80, n_rows), get_bin(row['end_x'], 120, n_cols)] - xT_grid[get_bin(row['y'], 80, n_rows), get_bin(row['x'], 120, n_cols)], axis=1)
-    df_xT['xT_clipped'] = np.clip(df_xT['xT'], 0, 0.1)
-    df_xT['team'] = df_xT['team_id'].map(team_id_to_name)
-    max_xT_per_minute = df_xT.groupby(['team', 'minute'])['xT_clipped'].max().reset_index()
-    minutes = sorted(max_xT_per_minute['minute'].unique())
-    teams = [team_id_to_name[home_team_id], team_id_to_name[away_team_id]]
-    
-    window_size, decay_rate = 4, 0.25
-    weighted_xT_sum = {team: [] for team in teams}; momentum = []
-    for current_minute in minutes:
-        for team in teams:
-            recent_xT = max_xT_per_minute[(max_xT_per_minute['team'] == team) & (max_xT_per_minute['minute'] <= current_minute) & (max_xT_per_minute['minute'] > current_minute - window_size)]
-            weights = np.exp(-decay_rate * (current_minute - recent_xT['minute'].values))
-            weighted_sum = np.sum(weights * recent_xT['xT_clipped'].values)
-            weighted_xT_sum[team].append(weighted_sum)
-        momentum.append(weighted_xT_sum[teams[0]][-1] - weighted_xT_sum[teams[1]][-1])
-
-    momentum_smoothed = gaussian_filter1d(momentum, sigma=1.0)
+    minutes = momentum_df['minute'].values
+    momentum_smoothed = momentum_df['momentum_smoothed'].values
     ax.plot(minutes, momentum_smoothed, color=LINE_COLOR, linewidth=1.5) 
     ax.axhline(0, color=LINE_COLOR, linestyle='--', linewidth=1, alpha=0.7)
-    ax.fill_between(minutes, momentum_smoothed, where=(np.array(momentum_smoothed) > 0), color=HOME_COLOR, alpha=0.5, interpolate=True)
-    ax.fill_between(minutes, momentum_smoothed, where=(np.array(momentum_smoothed) < 0), color=AWAY_COLOR, alpha=0.5, interpolate=True)
+    ax.fill_between(minutes, momentum_smoothed, where=(np.array(momentum_smoothed) > 0), color=home_color, alpha=0.5, interpolate=True)
+    ax.fill_between(minutes, momentum_smoothed, where=(np.array(momentum_smoothed) < 0), color=away_color, alpha=0.5, interpolate=True)
 
-    ax.text(2, 0.06, team_id_to_name[home_team_id], fontsize=10, ha='left', va='center', color=HOME_COLOR, fontweight='bold') 
-    ax.text(2, -0.06, team_id_to_name[away_team_id], fontsize=10, ha='left', va='center', color=AWAY_COLOR, fontweight='bold') 
+    ax.text(2, 0.06, team_id_to_name[home_team_id], fontsize=10, ha='left', va='center', color=home_color, fontweight='bold') 
+    ax.text(2, -0.06, team_id_to_name[away_team_id], fontsize=10, ha='left', va='center', color=away_color, fontweight='bold') 
     ax.set_xlabel('Minute', color=LINE_COLOR, fontsize=9, fontweight='bold') 
     ax.set_title('xT Momentum', color=LINE_COLOR, fontsize=12, fontweight='bold') 
     ax.tick_params(colors=LINE_COLOR, axis='y', left=False, right=False, labelleft=False)
@@ -187,7 +257,7 @@ def plot_xt_momentum_subplot(ax, df_events, xT_grid, team_id_to_name, home_team_
     for spine in ax.spines.values(): spine.set_color(LINE_COLOR)
     ax.margins(x=0); ax.set_ylim(min(-0.08, np.min(momentum_smoothed) * 1.2), max(0.08, np.max(momentum_smoothed) * 1.2))
 
-def plot_match_stats_subplot(ax, stats, home_team_name, away_team_name):
+def plot_match_stats_subplot(ax, stats, home_team_name, away_team_name, home_color=HOME_COLOR, away_color=AWAY_COLOR):
     """Plots match statistics comparison using horizontal bars."""
     ax.set_facecolor(BG_COLOR); ax.axis('off')
     
@@ -204,23 +274,22 @@ def plot_match_stats_subplot(ax, stats, home_team_name, away_team_name):
         home_width = (home_val / total) * 0.35 if total > 0 else 0.1
         away_width = (away_val / total) * 0.35 if total > 0 else 0.1
 
-        ax.barh(y_positions[i], home_width, left=0.5-home_width, height=0.04, color=HOME_COLOR, alpha=0.8) 
-        ax.barh(y_positions[i], away_width, left=0.5, height=0.04, color=AWAY_COLOR, alpha=0.8) 
+        ax.barh(y_positions[i], home_width, left=0.5-home_width, height=0.04, color=home_color, alpha=0.8) 
+        ax.barh(y_positions[i], away_width, left=0.5, height=0.04, color=away_color, alpha=0.8) 
 
         ax.text(0.2, y_positions[i], f'{home_val}', ha='center', va='center', color=LINE_COLOR, fontsize=9, weight='bold') 
         ax.text(0.8, y_positions[i], f'{away_val}', ha='center', va='center', color=LINE_COLOR, fontsize=9, weight='bold') 
         ax.text(0.5, y_positions[i], category, ha='center', va='center', color=LINE_COLOR, fontsize=8, weight='bold') 
         
-    ax.text(0.2, 0.95, home_team_name, ha='center', va='center', color=HOME_COLOR, fontsize=12, weight='bold') 
-    ax.text(0.8, 0.95, away_team_name, ha='center', va='center', color=AWAY_COLOR, fontsize=12, weight='bold') 
+    ax.text(0.2, 0.95, home_team_name, ha='center', va='center', color=home_color, fontsize=12, weight='bold') 
+    ax.text(0.8, 0.95, away_team_name, ha='center', va='center', color=away_color, fontsize=12, weight='bold') 
     ax.set_title('Key Match Stats', fontsize=12, color=LINE_COLOR, weight='bold') 
     
     ax.set_xlim(0, 1); ax.set_ylim(0, 1)
 
 
 def plot_half_pass_density(ax, df_passes, team_name, team_color, is_away_team=False):
-    pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5)
-    pitch.draw(ax=ax)
+    pitch = draw_pitch(ax, pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5)
     ax.set_facecolor(BG_COLOR)
     
     if not is_away_team:
@@ -234,7 +303,7 @@ def plot_half_pass_density(ax, df_passes, team_name, team_color, is_away_team=Fa
         
     ax.set_title(f"{team_name} - Opponent Half Passing Flow", fontsize=12, color=LINE_COLOR, fontweight='bold')
     
-    plot_df = df_passes.copy()
+    plot_df = df_passes
     
     if len(plot_df) == 0:
         ax.text(90, 40, "No passes in opponent's half.", ha='center', va='center', color='gray', fontsize=10)
@@ -259,9 +328,8 @@ def plot_half_pass_density(ax, df_passes, team_name, team_color, is_away_team=Fa
     ax.text(115 if not is_away_team else 5, 75, f"Pass Count: {len(plot_df)}", 
             color=LINE_COLOR, fontsize=10, ha='right' if not is_away_team else 'left')
 
-def plot_recovery_turnover_map(ax, df_actions, team_name, is_away_team=False):
-    pitch = Pitch(pitch_type='statsbomb', pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5)
-    pitch.draw(ax=ax)
+def plot_recovery_turnover_map(ax, df_actions, team_name, is_away_team=False, bandwidth=None, resolution=HEATMAP_RESOLUTION):
+    pitch = draw_pitch(ax, pitch_color=BG_COLOR, line_color=LINE_COLOR, linewidth=1.5)
     ax.set_facecolor(BG_COLOR)
     ax.set_title(f"{team_name} - Ball Recovery vs Turnover Zones", fontsize=12, color=LINE_COLOR, fontweight='bold')
     
@@ -273,9 +341,9 @@ def plot_recovery_turnover_map(ax, df_actions, team_name, is_away_team=False):
     df_turn = df_actions[df_actions['action_type'] == 'Turnover']
     
     if len(df_actions) > 10:
-         pitch.kdeplot(df_actions['x_sb'], df_actions['y_sb'], ax=ax, fill=True, levels=10, 
-                       cmap=LinearSegmentedColormap.from_list("ActionDensity", [BG_COLOR, 'gray'], N=100),
-                       zorder=0, alpha=0.3)
+         pitch_heatmap(ax, df_actions['x_sb'], df_actions['y_sb'], 
+                       LinearSegmentedColormap.from_list("ActionDensity", [BG_COLOR, 'gray'], N=100),
+                       bandwidth=bandwidth, resolution=resolution, levels=10, zorder=0, alpha=0.3)
     
     pitch.scatter(df_rec['x_sb'], df_rec['y_sb'], ax=ax,
                   marker='D', 
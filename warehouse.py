@@ -0,0 +1,293 @@
+import argparse
+import os
+import sqlite3
+import sys
+import time
+import pandas as pd
+
+from cache import DEFAULT_ARTIFACT_CACHE_MB
+from dashboard import artifact_cache, artifact_data_key, compute_match_metrics, load_config, open_match
+from store import MATCH_META_FILE, TEAMS_FILE, find_match_dirs, load_match_info, read_events
+
+WAREHOUSE_FILE = "warehouse.sqlite"
+
+# Match stat name -> team_match column.
+STAT_COLUMNS = {
+    'Possession': 'possession',
+    'Field Tilt': 'field_tilt',
+    'PPDA': 'ppda',
+    'Tackles (Wins)': 'tackles_won',
+    'Interceptions': 'interceptions',
+    'Clearance': 'clearances',
+    'Aerials (Wins)': 'aerials_won',
+}
+TEAM_METRIC_COLUMNS = ['verticality', 'defense_line', 'forward_line', 'team_median']
+TEAM_COLUMNS = list(STAT_COLUMNS.values()) + TEAM_METRIC_COLUMNS + ['progressive_passes', 'defensive_actions', 'xt', 'xt_clipped']
+PLAYER_COLUMNS = ['pass_count', 'x_avg', 'y_avg', 'defensive_actions', 'defensive_x', 'defensive_y', 'xt', 'xt_clipped']
+# Pitch locations (and the team lines and verticality) come from float32 events; they are
+# stored at the 2 decimals the metrics report, not as float32 noise like 76.919998.
+LOCATION_COLUMNS = ['x_avg', 'y_avg', 'defensive_x', 'defensive_y']
+LOCATION_DECIMALS = 2
+# Player columns summed over matches in the leaderboards; the rest are averaged.
+PLAYER_TOTALS = ['pass_count', 'defensive_actions', 'xt', 'xt_clipped']
+XT_PLAYER_COLUMNS = ['team_id', 'player_id', 'xT', 'xT_clipped']
+
+SCHEMA = f"""
+CREATE TABLE IF NOT EXISTS matches (
+    match_id INTEGER PRIMARY KEY,
+    start_time TEXT,
+    home_team_id INTEGER NOT NULL,
+    away_team_id INTEGER NOT NULL,
+    match_dir TEXT,
+    data_key TEXT,
+    ingested_at REAL
+);
+CREATE INDEX IF NOT EXISTS matches_start ON matches (start_time, match_id);
+CREATE TABLE IF NOT EXISTS team_match (
+    match_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    side TEXT NOT NULL,
+    team_name TEXT,
+    opponent_id INTEGER NOT NULL,
+    {', '.join(f'{column} REAL' for column in TEAM_COLUMNS)},
+    PRIMARY KEY (match_id, team_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS team_match_team ON team_match (team_id, match_id);
+CREATE TABLE IF NOT EXISTS player_match (
+    match_id INTEGER NOT NULL,
+    team_id INTEGER NOT NULL,
+    player_id INTEGER NOT NULL,
+    name TEXT,
+    position TEXT,
+    shirt_no INTEGER,
+    is_starter INTEGER,
+    {', '.join(f'{column} REAL' for column in PLAYER_COLUMNS)},
+    PRIMARY KEY (match_id, player_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS player_match_player ON player_match (player_id, match_id);
+CREATE INDEX IF NOT EXISTS player_match_team ON player_match (team_id, match_id);
+"""
+
+# Most recent first; the rank of a team's match among its own matches.
+RECENT_ORDER = "m.start_time DESC, m.match_id DESC"
+
+def _column(metric, columns):
+    if metric not in columns:
+        raise ValueError(f"unknown metric {metric!r}; choose from {', '.join(columns)}")
+    return metric
+
+def _records(df):
+    records = df.astype(object)
+    return records.where(records.notna(), None).values.tolist()
+
+def match_id_for(match_dir):
+    """The WhoScored match id stored with the match, else the directory name."""
+    path = os.path.join(match_dir, TEAMS_FILE)
+    if os.path.exists(path):
+        match_ids = read_events(path, ['match_id'])['match_id']
+        if len(match_ids) and match_ids.iloc[0]:
+            return int(match_ids.iloc[0])
+    name = os.path.basename(os.path.normpath(match_dir))
+    if not name.isdigit():
+        raise ValueError(f"{match_dir} has no match id; store it with scraper.py or name the directory after it")
+    return int(name)
+
+def team_rows(match_id, match_metrics, matchdict, xt):
+    """One ``team_match`` row per side from ``compute_match_metrics`` output and the xT frame."""
+    team_ids = (match_metrics['home_team_id'], match_metrics['away_team_id'])
+    rows = []
+    for side, team_id, opponent_id in (('home', *team_ids), ('away', *team_ids[::-1])):
+        metrics = match_metrics[f'{side}_metrics']
+        team_xt = xt[xt['team_id'] == team_id]
+        values = [match_metrics['stats'].get(name, {}).get(side) for name in STAT_COLUMNS]
+        values += [round(float(metrics[name]), LOCATION_DECIMALS) if metrics.get(name) is not None else None
+                   for name in TEAM_METRIC_COLUMNS]
+        values += [len(match_metrics[f'{side}_progressive_passes']), len(match_metrics[f'{side}_actions']),
+                   float(team_xt['xT'].sum()), float(team_xt['xT_clipped'].sum())]
+        rows.append([match_id, int(team_id), side, matchdict[side].get('name'), int(opponent_id)] + values)
+    return rows
+
+def player_rows(match_id, match_metrics, xt):
+    """One ``player_match`` row per player who passed, made a defensive action or moved the
+    ball with a Pass/Carry."""
+    frames = []
+    for side in ('home', 'away'):
+        team_id = match_metrics[f'{side}_team_id']
+        locs = match_metrics[f'{side}_avg_locs_all'].rename(columns={'shirtNo': 'shirt_no', 'isFirstEleven': 'is_starter'})
+        actions = match_metrics[f'{side}_actions'].groupby('player_id').agg(
+            defensive_actions=('id', 'count'), defensive_x=('x_sb', 'median'), defensive_y=('y_sb', 'median'))
+        player_xt = xt[xt['team_id'] == team_id].groupby('player_id').agg(xt=('xT', 'sum'), xt_clipped=('xT_clipped', 'sum'))
+        players = locs.join(actions, how='outer').join(player_xt, how='outer')
+        players.index = players.index.astype('int64').rename('player_id')
+        frames.append(players.reset_index().assign(match_id=match_id, team_id=team_id))
+    players = pd.concat(frames, ignore_index=True)
+    players[LOCATION_COLUMNS] = players[LOCATION_COLUMNS].astype('float64').round(LOCATION_DECIMALS)
+    players[['pass_count', 'defensive_actions']] = players[['pass_count', 'defensive_actions']].fillna(0)
+    players['is_starter'] = players['is_starter'].astype(object).where(players['is_starter'].notna(), None)
+    return _records(players[['match_id', 'team_id', 'player_id', 'name', 'position', 'shirt_no', 'is_starter'] + PLAYER_COLUMNS])
+
+class Warehouse:
+    """Season-wide SQLite store of every ingested match's metrics: ``matches``, one
+    ``team_match`` row per team and match, and one ``player_match`` row per player and
+    match. Indexed by team and player, so trends and league tables are answered from a
+    few hundred rows without reading any events.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.db = sqlite3.connect(path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    def data_key(self, match_id):
+        row = self.db.execute("SELECT data_key FROM matches WHERE match_id = ?", (match_id,)).fetchone()
+        return row[0] if row else None
+
+    def put_match(self, match_id, match_metrics, matchdict, xt, start_time=None, match_dir=None, data_key=None):
+        """Replaces everything stored for ``match_id`` in one transaction of bulk inserts."""
+        teams = team_rows(match_id, match_metrics, matchdict, xt)
+        players = player_rows(match_id, match_metrics, xt)
+        with self.db:
+            for table in ('player_match', 'team_match', 'matches'):
+                self.db.execute(f"DELETE FROM {table} WHERE match_id = ?", (match_id,))
+            self.db.execute("INSERT INTO matches VALUES (?, ?, ?, ?, ?, ?, ?)",
+                            (match_id, start_time, int(match_metrics['home_team_id']), int(match_metrics['away_team_id']),
+                             match_dir, data_key, time.time()))
+            self.db.executemany(f"INSERT INTO team_match VALUES ({', '.join('?' * len(teams[0]))})", teams)
+            self.db.executemany(f"INSERT INTO player_match VALUES ({', '.join('?' * (7 + len(PLAYER_COLUMNS)))})", players)
+
+    def ingest(self, match_dir, config, cache=None, force=False):
+        """Computes and stores one match directory. Returns ``'unchanged'`` without loading
+        events when its files and the metric code hash to the stored ``data_key``."""
+        match_id = match_id_for(match_dir)
+        data_key = artifact_data_key(match_dir)
+        if not force and self.data_key(match_id) == data_key:
+            return 'unchanged'
+        ctx = open_match(match_dir)
+        match_metrics = compute_match_metrics(ctx, config, cache, data_key)
+        xt = ctx.xt[XT_PLAYER_COLUMNS] if cache is None else cache.memoize(
+            cache.key(data_key, 'warehouse_xt'), lambda: ctx.xt[XT_PLAYER_COLUMNS])
+        start_time = None
+        if os.path.exists(os.path.join(match_dir, MATCH_META_FILE)):
+            start_time = load_match_info(match_dir).get('startTime')
+        self.put_match(match_id, match_metrics, ctx.matchdict, xt, start_time, os.path.abspath(match_dir), data_key)
+        return 'ingested'
+
+    def query(self, sql, params=()):
+        return pd.read_sql_query(sql, self.db, params=params)
+
+    def team_trend(self, team_id, metric='ppda', last=10, window=3):
+        """``metric`` over the team's last ``last`` matches, oldest first, with a rolling
+        mean over ``window`` matches."""
+        column = _column(metric, TEAM_COLUMNS)
+        trend = self.query(
+            f"SELECT t.match_id, m.start_time, t.side, t.opponent_id, o.team_name AS opponent, t.{column} "
+            f"FROM team_match t JOIN matches m USING (match_id) "
+            f"JOIN team_match o ON o.match_id = t.match_id AND o.team_id = t.opponent_id "
+            f"WHERE t.team_id = ? ORDER BY {RECENT_ORDER} LIMIT ?", (team_id, last)
+        ).iloc[::-1].reset_index(drop=True)
+        trend['rolling'] = trend[column].rolling(window, min_periods=1).mean()
+        return trend
+
+    def league_table(self, metrics=('ppda', 'possession', 'field_tilt', 'xt_clipped'), last=None, conceded=False):
+        """Per-team averages of ``metrics`` over each team's last ``last`` matches (all if
+        None), sorted by the first metric. With ``conceded`` the opponents' values are
+        averaged instead, e.g. the xT each team allows."""
+        columns = [_column(metric, TEAM_COLUMNS) for metric in metrics]
+        source = "o" if conceded else "t"
+        return self.query(
+            f"WITH ranked AS (SELECT t.team_id, t.team_name, {', '.join(f'{source}.{c}' for c in columns)}, "
+            f"ROW_NUMBER() OVER (PARTITION BY t.team_id ORDER BY {RECENT_ORDER}) AS recent "
+            f"FROM team_match t JOIN matches m USING (match_id) "
+            f"JOIN team_match o ON o.match_id = t.match_id AND o.team_id = t.opponent_id) "
+            f"SELECT team_id, MAX(team_name) AS team_name, COUNT(*) AS matches, "
+            f"{', '.join(f'AVG({c}) AS {c}' for c in columns)} "
+            f"FROM ranked WHERE ? IS NULL OR recent <= ? GROUP BY team_id ORDER BY {columns[0]} DESC", (last, last)
+        )
+
+    def player_leaders(self, metric='xt_clipped', top=10, team_id=None, min_matches=1):
+        """Players ranked by ``metric``: summed over matches for counts and xT, averaged
+        for locations."""
+        column = _column(metric, PLAYER_COLUMNS)
+        aggregate = 'SUM' if column in PLAYER_TOTALS else 'AVG'
+        where, params = ("WHERE team_id = ?", (team_id,)) if team_id is not None else ("", ())
+        return self.query(
+            f"SELECT player_id, MAX(name) AS name, team_id, COUNT(*) AS matches, SUM(is_starter) AS starts, "
+            f"{aggregate}({column}) AS {column} FROM player_match {where} "
+            f"GROUP BY player_id, team_id HAVING COUNT(*) >= ? ORDER BY {column} DESC LIMIT ?",
+            params + (min_matches, top)
+        )
+
+    def player_trend(self, player_id, metric='xt_clipped', last=10):
+        column = _column(metric, PLAYER_COLUMNS)
+        return self.query(
+            f"SELECT p.match_id, m.start_time, p.team_id, p.is_starter, p.{column} "
+            f"FROM player_match p JOIN matches m USING (match_id) "
+            f"WHERE p.player_id = ? ORDER BY {RECENT_ORDER} LIMIT ?", (player_id, last)
+        ).iloc[::-1].reset_index(drop=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Store match metrics in a season warehouse and query trends and league tables.")
+    parser.add_argument("command", choices=['ingest', 'trend', 'league', 'players'])
+    parser.add_argument("match_dirs", nargs="*", help="ingest: match directories (default: every match under DATA_DIR)")
+    parser.add_argument("--config", default="config.json", help="path to config.json")
+    parser.add_argument("--db", help=f"warehouse file (default: <DATA_DIR>/{WAREHOUSE_FILE})")
+    parser.add_argument("--force", action="store_true", help="ingest: recompute matches whose inputs are unchanged")
+    parser.add_argument("--cache-dir", help="metric artifact cache directory (default: <DATA_DIR>/cache/artifacts)")
+    parser.add_argument("--cache-size", type=int, default=DEFAULT_ARTIFACT_CACHE_MB, help="artifact cache size limit in MB")
+    parser.add_argument("--no-cache", action="store_true", help="ingest: recompute every metric and store nothing")
+    parser.add_argument("--team", type=int, help="trend: team id; players: only this team")
+    parser.add_argument("--player", type=int, help="trend: player id instead of a team")
+    parser.add_argument("--metric", nargs="+", help=f"team metrics ({', '.join(TEAM_COLUMNS)}) or player metrics ({', '.join(PLAYER_COLUMNS)})")
+    parser.add_argument("--last", type=int, help="only each team's (or player's) last N matches (trend default: 10)")
+    parser.add_argument("--conceded", action="store_true", help="league: average the opponents' values")
+    parser.add_argument("--top", type=int, default=10, help="players: leaderboard length")
+    args = parser.parse_args(argv)
+
+    try:
+        config = load_config(args.config)
+        data_dir = config["MATCH_SETTINGS"]["DATA_DIR"]
+        warehouse = Warehouse(args.db or os.path.join(data_dir, WAREHOUSE_FILE))
+    except (OSError, KeyError, ValueError, sqlite3.Error) as e:
+        print(f"FATAL ERROR: Could not open the config or warehouse. Error: {e}")
+        return 1
+
+    start = time.perf_counter()
+    try:
+        if args.command == 'ingest':
+            cache = None if args.no_cache else artifact_cache(config, args.cache_dir, args.cache_size)
+            failed = 0
+            for match_dir in args.match_dirs or find_match_dirs(data_dir):
+                try:
+                    print(f"Match {match_dir}: {warehouse.ingest(match_dir, config, cache, args.force)}")
+                except (OSError, KeyError, ValueError) as e:
+                    failed += 1
+                    print(f"ERROR: match {match_dir} failed: {e}")
+            print(f"Ingested into {warehouse.path} in {time.perf_counter() - start:.1f}s; {failed} failed")
+            return 1 if failed else 0
+        if args.command == 'trend' and args.player is not None:
+            result = warehouse.player_trend(args.player, *(args.metric or [])[:1], last=args.last or 10)
+        elif args.command == 'trend':
+            if args.team is None:
+                parser.error("trend needs --team or --player")
+            result = warehouse.team_trend(args.team, *(args.metric or [])[:1], last=args.last or 10)
+        elif args.command == 'league':
+            result = warehouse.league_table(*([args.metric] if args.metric else []), last=args.last, conceded=args.conceded)
+        else:
+            result = warehouse.player_leaders(*(args.metric or [])[:1], top=args.top, team_id=args.team)
+    except ValueError as e:
+        print(f"FATAL ERROR: {e}")
+        return 1
+    finally:
+        warehouse.close()
+
+    print(result.to_string(index=False))
+    print(f"({len(result)} rows in {(time.perf_counter() - start) * 1000:.1f} ms)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,75 @@
+import numpy as np
+import pandas as pd
+
+# Events come in Opta coordinates (0-100 both ways); the metrics and panels work on a
+# 120x80 statsbomb pitch.
+PITCH_LENGTH = 120
+PITCH_WIDTH = 80
+X_SCALE = PITCH_LENGTH / 100
+Y_SCALE = PITCH_WIDTH / 100
+
+# Opta x of the lines that split the defensive, middle and final thirds. An event on the
+# first line is still in the defensive third, one on the second already in the final third.
+THIRD_LINES = (35, 70)
+DEFENSIVE_THIRD, MIDDLE_THIRD, FINAL_THIRD = 0, 1, 2
+# Events without a location fall into no third, as they fail every x comparison.
+NO_THIRD = -1
+HALFWAY_LINE = PITCH_LENGTH / 2
+# Statsbomb y of the lines between the left, centre and right lane, and between the five
+# channels: wing, half-space, centre, half-space, wing.
+LANE_LINES = (26.67, 53.33)
+N_LANES = len(LANE_LINES) + 1
+CHANNEL_LINES = (18, 30, 50, 62)
+# The 18-zone grid: six 20 m bands along the pitch times the three lanes, numbered 1-18
+# from the own goal, so zone 14 is the centre lane just outside the box.
+ZONE_BANDS = 6
+N_ZONES = ZONE_BANDS * N_LANES
+ZONE_14 = 14
+
+def _bin(values, max_val, n_bins):
+    values = np.clip(np.nan_to_num(np.asarray(values, dtype=float), nan=0.0), 0, max_val)
+    return np.minimum((values / max_val * n_bins).astype(np.intp), n_bins - 1)
+
+def third(x):
+    """Third of Opta ``x``: 0 defensive, 1 middle, 2 final, ``NO_THIRD`` for NaN."""
+    x = np.asarray(x, dtype=float)
+    thirds = (x > THIRD_LINES[0]).astype(np.int8) + (x >= THIRD_LINES[1])
+    return np.where(np.isnan(x), NO_THIRD, thirds).astype(np.int8)
+
+def lane(y_sb):
+    return np.searchsorted(LANE_LINES, np.nan_to_num(np.asarray(y_sb, dtype=float)), side='right').astype(np.int8)
+
+def channel(y_sb):
+    return np.searchsorted(CHANNEL_LINES, np.nan_to_num(np.asarray(y_sb, dtype=float)), side='right').astype(np.int8)
+
+def zone(x_sb, y_sb):
+    """Zone 1-18 of the 18-zone grid."""
+    return (_bin(x_sb, PITCH_LENGTH, ZONE_BANDS) * N_LANES + lane(y_sb) + 1).astype(np.int8)
+
+def xt_cell(x_sb, y_sb, n_rows, n_cols):
+    """Flat index into an ``n_rows`` x ``n_cols`` xT grid."""
+    return _bin(y_sb, PITCH_WIDTH, n_rows) * n_cols + _bin(x_sb, PITCH_LENGTH, n_cols)
+
+def spatial_index(df_events, xt_shape=None):
+    """The statsbomb-scaled start and end coordinates of every event and the zones they
+    fall in, on ``df_events``' index: ``third``, ``half``, ``lane``, ``channel``, ``zone``
+    and, given the grid's ``(n_rows, n_cols)``, ``xt_cell``; each also as ``end_*`` for
+    the end location."""
+    columns = {}
+    for prefix in ('', 'end_'):
+        x, y = df_events[f'{prefix}x'], df_events[f'{prefix}y']
+        x_sb, y_sb = x * X_SCALE, y * Y_SCALE
+        columns[f'{prefix}x_sb'], columns[f'{prefix}y_sb'] = x_sb, y_sb
+        x_sb, y_sb = x_sb.to_numpy(), y_sb.to_numpy()
+        columns[f'{prefix}third'] = third(x.to_numpy())
+        columns[f'{prefix}half'] = (x_sb >= HALFWAY_LINE).astype(np.int8)
+        columns[f'{prefix}lane'] = lane(y_sb)
+        columns[f'{prefix}channel'] = channel(y_sb)
+        columns[f'{prefix}zone'] = zone(x_sb, y_sb)
+        if xt_shape is not None:
+            columns[f'{prefix}xt_cell'] = xt_cell(x_sb, y_sb, *xt_shape).astype(np.int32)
+    return pd.DataFrame(columns, index=df_events.index)
+
+def zone_counts(zone_ids, n_zones, weights=None):
+    """Count (or sum of ``weights``) per zone id ``0..n_zones - 1``."""
+    return np.bincount(np.asarray(zone_ids, dtype=np.intp), weights=weights, minlength=n_zones)